@@ -0,0 +1,205 @@
+"""Synthetic XML corpus for the Xul benchmarks.
+
+The corpus is deterministic: the same profile (and seed) always generates
+the same bytes, so throughput can be compared between releases. A profile
+sets the number of files, records per file, element depth, namespace
+density and text length.
+
+A corpus directory holds the XML files of every profile and the documents
+that apply to all of them:
+
+- records.xsd: XSD of the records (foreign namespaces are validated laxly)
+- records.xsl: XSLT that summarises the records
+- <profile>/<profile>-NNNN.xml: XML files
+
+Usage:
+    python benchmarks/corpus.py CORPUS_DIR [profile ...]
+"""
+
+import argparse
+import os
+import random
+import sys
+from typing import NamedTuple
+from xml.sax.saxutils import escape
+
+# Namespace of the records; XPath prefix "d" (default namespace of xp).
+RECORDS_NS = "urn:xul:benchmark"
+# Foreign namespaces: urn:xul:benchmark:n0, n1, ...
+FOREIGN_NS = RECORDS_NS + ":n"
+# XPath expression (and namespace map) of the benchmarks.
+XPATH = "//d:record[d:value > 500]/d:title"
+XPATH_NS = {"d": RECORDS_NS}
+XSD_FILE = "records.xsd"
+XSLT_FILE = "records.xsl"
+
+WORDS = (
+    "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu nu xi omicron pi rho "
+    "sigma tau upsilon phi chi psi omega & < > \" ' café naïve Ωμέγα"
+).split()
+
+
+class Profile(NamedTuple):
+    """Shape of the XML files of a corpus profile."""
+
+    # Number of XML files.
+    files: int
+    # Records per XML file.
+    records: int
+    # Nesting depth of the node elements in a record.
+    depth: int
+    # Number of foreign namespaces.
+    namespaces: int
+    # Fraction (0-1) of the records with foreign elements and attributes.
+    ns_density: float
+    # Words of text per record.
+    words: int = 12
+
+
+PROFILES = {
+    # Many small files: files/s of the scripts.
+    "files": Profile(files=200, records=20, depth=3, namespaces=2, ns_density=0.2),
+    # One large file with many records: MB/s.
+    "records": Profile(files=1, records=20000, depth=3, namespaces=2, ns_density=0.2),
+    # Deeply nested elements.
+    "deep": Profile(files=1, records=1000, depth=60, namespaces=2, ns_density=0.2, words=4),
+    # Many namespace declarations.
+    "namespaces": Profile(files=1, records=5000, depth=3, namespaces=50, ns_density=1.0),
+}
+
+XSD = f"""<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           xmlns:d="{RECORDS_NS}" targetNamespace="{RECORDS_NS}"
+           elementFormDefault="qualified">
+  <xs:element name="corpus">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="record" type="d:record" maxOccurs="unbounded"/>
+      </xs:sequence>
+      <xs:attribute name="profile" type="xs:string"/>
+    </xs:complexType>
+  </xs:element>
+  <xs:complexType name="record">
+    <xs:sequence>
+      <xs:element name="title" type="xs:string"/>
+      <xs:element name="value" type="xs:integer"/>
+      <xs:element name="node" type="d:node"/>
+      <xs:any namespace="##other" processContents="lax" minOccurs="0" maxOccurs="unbounded"/>
+    </xs:sequence>
+    <xs:attribute name="id" type="xs:ID" use="required"/>
+    <xs:anyAttribute namespace="##other" processContents="lax"/>
+  </xs:complexType>
+  <xs:complexType name="node">
+    <xs:choice>
+      <xs:element name="node" type="d:node"/>
+      <xs:element name="leaf" type="xs:string"/>
+    </xs:choice>
+    <xs:attribute name="level" type="xs:positiveInteger"/>
+  </xs:complexType>
+</xs:schema>
+"""
+
+XSLT = f"""<?xml version="1.0" encoding="UTF-8"?>
+<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform"
+                xmlns:d="{RECORDS_NS}" exclude-result-prefixes="d">
+  <xsl:output method="xml" encoding="UTF-8" indent="yes"/>
+  <xsl:template match="/d:corpus">
+    <summary records="{{count(d:record)}}" total="{{sum(d:record/d:value)}}">
+      <xsl:apply-templates select="d:record[d:value &gt; 500]"/>
+    </summary>
+  </xsl:template>
+  <xsl:template match="d:record">
+    <record id="{{@id}}" depth="{{count(.//d:node)}}">
+      <xsl:value-of select="d:title"/>
+    </record>
+  </xsl:template>
+</xsl:stylesheet>
+"""
+
+
+def _text(rng: random.Random, words: int) -> str:
+    """Return escaped text of random words."""
+    return escape(" ".join(rng.choice(WORDS) for _ in range(words)), {'"': "&quot;"})
+
+
+def _record(rng: random.Random, profile: Profile, number: int) -> str:
+    """Return an XML record element."""
+    foreign = profile.namespaces and rng.random() < profile.ns_density
+    attributes = f'id="r{number}"'
+    extra = ""
+    if foreign:
+        # Namespace declarations on the record element.
+        prefixes = rng.sample(range(profile.namespaces), min(3, profile.namespaces))
+        for i in prefixes:
+            attributes += f' xmlns:n{i}="{FOREIGN_NS}{i}"'
+        attributes += f' n{prefixes[0]}:flag="{rng.randint(0, 9)}"'
+        extra = "".join(
+            f"<n{i}:note>{_text(rng, profile.words // 3 + 1)}</n{i}:note>" for i in prefixes
+        )
+    nodes_open = "".join(f'<node level="{level}">' for level in range(1, profile.depth + 1))
+    return (
+        f"<record {attributes}><title>{_text(rng, profile.words)}</title>"
+        f"<value>{rng.randint(0, 1000)}</value>"
+        f"{nodes_open}<leaf>{_text(rng, 2)}</leaf>{'</node>' * profile.depth}"
+        f"{extra}</record>\n"
+    )
+
+
+def xml_document(name: str, profile: Profile, seed: int = 0) -> bytes:
+    """Return the XML document (UTF-8) of a corpus file.
+
+    :param name: profile name
+    :param profile: corpus profile
+    :param seed: file number (random seed)
+    """
+    rng = random.Random(f"{name}-{seed}")
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<corpus xmlns="{RECORDS_NS}" profile="{name}">\n',
+    ]
+    parts.extend(_record(rng, profile, n) for n in range(profile.records))
+    parts.append("</corpus>\n")
+    return "".join(parts).encode("utf-8")
+
+
+def write_corpus(corpus_dir: str, names: tuple[str, ...] = tuple(PROFILES)) -> dict[str, list[str]]:
+    """Write the corpus files.
+
+    :param corpus_dir: corpus directory
+    :param names: corpus profiles
+
+    Return the XML files per profile.
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    for file_name, content in ((XSD_FILE, XSD), (XSLT_FILE, XSLT)):
+        with open(os.path.join(corpus_dir, file_name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    corpus: dict[str, list[str]] = {}
+    for name in names:
+        profile = PROFILES[name]
+        os.makedirs(os.path.join(corpus_dir, name), exist_ok=True)
+        corpus[name] = []
+        for seed in range(profile.files):
+            xml_file = os.path.join(corpus_dir, name, f"{name}-{seed:04}.xml")
+            with open(xml_file, "wb") as f:
+                f.write(xml_document(name, profile, seed))
+            corpus[name].append(xml_file)
+    return corpus
+
+
+def main() -> None:
+    """Write a synthetic XML corpus."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("corpus_dir", help="corpus directory")
+    parser.add_argument("profiles", nargs="*", help=f"profiles: {', '.join(PROFILES)} [all]")
+    args = parser.parse_args()
+    if unknown := [p for p in args.profiles if p not in PROFILES]:
+        parser.error(f"unknown profile: {', '.join(unknown)}")
+    for name, xml_files in write_corpus(args.corpus_dir, tuple(args.profiles or PROFILES)).items():
+        size = sum(os.path.getsize(f) for f in xml_files)
+        sys.stdout.write(f"{name:12} {len(xml_files):5} files {size / 1e6:8.2f} MB\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Startup benchmark of the Xul console scripts (python -X importtime).
+
+Every console script module is imported in a fresh Python interpreter with
+-X importtime. The best import time of the runs (xul modules and everything
+they import; less noisy than the mean) is compared with the baseline in
+startup.json.
+
+Exit status 1 when a console script is slower than its baseline plus the
+tolerance, or when it imports a module that must be loaded on first use
+(e.g. Pygments, for syntax highlighting only).
+
+Usage:
+    python benchmarks/startup.py             # check the startup budget
+    python benchmarks/startup.py --update    # write a new baseline
+
+The baseline depends on the machine; update it on the machine that checks it.
+
+-X importtime:
+    https://docs.python.org/3/using/cmdline.html#cmdoption-X
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Optional
+
+# Console script: module.
+SCRIPTS = {
+    "xp": "xul.cmd.xp",
+    "validate": "xul.cmd.validate",
+    "transform": "xul.cmd.transform",
+    "ppx": "xul.cmd.ppx",
+    "xul": "xul.cmd.server",
+}
+# Modules that are imported on first use, not at startup.
+LAZY_MODULES = ("pygments", "urllib.request", "concurrent.futures", "tempfile", "shutil", "hashlib")
+# The xul client only imports the Python standard library.
+CLIENT_LAZY_MODULES = (*LAZY_MODULES, "lxml")
+# Baseline: best import time (ms) per console script.
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup.json")
+
+
+def parse_cl() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument(
+        "-r",
+        "--runs",
+        type=int,
+        default=15,
+        help="interpreter runs per console script [%(default)s]",
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=25.0,
+        help="allowed slowdown (percentage) over the baseline [%(default)s]",
+    )
+    parser.add_argument(
+        "--update", action="store_true", help="write the measured import times as the baseline"
+    )
+    parser.add_argument("scripts", nargs="*", help=f"console scripts: {', '.join(SCRIPTS)} [all]")
+    args = parser.parse_args()
+    if unknown := [s for s in args.scripts if s not in SCRIPTS]:
+        parser.error(f"unknown console script: {', '.join(unknown)}")
+    return args
+
+
+def import_time(module: str) -> tuple[float, set[str]]:
+    """Import a module in a fresh interpreter; return the import time (ms) and imported modules.
+
+    :param module: module to import
+
+    The import time is the cumulative time of the top-level xul imports.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            # Header line.
+            continue
+        modules.add(name.strip())
+        if name.startswith(" xul"):
+            # Top-level import (not indented).
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def lazy_imports(script: str, modules: set[str]) -> list[str]:
+    """Return the lazy modules that a console script imports at startup."""
+    lazy = CLIENT_LAZY_MODULES if script == "xul" else LAZY_MODULES
+    return [
+        module
+        for module in lazy
+        if module in modules or any(m.startswith(f"{module}.") for m in modules)
+    ]
+
+
+def read_baseline() -> dict[str, float]:
+    """Return the baseline import times (ms)."""
+    try:
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def check_script(
+    script: str, runs: int, baseline: Optional[float], tolerance: float
+) -> tuple[float, bool]:
+    """Measure the startup of a console script; return the best time (ms) and its status.
+
+    :param script: console script
+    :param runs: interpreter runs
+    :param baseline: baseline import time (ms) or None
+    :param tolerance: allowed slowdown (percentage) over the baseline
+    """
+    times = []
+    modules: set[str] = set()
+    for _ in range(runs):
+        ms, modules = import_time(SCRIPTS[script])
+        times.append(ms)
+    best = min(times)
+    ok = True
+    status = ""
+    if baseline is not None:
+        budget = baseline * (1 + tolerance / 100)
+        status = f"budget {budget:7.1f} ms"
+        if best > budget:
+            status += "  SLOWER"
+            ok = False
+    if lazy := lazy_imports(script, modules):
+        status += f"  imports {', '.join(lazy)}"
+        ok = False
+    print(f"{script:10} {best:7.1f} ms (median {statistics.median(times):6.1f})  {status}")
+    return best, ok
+
+
+def main() -> None:
+    """Run the startup benchmark."""
+    args = parse_cl()
+    baseline = read_baseline()
+    best_times = {}
+    ok = True
+    for script in args.scripts or SCRIPTS:
+        best_times[script], script_ok = check_script(
+            script, args.runs, None if args.update else baseline.get(script), args.tolerance
+        )
+        ok = ok and script_ok
+
+    if args.update:
+        baseline.update(best_times)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({k: round(v, 1) for k, v in baseline.items()}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_FILE}")
+    if not ok:
+        sys.stderr.write("Startup budget exceeded\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
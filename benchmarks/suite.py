@@ -0,0 +1,251 @@
+"""Throughput benchmarks of the Xul library functions and console scripts.
+
+A synthetic corpus (see corpus.py) is generated and every benchmark runs
+on the XML files of a corpus profile:
+
+- library functions (MB/s): build_etree, namespaces, etree_xpath,
+  validate_xml, xml_transformer and prettyprint
+- console scripts (files/s on many small files, MB/s on a large file):
+  xp, validate, transform and ppx
+
+The best time of the repeats is compared with the baseline in
+baseline.json. Exit status 1 when a benchmark is slower than its baseline
+minus the tolerance.
+
+Usage:
+    python benchmarks/suite.py               # compare with the baseline
+    python benchmarks/suite.py -k xpath      # benchmarks matching 'xpath'
+    python benchmarks/suite.py --update      # write a new baseline
+
+The baseline depends on the machine; update it on the machine that checks it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from functools import partial
+from typing import Any, Callable, TextIO
+
+from corpus import PROFILES, XPATH, XPATH_NS, XSD_FILE, XSLT_FILE, write_corpus
+from lxml import etree
+
+from xul import __version__
+from xul.etree import build_etree
+from xul.ppxml import prettyprint
+from xul.validate import build_xml_schema, validate_xml
+from xul.xpath import build_xpath, etree_xpath, namespaces
+from xul.xsl import build_xsl_transform, xml_transformer
+
+# Baseline: throughput per benchmark.
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Corpus profiles of the library benchmarks.
+LIB_PROFILES = ("files", "records", "deep", "namespaces")
+# Corpus profiles of the console script benchmarks: unit.
+CLI_PROFILES = {"files": "files/s", "records": "MB/s"}
+
+
+def parse_cl() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument(
+        "-c", "--corpus", help="corpus directory (kept) [default: temporary directory]"
+    )
+    parser.add_argument(
+        "-k", dest="pattern", default="", help="only run benchmarks whose name contains PATTERN"
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="runs per benchmark [%(default)s]"
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=25.0,
+        help="allowed slowdown (percentage) under the baseline [%(default)s]",
+    )
+    parser.add_argument(
+        "--update", action="store_true", help="write the measured throughput as the baseline"
+    )
+    return parser.parse_args()
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """Return the best wall-clock time (seconds) of repeated calls."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _each(func: Callable[..., Any], items: list[Any], *args: Any, **kwargs: Any) -> None:
+    """Call a function for every item (XML file or ElementTree)."""
+    for item in items:
+        func(item, *args, **kwargs)
+
+
+def _pretty_print(trees: list[etree._ElementTree], devnull: TextIO) -> None:
+    """Pretty print ElementTrees to the null device."""
+    with redirect_stdout(devnull):
+        for el_tree in trees:
+            prettyprint(el_tree, syntax=False)
+
+
+def lib_benchmarks(corpus_dir: str, corpus: dict[str, list[str]]) -> dict[str, Callable[[], Any]]:
+    """Return the library benchmarks: name -> function (all XML files of a profile)."""
+    xml_schema = build_xml_schema(os.path.join(corpus_dir, XSD_FILE))
+    transformer = build_xsl_transform(os.path.join(corpus_dir, XSLT_FILE))
+    xpath_obj = build_xpath(XPATH, XPATH_NS)
+    if xml_schema is None or transformer is None or xpath_obj is None:
+        raise RuntimeError("Unable to build the XSD, XSLT or XPath of the corpus")
+    devnull = open(os.devnull, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    benchmarks: dict[str, Callable[[], Any]] = {}
+    for name in LIB_PROFILES:
+        xml_files = corpus[name]
+        # Parsed once; the benchmarks of the ElementTree functions exclude parsing.
+        trees = [etree.parse(xml_file) for xml_file in xml_files]
+        benchmarks.update(
+            {
+                f"build_etree/{name}": partial(_each, build_etree, xml_files),
+                f"namespaces/{name}": partial(_each, namespaces, trees),
+                f"etree_xpath/{name}": partial(_each, etree_xpath, trees, xpath_obj),
+                f"validate_xml/{name}": partial(
+                    _each, validate_xml, xml_files, xml_schema, silent=True
+                ),
+                f"xml_transformer/{name}": partial(_each, xml_transformer, xml_files, transformer),
+                f"prettyprint/{name}": partial(_pretty_print, trees, devnull),
+            }
+        )
+    return benchmarks
+
+
+def cli_benchmarks(corpus_dir: str, corpus: dict[str, list[str]]) -> dict[str, list[str]]:
+    """Return the console script benchmarks: name -> command line."""
+    xsd_file = os.path.join(corpus_dir, XSD_FILE)
+    xslt_file = os.path.join(corpus_dir, XSLT_FILE)
+    output_dir = os.path.join(corpus_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    benchmarks = {}
+    for name in CLI_PROFILES:
+        xml_files = corpus[name]
+        benchmarks.update(
+            {
+                f"xp/{name}": ["xp", XPATH, *xml_files],
+                f"validate/{name}": ["validate", "-x", xsd_file, *xml_files],
+                f"transform/{name}": ["transform", "-O", output_dir, xslt_file, *xml_files],
+                f"ppx/{name}": ["ppx", "-n", *xml_files],
+            }
+        )
+    return benchmarks
+
+
+def run_script(command: list[str]) -> None:
+    """Run a Xul console script (its main function) in a new interpreter."""
+    module = "server" if command[0] == "xul" else command[0]
+    subprocess.run(
+        [sys.executable, "-c", f"from xul.cmd.{module} import main; main()", *command[1:]],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+
+
+def read_baseline() -> dict[str, Any]:
+    """Return the baseline."""
+    try:
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_baseline(baseline: dict[str, Any], results: dict[str, float]) -> None:
+    """Write the baseline with the (new) results."""
+    baseline.update(
+        {
+            "xul": __version__,
+            "lxml": ".".join(str(v) for v in etree.LXML_VERSION),
+            "libxml2": ".".join(str(v) for v in etree.LIBXML_VERSION),
+            "python": platform.python_version(),
+        }
+    )
+    baseline.setdefault("results", {}).update({k: round(v, 2) for k, v in results.items()})
+    with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def report(
+    name: str, value: float, unit: str, baseline: dict[str, float], tolerance: float
+) -> bool:
+    """Print the throughput of a benchmark; return False when it is a regression."""
+    line = f"{name:28} {value:10.2f} {unit:8}"
+    ok = True
+    if (base := baseline.get(name)) is not None:
+        change = (value - base) / base * 100
+        line += f" baseline {base:10.2f} ({change:+6.1f} %)"
+        if change < -tolerance:
+            line += "  SLOWER"
+            ok = False
+    print(line, flush=True)
+    return ok
+
+
+def main() -> None:
+    """Run the benchmark suite."""
+    args = parse_cl()
+    corpus_dir = args.corpus or tempfile.mkdtemp(prefix="xul-benchmark-")
+    baseline = read_baseline()
+    base_results = {} if args.update else baseline.get("results", {})
+    results = {}
+    ok = True
+    try:
+        corpus = write_corpus(corpus_dir, tuple(PROFILES))
+        sizes = {name: sum(os.path.getsize(f) for f in files) for name, files in corpus.items()}
+
+        for name, func in lib_benchmarks(corpus_dir, corpus).items():
+            if args.pattern in name:
+                seconds = best_time(func, args.repeat)
+                results[name] = sizes[name.split("/")[1]] / 1e6 / seconds
+                ok &= report(name, results[name], "MB/s", base_results, args.tolerance)
+
+        for name, command in cli_benchmarks(corpus_dir, corpus).items():
+            if args.pattern in name:
+                profile = name.split("/")[1]
+                try:
+                    seconds = best_time(partial(run_script, command), max(1, args.repeat // 2))
+                except subprocess.CalledProcessError as e:
+                    print(f"{name:28} FAILED (exit status {e.returncode})", flush=True)
+                    ok = False
+                    continue
+                if CLI_PROFILES[profile] == "files/s":
+                    results[name] = len(corpus[profile]) / seconds
+                else:
+                    results[name] = sizes[profile] / 1e6 / seconds
+                ok &= report(
+                    name, results[name], CLI_PROFILES[profile], base_results, args.tolerance
+                )
+    finally:
+        if not args.corpus:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    if args.update:
+        write_baseline(baseline, results)
+        print(f"Baseline written to {BASELINE_FILE}")
+    if not ok:
+        sys.stderr.write("Throughput regression\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
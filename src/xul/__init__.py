@@ -6,6 +6,7 @@ XML scripts in Python.
  * xp: select XML nodes with XPath
  * transform: transform XML with XSLT
  * validate: validate XML with XSD, DTD or RELAX NG
+ * xul: run the scripts in a warm server process
 """
 
 # Xul version.
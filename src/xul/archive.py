@@ -0,0 +1,185 @@
+"""XML sources in zip and tar archives.
+
+An archive source is an archive file, optionally followed by ! and a member
+pattern (fnmatch):
+
+- bundle.zip: all members of the archive
+- bundle.tar.gz!*.xml: members matching *.xml, in any directory
+- bundle.zip!/feeds/*.xml: members in the feeds directory (also ./feeds)
+
+The members are read in one pass, in archive order, without extracting them:
+tar archives (also gzip, bzip2 and xz compressed) are read as a stream.
+A member is an XML source named archive!member.
+
+The zipfile and tarfile modules are imported on first use.
+
+zipfile and tarfile:
+    https://docs.python.org/3/library/zipfile.html
+    https://docs.python.org/3/library/tarfile.html
+"""
+
+import io
+import os
+from collections.abc import Iterable, Iterator
+from fnmatch import fnmatchcase
+from logging import getLogger
+from typing import Any, Optional
+
+logger = getLogger(__name__)
+
+# Separator of the archive and the member pattern (and of the member names).
+ARCHIVE_SEP = "!"
+# File name extensions of archives (without member pattern).
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+class ArchiveMember:
+    """XML source in an archive (file-like object for the XML parser).
+
+    :param name: archive!member
+    :param size: size (bytes) of the member
+    :param fileobj: file object of the member; read in archive order
+    :param data: content of the member (picklable: worker processes)
+    :param archive: archive file
+    :param member: member name (path) in the archive
+    """
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        fileobj: Any = None,
+        data: Optional[bytes] = None,
+        archive: str = "",
+        member: str = "",
+    ) -> None:
+        self.name = name
+        self.size = size
+        self.fileobj = fileobj
+        self.data = data
+        self.archive = archive
+        self.member = member
+
+    def __str__(self) -> str:
+        return self.name
+
+    def read(self, size: int = -1) -> bytes:
+        """Return bytes of the member (at most size)."""
+        if self.fileobj is None:
+            self.fileobj = io.BytesIO(self.data or b"")
+        return self.fileobj.read(size)
+
+
+def member_path(name: str) -> str:
+    """Return the path of an archive member without leading ./ and /, e.g. of tar -C dir ."""
+    while name.startswith(("./", "/")):
+        name = name[1:] if name[0] == "/" else name[2:]
+    return name
+
+
+def split_archive_source(xml_source: str) -> Optional[tuple[str, str]]:
+    """Return the archive file and member pattern of an archive source or None.
+
+    :param xml_source: XML source: XML file, URL or archive source
+    """
+    if os.path.isfile(xml_source):
+        if xml_source.lower().endswith(ARCHIVE_EXTENSIONS):
+            return xml_source, "*"
+        return None
+    archive, sep, pattern = xml_source.partition(ARCHIVE_SEP)
+    if sep and os.path.isfile(archive):
+        return archive, member_path(pattern) or "*"
+    return None
+
+
+def multiple_sources(xml_sources: list[str]) -> bool:
+    """Return True for multiple XML sources: more than one, or an archive source."""
+    return len(xml_sources) > 1 or any(split_archive_source(s) for s in xml_sources)
+
+
+def archive_members(
+    archive: str, pattern: str = "*", read: bool = False
+) -> Iterator[ArchiveMember]:
+    """Yield the members of an archive that match a pattern, in archive order.
+
+    :param archive: zip or tar file
+    :param pattern: fnmatch pattern of the member paths; * also matches /
+    :param read: read the content of the members (data), e.g. for worker processes
+
+    The pattern is matched with the member paths without leading ./ and /;
+    see member_path(). A warning is logged when no member matches.
+    Without read, a member can only be read until the next member is yielded.
+    Errors are logged; the remaining members are skipped.
+    """
+    # pylint: disable=import-outside-toplevel
+    import tarfile
+    import zipfile
+
+    count = 0
+    try:
+        if zipfile.is_zipfile(archive):
+            with zipfile.ZipFile(archive) as zip_file:
+                for info in zip_file.infolist():
+                    if info.is_dir() or not fnmatchcase(member_path(info.filename), pattern):
+                        continue
+                    count += 1
+                    name = f"{archive}{ARCHIVE_SEP}{info.filename}"
+                    if read:
+                        yield ArchiveMember(
+                            name,
+                            info.file_size,
+                            data=zip_file.read(info),
+                            archive=archive,
+                            member=info.filename,
+                        )
+                    else:
+                        with zip_file.open(info) as f:
+                            yield ArchiveMember(
+                                name,
+                                info.file_size,
+                                fileobj=f,
+                                archive=archive,
+                                member=info.filename,
+                            )
+        else:
+            # Stream: no random access to (compressed) tar members.
+            with tarfile.open(archive, "r|*") as tar_file:
+                for tar_info in tar_file:
+                    if not tar_info.isfile() or not fnmatchcase(
+                        member_path(tar_info.name), pattern
+                    ):
+                        continue
+                    count += 1
+                    name = f"{archive}{ARCHIVE_SEP}{tar_info.name}"
+                    member_file = tar_file.extractfile(tar_info)
+                    if read:
+                        data = member_file.read() if member_file else b""
+                        yield ArchiveMember(
+                            name, tar_info.size, data=data, archive=archive, member=tar_info.name
+                        )
+                    else:
+                        yield ArchiveMember(
+                            name,
+                            tar_info.size,
+                            fileobj=member_file,
+                            archive=archive,
+                            member=tar_info.name,
+                        )
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as e:
+        logger.error("Archive '%s': %s", archive, e)
+        return
+    if not count:
+        logger.warning("Archive '%s': no member matches '%s'", archive, pattern)
+
+
+def expand_sources(xml_sources: Iterable[str], read: bool = False) -> Iterator[Any]:
+    """Yield the XML sources with the members (ArchiveMember) of the archive sources.
+
+    :param xml_sources: XML sources: XML files, URLs and archive sources
+    :param read: read the content of the archive members; see archive_members()
+    """
+    for xml_source in xml_sources:
+        if (archive := split_archive_source(xml_source)) is None:
+            yield xml_source
+        else:
+            yield from archive_members(*archive, read=read)
@@ -0,0 +1,209 @@
+"""XML catalogs.
+
+An XML catalog maps public identifiers and (system) URLs, e.g. W3C DTD and
+XSD URLs, to local files. The catalog resolver loads the referenced XML,
+DTD and XSD documents from those local files, without network access, and
+keeps them in memory: later loads in the same process do not read the file.
+
+Supported OASIS XML catalog entries: public, system, uri, rewriteSystem,
+rewriteURI, systemSuffix, uriSuffix, group (xml:base) and nextCatalog.
+
+Catalog files: --catalog option or $XUL_CATALOG_FILES (space-separated).
+
+XML Catalogs (OASIS):
+    https://www.oasis-open.org/committees/download.php/14809/xml-catalogs.html
+Document loading and URL resolving:
+    https://lxml.de/resolvers.html
+"""
+
+import os
+from logging import getLogger
+from typing import Optional
+from urllib.parse import urljoin, urlparse
+
+from lxml import etree
+
+logger = getLogger(__name__)
+
+# Environment variable with the catalog files (space-separated).
+CATALOG_ENV = "XUL_CATALOG_FILES"
+# XML catalog namespace.
+CATALOG_NS = "urn:oasis:names:tc:entity:xmlns:xml:catalog"
+
+# Catalog resolver of the process; see catalog_resolver().
+_resolver: Optional["CatalogResolver"] = None
+
+
+def _file_name(uri: str) -> Optional[str]:
+    """Return the file name of a local URI (file name or file:// URL) or None."""
+    parsed = urlparse(uri)
+    if parsed.scheme == "file":
+        return parsed.path
+    if parsed.scheme and len(parsed.scheme) > 1:
+        # Remote URL (http, https, ftp, ...); a drive letter is one character.
+        return None
+    return uri
+
+
+class Catalog:
+    """Public identifier and URL mappings of XML catalog files.
+
+    :param catalog_files: XML catalog files
+    """
+
+    def __init__(self, catalog_files: list[str]) -> None:
+        self.public: dict[str, str] = {}
+        self.system: dict[str, str] = {}
+        self.uri: dict[str, str] = {}
+        # (prefix, rewrite prefix) and (suffix, URI) entries.
+        self.rewrite: list[tuple[str, str]] = []
+        self.suffix: list[tuple[str, str]] = []
+        self.catalog_files: list[str] = []
+        for catalog_file in catalog_files:
+            self.add_catalog(catalog_file)
+        # Longest match first.
+        self.rewrite.sort(key=lambda entry: len(entry[0]), reverse=True)
+        self.suffix.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+    def add_catalog(self, catalog_file: str) -> None:
+        """Add the entries of an XML catalog file (first entry wins).
+
+        :param catalog_file: XML catalog file
+        """
+        catalog_file = os.path.abspath(catalog_file)
+        if catalog_file in self.catalog_files:
+            return
+        self.catalog_files.append(catalog_file)
+        try:
+            catalog_tree = etree.parse(catalog_file)
+        except (etree.XMLSyntaxError, OSError) as e:
+            logger.error("Unable to read XML catalog '%s': %s", catalog_file, e)
+            return
+
+        next_catalogs = []
+        for elm in catalog_tree.iter(f"{{{CATALOG_NS}}}*"):
+            name = etree.QName(elm).localname
+            # Relative URIs: xml:base or the URL of the catalog file.
+            base = elm.base or catalog_file
+            uri = elm.get("uri")
+            if name == "public" and (public_id := elm.get("publicId")) and uri:
+                self.public.setdefault(public_id, urljoin(base, uri))
+            elif name == "system" and (system_id := elm.get("systemId")) and uri:
+                self.system.setdefault(system_id, urljoin(base, uri))
+            elif name == "uri" and (uri_name := elm.get("name")) and uri:
+                self.uri.setdefault(uri_name, urljoin(base, uri))
+            elif name in ("rewriteSystem", "rewriteURI") and elm.get("rewritePrefix"):
+                start = elm.get("systemIdStartString") or elm.get("uriStartString")
+                if start:
+                    self.rewrite.append((start, urljoin(base, elm.get("rewritePrefix"))))
+            elif name in ("systemSuffix", "uriSuffix") and uri:
+                suffix = elm.get("systemIdSuffix") or elm.get("uriSuffix")
+                if suffix:
+                    self.suffix.append((suffix, urljoin(base, uri)))
+            elif name == "nextCatalog" and elm.get("catalog"):
+                next_catalogs.append(urljoin(base, elm.get("catalog")))
+        for next_catalog in next_catalogs:
+            self.add_catalog(next_catalog)
+
+    def lookup(self, system_url: Optional[str], public_id: Optional[str] = None) -> Optional[str]:
+        """Return the catalog URI of a system URL or public identifier.
+
+        :param system_url: system identifier or URL
+        :param public_id: public identifier
+
+        Return None when the catalog has no entry.
+        """
+        if system_url:
+            if system_url in self.system:
+                return self.system[system_url]
+            if system_url in self.uri:
+                return self.uri[system_url]
+            for prefix, rewrite_prefix in self.rewrite:
+                if system_url.startswith(prefix):
+                    return rewrite_prefix + system_url[len(prefix) :]
+            for suffix, uri in self.suffix:
+                if system_url.endswith(suffix):
+                    return uri
+        if public_id and public_id in self.public:
+            return self.public[public_id]
+        return None
+
+
+class CatalogResolver(etree.Resolver):
+    """Resolve documents with an XML catalog; keep local documents in memory.
+
+    :param catalog: XML catalog
+    """
+
+    def __init__(self, catalog: Catalog) -> None:
+        super().__init__()
+        self.catalog = catalog
+        # Document cache: file name -> content.
+        self.documents: dict[str, bytes] = {}
+
+    def document(self, uri: str) -> Optional[bytes]:
+        """Return the content of a local catalog document (cached) or None."""
+        if (file_name := _file_name(uri)) is None:
+            return None
+        if file_name not in self.documents:
+            try:
+                with open(file_name, "rb") as f:
+                    self.documents[file_name] = f.read()
+            except OSError as e:
+                logger.warning("XML catalog document '%s': %s", file_name, e)
+                return None
+        return self.documents[file_name]
+
+    def resolve(self, system_url, public_id, context):
+        """Resolve a system URL or public identifier with the XML catalog."""
+        if (uri := self.catalog.lookup(system_url, public_id)) is None:
+            return None
+        if (content := self.document(uri)) is None:
+            # E.g. a remote URL: default document loader.
+            return None
+        return self.resolve_string(content, context, base_url=uri)
+
+
+def set_catalog_files(catalog_files: Optional[list[str]]) -> None:
+    """Use XML catalog files in this process (and its worker processes).
+
+    :param catalog_files: XML catalog files; see catalog_resolver()
+    """
+    # pylint: disable=global-statement
+    global _resolver
+
+    if catalog_files:
+        os.environ[CATALOG_ENV] = " ".join(os.path.abspath(f) for f in catalog_files)
+        _resolver = None
+
+
+def reset_catalog_resolver() -> None:
+    """Read the XML catalog files from $XUL_CATALOG_FILES again (e.g. new environment)."""
+    # pylint: disable=global-statement
+    global _resolver
+
+    _resolver = None
+
+
+def catalog_resolver() -> Optional[CatalogResolver]:
+    """Return the XML catalog resolver of the process or None without catalog files.
+
+    The catalog files are read from $XUL_CATALOG_FILES once per process.
+    """
+    # pylint: disable=global-statement
+    global _resolver
+
+    if _resolver is None and (catalog_files := os.environ.get(CATALOG_ENV, "").split()):
+        _resolver = CatalogResolver(Catalog(catalog_files))
+    return _resolver
+
+
+def add_catalog_resolver(parser: etree.XMLParser) -> etree.XMLParser:
+    """Add the XML catalog resolver (if any) to an XML parser and return the parser.
+
+    :param parser: XML parser
+    """
+    if resolver := catalog_resolver():
+        # A resolver is added once (resolver set).
+        parser.resolvers.add(resolver)
+    return parser
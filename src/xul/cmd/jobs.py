@@ -0,0 +1,183 @@
+"""Parallel processing of XML sources (--jobs).
+
+A pool of worker processes applies a job to XML sources. Each worker
+prepares its own job (XML parser, XPath, validator, XSL Transformer) once.
+The output of a job (standard output, standard error and logging) is captured
+in the worker and written by the main process in XML source order.
+
+concurrent.futures.ProcessPoolExecutor:
+    https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+"""
+
+import io
+import logging
+import os
+import sys
+from collections import deque
+from collections.abc import Iterable, Iterator
+from contextlib import redirect_stderr, redirect_stdout
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from ..stats import (
+    SourceStats,
+    add_sources,
+    enable_stats,
+    source_stats,
+    stats_enabled,
+    take_sources,
+)
+from ..utils import config_logger
+
+if TYPE_CHECKING:
+    # concurrent.futures is imported when the worker processes start (startup time).
+    from concurrent.futures import Future
+
+# Job function of a worker process; see init_worker().
+_job: Optional[Callable[[Any], Any]] = None
+# Error of the job preparation of a worker process; see init_worker().
+_job_error = ""
+# Captured standard error (and logging) of a worker process.
+_job_stderr = io.StringIO()
+
+# Jobs per worker process that are submitted ahead.
+JOBS_AHEAD = 4
+# Exit status when the worker processes fail, e.g. the job cannot be prepared.
+WORKER_ERROR_STATUS = 60
+
+
+class WorkerError(Exception):
+    """The job of a worker process cannot be prepared (picklable)."""
+
+
+def worker_count(jobs: int) -> int:
+    """Return the number of worker processes.
+
+    :param jobs: number of worker processes; 0 (or less) means one per CPU
+    """
+    if jobs > 0:
+        return jobs
+    return os.cpu_count() or 1
+
+
+def init_worker(
+    prepare: Callable[..., Callable[[Any], Any]], prepare_args: tuple, stats: bool = False
+) -> None:
+    """Initialise a worker process.
+
+    :param prepare: function that returns the job function of the worker
+    :param prepare_args: arguments for the prepare function
+    :param stats: collect the statistics of the XML sources (--stats)
+
+    Logging is captured (see run_job) and the job is prepared once per worker.
+    An error of the prepare function is raised (WorkerError) by run_job, so the
+    main process reports it once.
+    """
+    # pylint: disable=global-statement
+    global _job, _job_error
+
+    root_logger = logging.getLogger("")
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    config_logger(stream=_job_stderr)
+    if stats:
+        enable_stats("worker")
+
+    try:
+        _job = prepare(*prepare_args)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        _job_error = str(e)
+
+
+def run_job(xml_source: Any) -> tuple[Any, bytes, str, list[SourceStats]]:
+    """Apply the job of the worker process to an XML source.
+
+    :param xml_source: XML source
+
+    Return a tuple with the job result, the captured standard output (bytes),
+    the captured standard error (string) and the statistics of the XML source.
+    """
+    if _job is None:
+        raise WorkerError(_job_error or "worker process is not initialised")
+    # Same encoding as the standard output of the main process.
+    stdout = io.TextIOWrapper(
+        io.BytesIO(), encoding=sys.stdout.encoding, errors=sys.stdout.errors, newline=""
+    )
+    _job_stderr.seek(0)
+    _job_stderr.truncate()
+
+    with redirect_stdout(stdout), redirect_stderr(_job_stderr), source_stats(xml_source):
+        result = _job(xml_source)
+
+    stdout.flush()
+    return result, stdout.buffer.getvalue(), _job_stderr.getvalue(), take_sources()
+
+
+def write_output(stdout: bytes, stderr: str) -> None:
+    """Write the captured output of a job.
+
+    :param stdout: captured standard output
+    :param stderr: captured standard error
+    """
+    if stderr:
+        sys.stderr.write(stderr)
+        sys.stderr.flush()
+    if stdout:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(stdout)
+        sys.stdout.flush()
+
+
+def _job_result(future: "Future") -> tuple[Any, bytes, str]:
+    """Return the result and output of a job; add the statistics of its XML source."""
+    result, stdout, stderr, sources = future.result()
+    add_sources(sources)
+    return result, stdout, stderr
+
+
+def run_jobs(
+    prepare: Callable[..., Callable[[Any], Any]],
+    prepare_args: tuple,
+    xml_sources: Iterable[Any],
+    jobs: int,
+    error_status: int = WORKER_ERROR_STATUS,
+) -> Iterator[tuple[Any, bytes, str]]:
+    """Apply a job to XML sources in a pool of worker processes.
+
+    :param prepare: function that returns the job function; see init_worker()
+    :param prepare_args: (picklable) arguments for the prepare function
+    :param xml_sources: XML sources (file names or URLs)
+    :param jobs: number of worker processes; see worker_count()
+    :param error_status: exit status when the worker processes fail
+
+    Yield (result, standard output, standard error) tuples in XML source order.
+    Write the output with write_output(). The statistics of the XML sources
+    (--stats) are added to the statistics of the main process.
+
+    A limited number of jobs is submitted ahead, xml_sources is consumed lazily.
+    A failing worker process (e.g. the job cannot be prepared) is reported
+    on standard error; the script exits with error_status.
+    """
+    # pylint: disable=import-outside-toplevel
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    workers = worker_count(jobs)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(prepare, prepare_args, stats_enabled()),
+    )
+    pending: deque[Future] = deque()
+    try:
+        for xml_source in xml_sources:
+            pending.append(executor.submit(run_job, xml_source))
+            if len(pending) >= workers * JOBS_AHEAD:
+                yield _job_result(pending.popleft())
+        while pending:
+            yield _job_result(pending.popleft())
+    except (WorkerError, BrokenProcessPool) as e:
+        sys.stderr.write(f"Error: {e}\n")
+        sys.exit(error_status)
+    finally:
+        # Cancel pending jobs (e.g. BrokenPipeError).
+        executor.shutdown(wait=True, cancel_futures=True)
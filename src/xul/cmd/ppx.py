@@ -6,7 +6,10 @@ from sys import stderr, stdin
 from lxml.etree import XMLParser
 
 from .. import __version__
+from ..catalog import add_catalog_resolver, set_catalog_files
 from ..ppxml import pp_xml
+from ..sources import command_line_sources, has_sources
+from ..stats import enable_stats, report_stats, source_stats
 from ..utils import config_logger
 
 
@@ -20,6 +23,67 @@ def parse_cl() -> argparse.Namespace:
         metavar="xml_source",
         help="XML source (file, <stdin>, http://...)",
     )
+    parser.add_argument(
+        "-R",
+        "--recursive",
+        action="append",
+        default=None,
+        dest="directories",
+        metavar="DIR",
+        help="XML files (--include) in directory DIR and its subdirectories",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=None,
+        dest="include",
+        metavar="GLOB",
+        help="file name pattern of the XML files in directories (-R) [default: *.xml]",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=None,
+        dest="exclude",
+        metavar="GLOB",
+        help="skip files and directories with a matching name in directories (-R)",
+    )
+    parser.add_argument(
+        "--files-from",
+        action="store",
+        dest="files_from",
+        metavar="FILE",
+        help="XML sources listed in FILE (- is standard input): one per line or NUL-separated",
+    )
+    parser.add_argument(
+        "--huge-tree",
+        action="store_true",
+        default=False,
+        dest="huge_tree",
+        help="disable the libxml2 security limits: very deep trees and huge text nodes",
+    )
+    parser.add_argument(
+        "--catalog",
+        action="append",
+        default=None,
+        dest="catalog_files",
+        metavar="CATALOG",
+        help="XML catalog file: resolve public identifiers and URLs to local files",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_const",
+        const="text",
+        dest="stats",
+        help="report time per phase, MB/s, elements and peak memory on standard error",
+    )
+    parser.add_argument(
+        "--stats-json",
+        action="store_const",
+        const="json",
+        dest="stats",
+        help="report the statistics (--stats) as JSON on standard error",
+    )
     output_group = parser.add_argument_group("output options")
     output_group.add_argument(
         "-n",
@@ -47,18 +111,27 @@ def main() -> None:
 
     # Command line.
     args = parse_cl()
+    # XML catalog files (also for worker processes).
+    set_catalog_files(args.catalog_files)
+    # Run statistics (--stats, --stats-json).
+    if args.stats:
+        enable_stats("ppx", json_output=args.stats == "json")
 
     # Initialise XML parser and remove blank text for 'pretty_print' formatting.
     #   https://lxml.de/FAQ.html#parsing-and-serialisation
-    parser = XMLParser(remove_blank_text=True)
+    parser = add_catalog_resolver(XMLParser(remove_blank_text=True, huge_tree=args.huge_tree))
 
     # Pretty print XML sources.
-    for xml_s in args.xml_sources:
-        pp_xml(xml_s, parser=parser, syntax=args.syntax, xml_declaration=args.declaration)
+    for xml_s in command_line_sources(args):
+        with source_stats(xml_s):
+            pp_xml(xml_s, parser=parser, syntax=args.syntax, xml_declaration=args.declaration)
 
-    if not args.xml_sources:
+    if not has_sources(args):
         # Read from a pipe when no XML source is specified.
         if not stdin.isatty():
-            pp_xml(stdin, parser=parser, syntax=args.syntax, xml_declaration=args.declaration)
+            with source_stats(stdin):
+                pp_xml(stdin, parser=parser, syntax=args.syntax, xml_declaration=args.declaration)
         else:
             stderr.write("Error: no XML source specified\n")
+
+    report_stats()
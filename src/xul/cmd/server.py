@@ -0,0 +1,364 @@
+"""Run Xul scripts in a warm server process (xp, validate, transform, ppx).
+
+The server (--serve) imports lxml and the scripts once and keeps compiled
+XPath expressions, XSDs and XSLT style sheets in memory. Every request is
+received and handled in a forked child process, concurrently. The client
+passes its standard input, output and error (file descriptors), command line,
+working directory and environment, and exits with the exit status of the
+script. The child process returns the request (pipe) to the server, with the
+XPath expressions it compiled and the time it took to compile the XSD or XSLT.
+The server compiles them for later requests, with the same cache keys; an XSD
+or XSLT only when it compiled quickly, as the server does not accept requests
+meanwhile.
+
+Server:  xul --serve /tmp/xul.sock
+Client:  xul -S /tmp/xul.sock xp '//item' data.xml
+
+The client only imports the Python standard library.
+
+socket.send_fds (Unix domain sockets):
+    https://docs.python.org/3/library/socket.html#socket.send_fds
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+from typing import Any, Optional
+
+from .. import __version__
+
+# Xul scripts (module in xul.cmd).
+COMMANDS = ("xp", "validate", "transform", "ppx")
+# Environment variable with the server socket (client).
+SOCKET_ENV = "XUL_SOCKET"
+# Request header: length of the JSON request (network byte order).
+HEADER = struct.Struct("!Q")
+# Response: exit status of the script.
+STATUS = struct.Struct("!i")
+# Seconds to receive a request (child process).
+REQUEST_TIMEOUT = 10.0
+# Maximum seconds to compile the XSD or XSLT of a request in the child process
+# for the server to compile it (warm up) too; see warm_up().
+WARM_UP_SECONDS = 0.5
+
+
+def parse_cl():
+    """Parse the command line for the server socket and the script."""
+    # pylint: disable=import-outside-toplevel
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("-V", "--version", action="version", version="%(prog)s " + __version__)
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument(
+        "--serve", dest="serve", metavar="SOCKET", help="start the server on a Unix domain socket"
+    )
+    mode_group.add_argument(
+        "-S",
+        "--socket",
+        dest="socket",
+        metavar="SOCKET",
+        default=os.environ.get(SOCKET_ENV),
+        help=f"server socket of the client [default: ${SOCKET_ENV}]",
+    )
+    parser.add_argument("command", nargs="?", choices=COMMANDS, help="Xul script")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments of the Xul script")
+    args = parser.parse_args()
+    if not args.serve and not args.command:
+        parser.error("the following arguments are required: command")
+    if args.serve and args.command:
+        parser.error("argument --serve: not allowed with a command")
+    return args
+
+
+def _recv_exactly(conn: socket.socket, size: int) -> bytes:
+    """Receive size bytes (or less when the connection is closed)."""
+    data = b""
+    while len(data) < size:
+        if not (chunk := conn.recv(size - len(data))):
+            break
+        data += chunk
+    return data
+
+
+def run_client(socket_name: str, command: str, args: list[str]) -> int:
+    """Run a Xul script in the server and return its exit status (client).
+
+    :param socket_name: Unix domain socket of the server
+    :param command: Xul script
+    :param args: command-line arguments of the script
+    """
+    body = json.dumps(
+        {"command": command, "args": args, "cwd": os.getcwd(), "env": dict(os.environ)}
+    ).encode()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        try:
+            conn.connect(socket_name)
+        except OSError as e:
+            sys.stderr.write(f"Unable to connect to Xul server '{socket_name}': {e}\n")
+            return 75
+        # Standard input, output and error of the client.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        socket.send_fds(conn, [HEADER.pack(len(body))], [0, 1, 2])
+        conn.sendall(body)
+        status = _recv_exactly(conn, STATUS.size)
+    if len(status) != STATUS.size:
+        sys.stderr.write("Xul server closed the connection\n")
+        return 75
+    return STATUS.unpack(status)[0]
+
+
+def receive_request(conn: socket.socket) -> Optional[tuple[dict[str, Any], list[int]]]:
+    """Receive a request: JSON request and file descriptors (server).
+
+    Return None on error.
+    """
+    header, fds, _, _ = socket.recv_fds(conn, HEADER.size, 3)
+    header += _recv_exactly(conn, HEADER.size - len(header))
+    if len(header) != HEADER.size or len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        return None
+    body = _recv_exactly(conn, HEADER.unpack(header)[0])
+    try:
+        req = json.loads(body)
+    except ValueError:
+        req = None
+    if not isinstance(req, dict) or req.get("command") not in COMMANDS:
+        for fd in fds:
+            os.close(fd)
+        return None
+    return req, fds
+
+
+def parse_script_cl(req: dict[str, Any]) -> Any:
+    """Return the parsed command line of a request or None (server).
+
+    Usage and error messages of the script are discarded.
+    """
+    # pylint: disable=import-outside-toplevel
+    import importlib
+    from contextlib import redirect_stderr, redirect_stdout
+
+    module = importlib.import_module(f"xul.cmd.{req['command']}")
+    argv = sys.argv
+    sys.argv = [req["command"], *req["args"]]
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as devnull:
+            with redirect_stdout(devnull), redirect_stderr(devnull):
+                return module.parse_cl()
+    except SystemExit:
+        return None
+    finally:
+        sys.argv = argv
+
+
+def warm_up(req: dict[str, Any]) -> Optional[float]:
+    """Compile the XSD or XSLT of a request, as the script does.
+
+    :param req: request: command, args, cwd and env
+
+    In the child process of the request, before the script runs: the script
+    uses the compiled object. In the server, after the request, when the
+    child process compiled it within WARM_UP_SECONDS: the forked child
+    processes of later requests use the compiled object. Errors are reported
+    by the script; remote XSD documents are in the schema cache after the
+    request.
+
+    Return the seconds to compile the XSD or XSLT, or None (nothing compiled).
+    """
+    # pylint: disable=import-outside-toplevel
+    import logging
+    import time
+
+    from ..catalog import CATALOG_ENV
+    from ..schemas import get_xml_schema
+    from ..xsl import get_xsl_transform
+
+    if CATALOG_ENV in req["env"] or CATALOG_ENV in os.environ or "--catalog" in req["args"]:
+        # Documents are resolved with the XML catalog of the request.
+        return None
+    cwd = os.getcwd()
+    logging.disable(logging.CRITICAL)
+    try:
+        os.chdir(req["cwd"])
+        if (args := parse_script_cl(req)) is None:
+            return None
+        start = time.perf_counter()
+        if req["command"] == "validate" and args.xsd_source:
+            get_xml_schema(args.xsd_source)
+        elif req["command"] == "transform":
+            get_xsl_transform(args.xslt_source)
+        else:
+            return None
+        return time.perf_counter() - start
+    except OSError:
+        return None
+    finally:
+        os.chdir(cwd)
+        logging.disable(logging.NOTSET)
+
+
+def run_script(req: dict[str, Any], fds: list[int]) -> int:
+    """Run the Xul script of a request in the (forked) child process.
+
+    :param req: request: command, args, cwd and env
+    :param fds: standard input, output and error of the client
+
+    Return the exit status of the script.
+    """
+    # pylint: disable=import-outside-toplevel
+    import importlib
+    import logging
+    import traceback
+
+    from .. import catalog
+
+    for fd, client_fd in enumerate(fds):
+        os.dup2(client_fd, fd)
+        os.close(client_fd)
+    os.chdir(req["cwd"])
+    os.environ.clear()
+    os.environ.update(req["env"])
+    catalog.reset_catalog_resolver()
+    sys.argv = [req["command"], *req["args"]]
+    # sys.stdin, sys.stdout and sys.stderr now use the client file descriptors.
+    sys.stdout.reconfigure(line_buffering=os.isatty(1))  # type: ignore[union-attr]
+    # The script configures the console logging.
+    for handler in logging.getLogger("").handlers[:]:
+        logging.getLogger("").removeHandler(handler)
+
+    status = 0
+    try:
+        importlib.import_module(f"xul.cmd.{req['command']}").main()
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            status = e.code
+        elif e.code is not None:
+            sys.stderr.write(f"{e.code}\n")
+            status = 1
+    except KeyboardInterrupt:
+        status = 130
+    except Exception:  # pylint: disable=broad-exception-caught
+        traceback.print_exc()
+        status = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except (BrokenPipeError, ValueError):
+        pass
+    return status
+
+
+def serve(socket_name: str) -> None:
+    """Start the Xul server on a Unix domain socket.
+
+    :param socket_name: Unix domain socket (file name)
+    """
+    # pylint: disable=import-outside-toplevel
+    import importlib
+    import select
+    import signal
+    import socketserver
+
+    from ..xpath import build_xpath, compiled_xpaths
+
+    # Import the Xul scripts (and lxml) once.
+    for command in COMMANDS:
+        importlib.import_module(f"xul.cmd.{command}")
+
+    class XulServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+        """Receive and handle every request in a forked child process."""
+
+        # Read ends of the pipes of the child processes: handled requests.
+        warm_up_fds: list[int] = []
+
+        def process_request(self, request, client_address):
+            """Fork with a pipe to return the request to the server."""
+            # pylint: disable=attribute-defined-outside-init
+            self.pipe_fds = os.pipe()
+            super().process_request(request, client_address)
+            os.close(self.pipe_fds[1])
+            self.warm_up_fds.append(self.pipe_fds[0])
+
+        def finish_request(self, request, client_address):
+            """Receive the request and run its Xul script (child process)."""
+            for fd in [*self.warm_up_fds, self.pipe_fds[0]]:
+                os.close(fd)
+            # A client that sends no request does not block the server.
+            request.settimeout(REQUEST_TIMEOUT)
+            try:
+                received = receive_request(request)
+            except OSError:
+                received = None
+            if received is None:
+                return
+            request.settimeout(None)
+            compiled = set(compiled_xpaths())
+            seconds = warm_up(received[0])
+            status = run_script(*received)
+            # XPath expressions compiled by the script, e.g. with the XML namespaces of its sources.
+            xpaths = [key for key in compiled_xpaths() if key not in compiled]
+            try:
+                request.sendall(STATUS.pack(status))
+                with os.fdopen(self.pipe_fds[1], "wb") as pipe:
+                    pipe.write(
+                        json.dumps(
+                            {"request": received[0], "seconds": seconds, "xpaths": xpaths}
+                        ).encode()
+                    )
+            except OSError:
+                pass
+
+        def service_actions(self):
+            """Warm up the server with the requests of the finished child processes."""
+            super().service_actions()
+            ready, _, _ = select.select(self.warm_up_fds, [], [], 0)
+            for fd in ready:
+                self.warm_up_fds.remove(fd)
+                with os.fdopen(fd, "rb") as pipe:
+                    data = pipe.read()
+                try:
+                    handled = json.loads(data)
+                except ValueError:
+                    # No request: the child process failed.
+                    continue
+                # Compiling blocks the server: only XSDs and XSLTs that compile quickly.
+                if handled["seconds"] is not None and handled["seconds"] <= WARM_UP_SECONDS:
+                    warm_up(handled["request"])
+                for xpath_exp, ns_items in handled["xpaths"]:
+                    build_xpath(xpath_exp, dict(ns_items))
+
+    if os.path.exists(socket_name):
+        os.unlink(socket_name)
+    # Only the user of the server can connect.
+    old_umask = os.umask(0o177)
+    try:
+        server = XulServer(socket_name, socketserver.BaseRequestHandler)
+    finally:
+        os.umask(old_umask)
+    sys.stderr.write(f"Xul server {__version__} listening on {socket_name}\n")
+    # Stop the server (and remove the socket) on SIGTERM.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_name)
+
+
+def main() -> None:
+    """Entry point for command line script xul."""
+    args = parse_cl()
+    if args.serve:
+        serve(args.serve)
+        return
+    if not args.socket:
+        sys.stderr.write(f"Error: no server socket specified (--socket or ${SOCKET_ENV})\n")
+        sys.exit(70)
+    sys.exit(run_client(args.socket, args.command, args.args))
@@ -1,15 +1,22 @@
 """Transform an XML source with XSLT."""
 
 import argparse
+import os
 import sys
-from typing import TextIO, Union
+from collections.abc import Iterable, Iterator
+from typing import Any, Callable, Optional, TextIO, Union
 
 from lxml import etree
 
 from .. import __version__
+from ..archive import ArchiveMember, member_path
+from ..catalog import add_catalog_resolver, set_catalog_files
 from ..ppxml import prettyprint
-from ..utils import config_logger
-from ..xsl import build_xsl_transform, xml_transformer
+from ..sources import command_line_sources, has_multiple_sources, has_sources
+from ..stats import enable_stats, phase, report_stats, source_stats, timed
+from ..utils import config_logger, get_source_name
+from ..xsl import get_xsl_transform, xml_transformer
+from .jobs import run_jobs, write_output
 
 
 def parse_cl() -> argparse.Namespace:
@@ -19,9 +26,89 @@ def parse_cl() -> argparse.Namespace:
     parser.add_argument("-V", "--version", action="version", version="%(prog)s " + __version__)
     parser.add_argument("xslt_source", help="XSLT source (file, http://...)")
     parser.add_argument(
-        "xml_source", nargs="?", default=sys.stdin, help="XML source (file, <stdin>, http://...)"
+        "xml_sources",
+        nargs="*",
+        metavar="xml_source",
+        help="XML source (file, <stdin>, http://...)",
+    )
+    parser.add_argument(
+        "-R",
+        "--recursive",
+        action="append",
+        default=None,
+        dest="directories",
+        metavar="DIR",
+        help="XML files (--include) in directory DIR and its subdirectories",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=None,
+        dest="include",
+        metavar="GLOB",
+        help="file name pattern of the XML files in directories (-R) [default: *.xml]",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=None,
+        dest="exclude",
+        metavar="GLOB",
+        help="skip files and directories with a matching name in directories (-R)",
+    )
+    parser.add_argument(
+        "--files-from",
+        action="store",
+        dest="files_from",
+        metavar="FILE",
+        help="XML sources listed in FILE (- is standard input): one per line or NUL-separated",
+    )
+    save_group = parser.add_mutually_exclusive_group(required=False)
+    save_group.add_argument("-f", "--file", dest="file", help="save result to file")
+    save_group.add_argument(
+        "-O",
+        "--output-dir",
+        dest="output_dir",
+        help="save the results of the XML sources to files in directory",
+    )
+    parser.add_argument(
+        "--huge-tree",
+        action="store_true",
+        default=False,
+        dest="huge_tree",
+        help="disable the libxml2 security limits: very deep trees and huge text nodes",
+    )
+    parser.add_argument(
+        "--catalog",
+        action="append",
+        default=None,
+        dest="catalog_files",
+        metavar="CATALOG",
+        help="XML catalog file: resolve public identifiers and URLs to local files",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        default=1,
+        type=int,
+        dest="jobs",
+        help="number of worker processes for XML sources; 0 is one per CPU [default: %(default)s]",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_const",
+        const="text",
+        dest="stats",
+        help="report time per phase, MB/s, elements and peak memory on standard error",
+    )
+    parser.add_argument(
+        "--stats-json",
+        action="store_const",
+        const="json",
+        dest="stats",
+        help="report the statistics (--stats) as JSON on standard error",
     )
-    parser.add_argument("-f", "--file", dest="file", help="save result to file")
 
     output_group = parser.add_argument_group("terminal output options")
     output_group.add_argument(
@@ -41,9 +128,14 @@ def parse_cl() -> argparse.Namespace:
         help="omit the XML declaration",
     )
 
-    return parser.parse_args()
+    # XML sources may follow the options (transform style.xsl -O dir/ *.xml).
+    args = parser.parse_intermixed_args()
+    if args.file and has_multiple_sources(args):
+        parser.error("argument -f/--file: not allowed with multiple XML sources")
+    return args
 
 
+@timed("output")
 def print_result(result) -> None:
     """Print transformation result (catch broken pipe and lookup errors)."""
     try:
@@ -55,6 +147,115 @@ def print_result(result) -> None:
         sys.stderr.write(f"Cannot print XSLT result (LookupError): {e}\n")
 
 
+def save_result(result: etree._XSLTResultTree, file_name: str) -> None:
+    """Save the result of an XSL Transformation to a file (catch lookup errors).
+
+    :param result: XSL Transformation result
+    :param file_name: output file
+
+    The result is encoded with the encoding of the xsl:output element.
+    lxml cannot write the result of a style sheet without an xsl:output
+    encoding (LookupError: unknown encoding: ''); it is saved as the
+    serialised result (UTF-8) instead.
+    """
+    try:
+        result.write_output(file_name)  # type: ignore[attr-defined]
+        return
+    except LookupError:
+        pass
+    try:
+        data = bytes(result)
+    except LookupError as e:
+        # LookupError: unknown encoding: UCS-4.
+        sys.stderr.write(f"Cannot save XSLT result to '{file_name}' (LookupError): {e}\n")
+        return
+    with open(file_name, "wb") as f:
+        f.write(data)
+
+
+def _relative_path(path: str, directories: Optional[list[str]]) -> str:
+    """Return the path of a file relative to its directory (-R) or to the working directory.
+
+    Return the file name of a file outside these directories.
+    """
+    for directory in [*(directories or []), os.curdir]:
+        relative_path = os.path.relpath(path, directory)
+        if relative_path.split(os.sep, 1)[0] != os.pardir:
+            return relative_path
+    return os.path.basename(path)
+
+
+def output_file(xml_source: Union[TextIO, str, Any], args: argparse.Namespace) -> Optional[str]:
+    """Return the output file name for an XML source in the output directory (-O).
+
+    :param xml_source: XML file, file-like object, URL or archive member
+    :param args: command-line arguments: output_dir and directories (-R)
+
+    The output file keeps the path of the XML source relative to its directory
+    (-R) or to the working directory; see _relative_path(). An archive member
+    is saved in a directory named after the archive, with its member path.
+    URLs and standard input: the last part of the name.
+
+    Return None when the output file would be outside the output directory.
+    """
+    if isinstance(xml_source, ArchiveMember):
+        member = member_path(xml_source.member).replace("/", os.sep)
+        name = os.path.join(_relative_path(xml_source.archive, args.directories), member)
+    elif isinstance(xml_source, str) and os.path.isfile(xml_source):
+        name = _relative_path(xml_source, args.directories)
+    else:
+        name = os.path.basename(get_source_name(xml_source))
+    name = os.path.normpath(name.lstrip(os.sep))
+    if not name or name == os.curdir or name.split(os.sep, 1)[0] == os.pardir:
+        return None
+    return os.path.join(args.output_dir, name)
+
+
+def output_sources(xml_sources: Iterable[Any], args: argparse.Namespace) -> Iterator[Any]:
+    """Yield the XML sources that have an output file of their own (-O).
+
+    :param xml_sources: XML sources
+    :param args: command-line arguments
+
+    XML sources are skipped (error) when their output file is outside the
+    output directory, is the output file of a previous XML source, or is
+    the XML source itself.
+    """
+    if not args.output_dir:
+        yield from xml_sources
+        return
+    # Output file (resolved): name of its XML source.
+    outputs: dict[str, str] = {}
+    for xml_source in xml_sources:
+        source_name = get_source_name(xml_source)
+        if (file_name := output_file(xml_source, args)) is None:
+            sys.stderr.write(f"Error: no output file for '{source_name}' in {args.output_dir}\n")
+            continue
+        resolved = os.path.normcase(os.path.realpath(file_name))
+        if resolved in outputs:
+            sys.stderr.write(
+                f"Error: '{source_name}' and '{outputs[resolved]}' "
+                f"have the same output file '{file_name}'; skipped\n"
+            )
+            continue
+        if isinstance(xml_source, str) and resolved == os.path.normcase(
+            os.path.realpath(xml_source)
+        ):
+            sys.stderr.write(f"Error: the output file of '{source_name}' is the XML source\n")
+            continue
+        outputs[resolved] = source_name
+        yield xml_source
+
+
+def output_dirs(args: argparse.Namespace) -> list[str]:
+    """Return the output directory (-O) in a list: not walked for XML sources (-R).
+
+    The XML sources are walked while the results are saved: the results would
+    be transformed too when the output directory is in a directory (-R).
+    """
+    return [args.output_dir] if args.output_dir else []
+
+
 def output_xslt(
     xml_source: Union[TextIO, str],
     transformer: etree.XSLT,
@@ -76,7 +277,15 @@ def output_xslt(
     # https://lxml.de/apidoc/lxml.etree.html#lxml.etree._XSLTResultTree
 
     if args.file:
-        return result.write_output(args.file)  # type: ignore[attr-defined]
+        with phase("output"):
+            return save_result(result, args.file)
+    if args.output_dir:
+        # Checked by output_sources().
+        file_name = output_file(xml_source, args)
+        assert file_name is not None
+        with phase("output"):
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            return save_result(result, file_name)
 
     # https://lxml.de/xpathxslt.html#xslt-result-objects
     if result.getroot() is None:
@@ -86,6 +295,20 @@ def output_xslt(
     prettyprint(result, syntax=args.syntax, xml_declaration=args.declaration)
 
 
+def transform_worker(args: argparse.Namespace) -> Callable[[str], None]:
+    """Return the XSL Transformation job of a worker process (--jobs).
+
+    :param args: command-line arguments
+
+    Each worker process builds (compiles) its own XSL Transformer.
+    """
+    transformer = get_xsl_transform(args.xslt_source)
+    if not transformer:
+        raise RuntimeError("Unable to build the XSL Transformer in worker process")
+    parser = add_catalog_resolver(etree.XMLParser(huge_tree=args.huge_tree))
+    return lambda xml_source: output_xslt(xml_source, transformer, parser, args)
+
+
 def main():
     """Entry point for command line script transform."""
     # Logging to the console.
@@ -93,11 +316,17 @@ def main():
 
     # Command line.
     args = parse_cl()
+    # XML catalog files (also for worker processes).
+    set_catalog_files(args.catalog_files)
+    # Run statistics (--stats, --stats-json).
+    if args.stats:
+        enable_stats("transform", json_output=args.stats == "json")
 
     # Check XSLT source.
     if args:
         # Build an XSL Transformer from an XSLT source.
-        transformer = build_xsl_transform(args.xslt_source)
+        with phase("compile"):
+            transformer = get_xsl_transform(args.xslt_source)
         if not transformer:
             sys.stderr.write("Invalid XSLT source specified\n")
             sys.exit(60)
@@ -105,5 +334,40 @@ def main():
         sys.stderr.write("No XSLT source specified\n")
         sys.exit(50)
 
-    # Transform XML source with XSL Transformer.
-    output_xslt(args.xml_source, transformer, etree.XMLParser(), args)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    # Transform XML sources with XSL Transformer.
+    if args.jobs != 1 and has_multiple_sources(args):
+        # Worker processes; output in XML source order.
+        xml_sources = output_sources(
+            command_line_sources(args, read=True, skip_dirs=output_dirs(args)), args
+        )
+        for _, stdout, stderr in run_jobs(transform_worker, (args,), xml_sources, args.jobs):
+            try:
+                write_output(stdout, stderr)
+            except BrokenPipeError:
+                sys.stderr.close()
+                break
+    else:
+        parser = add_catalog_resolver(etree.XMLParser(huge_tree=args.huge_tree))
+        xml_sources = command_line_sources(args, skip_dirs=output_dirs(args))
+        for xml_s in output_sources(xml_sources, args):
+            with source_stats(xml_s):
+                output_xslt(xml_s, transformer, parser, args)
+
+    if not has_sources(args):
+        # Read from a pipe when no XML source is specified.
+        if not sys.stdin.isatty():
+            with source_stats(sys.stdin):
+                output_xslt(
+                    sys.stdin,
+                    transformer,
+                    add_catalog_resolver(etree.XMLParser(huge_tree=args.huge_tree)),
+                    args,
+                )
+        else:
+            sys.stderr.write("Error: no XML source specified\n")
+            sys.exit(70)
+
+    report_stats()
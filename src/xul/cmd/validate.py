@@ -2,13 +2,36 @@
 
 import argparse
 import sys
-from typing import TextIO, Union
+from typing import Callable, Optional, TextIO, Union
 
 from lxml import etree
 
 from .. import __version__
+from ..catalog import set_catalog_files
+from ..results import (
+    DEFAULT_CACHE_SIZE,
+    MAX_MESSAGES,
+    cached_result,
+    capture_messages,
+    close_result_cache,
+    context_digest,
+    enable_result_cache,
+    log_messages,
+    store_result,
+)
+from ..schemas import get_xml_schema, schema_documents
+from ..sources import command_line_sources, has_multiple_sources, has_sources
+from ..stats import enable_stats, report_stats, source_stats, timed
 from ..utils import config_logger, get_source_name
-from ..validate import build_dtd, build_relaxng, build_xml_schema, validate_xml
+from ..validate import (
+    build_dtd,
+    build_relaxng,
+    dtd_documents,
+    relaxng_documents,
+    validate_records,
+    validate_xml,
+)
+from .jobs import run_jobs, write_output
 
 
 def parse_cl() -> argparse.Namespace:
@@ -60,6 +83,107 @@ def parse_cl() -> argparse.Namespace:
         metavar="xml_source",
         help="XML source (file, <stdin>, http://...)",
     )
+    parser.add_argument(
+        "-R",
+        "--recursive",
+        action="append",
+        default=None,
+        dest="directories",
+        metavar="DIR",
+        help="XML files (--include) in directory DIR and its subdirectories",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=None,
+        dest="include",
+        metavar="GLOB",
+        help="file name pattern of the XML files in directories (-R) [default: *.xml]",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=None,
+        dest="exclude",
+        metavar="GLOB",
+        help="skip files and directories with a matching name in directories (-R)",
+    )
+    parser.add_argument(
+        "--files-from",
+        action="store",
+        dest="files_from",
+        metavar="FILE",
+        help="XML sources listed in FILE (- is standard input): one per line or NUL-separated",
+    )
+    parser.add_argument(
+        "--record",
+        action="store",
+        default=None,
+        dest="record",
+        metavar="TAG",
+        help="validate each record element (streaming); TAG is a local name or {URI}name",
+    )
+    parser.add_argument(
+        "--first-error",
+        action="store_true",
+        default=False,
+        dest="first_error",
+        help="stop at the first validation error of an XML source (XSD: while parsing)",
+    )
+    parser.add_argument(
+        "--huge-tree",
+        action="store_true",
+        default=False,
+        dest="huge_tree",
+        help="disable the libxml2 security limits: very deep trees and huge text nodes",
+    )
+    parser.add_argument(
+        "--catalog",
+        action="append",
+        default=None,
+        dest="catalog_files",
+        metavar="CATALOG",
+        help="XML catalog file: resolve public identifiers and URLs to local files",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=False,
+        dest="cache",
+        help="cache the results of XML files: unchanged XML files are not validated again",
+    )
+    parser.add_argument(
+        "--cache-size",
+        action="store",
+        default=DEFAULT_CACHE_SIZE,
+        type=int,
+        dest="cache_size",
+        metavar="ENTRIES",
+        help="maximum number of cached results (--cache) [default: %(default)s]",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        default=1,
+        type=int,
+        dest="jobs",
+        help="number of worker processes for XML sources; 0 is one per CPU [default: %(default)s]",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_const",
+        const="text",
+        dest="stats",
+        help="report time per phase, MB/s, elements and peak memory on standard error",
+    )
+    parser.add_argument(
+        "--stats-json",
+        action="store_const",
+        const="json",
+        dest="stats",
+        help="report the statistics (--stats) as JSON on standard error",
+    )
     return parser.parse_args()
 
 
@@ -67,19 +191,115 @@ def apply_validator(
     xml_source: Union[TextIO, str],
     validator: Union[etree.XMLSchema, etree.DTD, etree.RelaxNG],
     args: argparse.Namespace,
-) -> None:
+) -> bool:
     """Apply XML validator on an XML source.
 
     :param xml_source: XML file, file-like object or URL
     :param validator: XMLSchema, DTD or RELAX NG validator
     :param args: command-line arguments
+
+    Return True when `xml_source' validates.
     """
-    if args.validated_files or args.invalidated_files:
-        valid = validate_xml(xml_source, validator, silent=True)
-        if (valid and args.validated_files) or (not valid and args.invalidated_files):
-            print(get_source_name(xml_source))
+    # Cached verdict and log messages (--cache); the messages have the source name.
+    key, result = cached_result(xml_source, by_name=True)
+    if result is not None:
+        valid = result["valid"]
+        log_messages(result["messages"])
     else:
-        validate_xml(xml_source, validator)
+        silent = args.validated_files or args.invalidated_files
+        with capture_messages(key is not None) as messages:
+            if args.record:
+                valid = validate_records(
+                    xml_source,
+                    validator,
+                    args.record,
+                    silent=silent,
+                    huge_tree=args.huge_tree,
+                    first_error=args.first_error,
+                )
+            else:
+                valid = validate_xml(
+                    xml_source,
+                    validator,
+                    silent=silent,
+                    huge_tree=args.huge_tree,
+                    first_error=args.first_error,
+                )
+        if len(messages) <= MAX_MESSAGES:
+            store_result(key, {"valid": valid, "messages": messages})
+    if (valid and args.validated_files) or (not valid and args.invalidated_files):
+        print(get_source_name(xml_source))
+    return valid
+
+
+@timed("compile")
+def build_validator(
+    args: argparse.Namespace,
+) -> Optional[Union[etree.XMLSchema, etree.DTD, etree.RelaxNG]]:
+    """Build the XSD, DTD or RelaxNG validator.
+
+    :param args: command-line arguments
+
+    Return None on error.
+    """
+    if args.xsd_source:
+        return get_xml_schema(args.xsd_source)
+    if args.dtd_source:
+        return build_dtd(args.dtd_source)
+    if args.relaxng_source:
+        return build_relaxng(args.relaxng_source, record=args.record)
+    return None
+
+
+def cache_context(args: argparse.Namespace) -> Optional[str]:
+    """Return the context of the cached validation results (--cache) or None.
+
+    :param args: command-line arguments
+
+    The context has the content of the schema documents: the XSD (compiled
+    first, see build_validator) and its xs:include, xs:import and xs:redefine
+    documents, the DTD and its external parameter entities, or the RELAX NG
+    file and its included documents.
+    """
+    if args.xsd_source:
+        validator = "xsd"
+        documents = schema_documents(args.xsd_source)
+    elif args.dtd_source:
+        validator = "dtd"
+        documents = dtd_documents(args.dtd_source)
+    else:
+        validator = "relaxng"
+        documents = relaxng_documents(args.relaxng_source)
+    if documents is None:
+        sys.stderr.write("Warning: no result cache (--cache): unknown schema documents\n")
+        return None
+    return context_digest(
+        {
+            "command": "validate",
+            "validator": validator,
+            "documents": documents,
+            "record": args.record,
+            "first_error": args.first_error,
+            "huge_tree": args.huge_tree,
+            # Log messages are not cached with -l/-L.
+            "file_hits": args.validated_files or args.invalidated_files,
+        }
+    )
+
+
+def validate_worker(args: argparse.Namespace) -> Callable[[str], bool]:
+    """Return the validation job of a worker process (--jobs).
+
+    :param args: command-line arguments
+
+    Each worker process builds (compiles) its own validator.
+    """
+    validator = build_validator(args)
+    if not validator:
+        raise RuntimeError("Unable to build the XML validator in worker process")
+    if args.cache_context:
+        enable_result_cache(args.cache_context, args.cache_size)
+    return lambda xml_source: apply_validator(xml_source, validator, args)
 
 
 def main() -> None:
@@ -89,29 +309,45 @@ def main() -> None:
 
     # Command line.
     args = parse_cl()
+    # XML catalog files (also for worker processes).
+    set_catalog_files(args.catalog_files)
+    # Run statistics (--stats, --stats-json).
+    if args.stats:
+        enable_stats("validate", json_output=args.stats == "json")
 
     # XSD, DTD or RelaxNG Validator?
-    validator: Union[etree.XMLSchema, etree.DTD, etree.RelaxNG]
-    if args.xsd_source:
-        validator = build_xml_schema(args.xsd_source)
-    elif args.dtd_source:
-        validator = build_dtd(args.dtd_source)
-    elif args.relaxng_source:
-        validator = build_relaxng(args.relaxng_source)
-    else:
-        validator = None
+    validator = build_validator(args)
     # Check validator.
     if not validator:
         sys.exit(60)
+    # Result cache (--cache).
+    args.cache_context = cache_context(args) if args.cache else None
+    if args.cache_context:
+        enable_result_cache(args.cache_context, args.cache_size)
 
     # Validate XML sources.
-    for xml_s in args.xml_sources:
-        apply_validator(xml_s, validator, args)
+    if args.jobs != 1 and has_multiple_sources(args):
+        # Worker processes; output in XML source order.
+        xml_sources = command_line_sources(args, read=True)
+        for _, stdout, stderr in run_jobs(validate_worker, (args,), xml_sources, args.jobs):
+            try:
+                write_output(stdout, stderr)
+            except BrokenPipeError:
+                sys.stderr.close()
+                break
+    else:
+        for xml_s in command_line_sources(args):
+            with source_stats(xml_s):
+                apply_validator(xml_s, validator, args)
 
-    if not args.xml_sources:
+    if not has_sources(args):
         if not sys.stdin.isatty():
             # Read from a pipe when no XML source is specified.
-            apply_validator(sys.stdin, validator, args)
+            with source_stats(sys.stdin):
+                apply_validator(sys.stdin, validator, args)
         else:
             sys.stderr.write("Error: no XML source specified\n")
             sys.exit(70)
+
+    close_result_cache()
+    report_stats()
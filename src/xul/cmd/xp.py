@@ -1,29 +1,87 @@
 """Select nodes in an XML source with an XPath expression."""
 
 import argparse
+import io
+import math
 import sys
+from contextlib import redirect_stdout
+from functools import cache
 from typing import Any, Callable, Optional, TextIO, Union
 
 from lxml import etree
 
 from .. import __version__
+from ..catalog import add_catalog_resolver, set_catalog_files
 from ..etree import build_etree
 from ..ppxml import prettyprint
-from ..utils import config_logger, get_source_name
-from ..xpath import build_xpath, etree_xpath, namespaces
+from ..results import (
+    DEFAULT_CACHE_SIZE,
+    cached_result,
+    close_result_cache,
+    context_digest,
+    enable_result_cache,
+    store_result,
+)
+from ..sources import command_line_sources, has_multiple_sources, has_sources
+from ..stats import enable_stats, phase, report_stats, source_stats, timed
+from ..stream import StreamPath, build_stream_path, stream_records, stream_xpath
+from ..utils import OutputBuffer, config_logger, get_source_name
+from ..xpath import ElementPaths, build_xpath, etree_xpath, exslt_ns_map, namespaces, xpath_prefixes
+from .jobs import run_jobs, write_output
+
+# Printed results of records (--record) in memory up to this size (bytes).
+RECORD_SPOOL_SIZE = 16 * 1024 * 1024
+# XPath string-value of a node (--col).
+_STRING_VALUE = etree.XPath("string()")
+# Escaped characters of TSV cells (--format tsv).
+_TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
 
 
 def parse_cl() -> argparse.Namespace:
     """Parse the command line for options, XPath expression and XML sources."""
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("-V", "--version", action="version", version="%(prog)s " + __version__)
-    parser.add_argument("xpath_expr", help="XPath expression")
+    parser.add_argument(
+        "xpath_expr", nargs="?", help="XPath expression (without -x/--xpath and --expr-file)"
+    )
     parser.add_argument(
         "xml_sources",
         nargs="*",
         metavar="xml_source",
         help="XML source (file, <stdin>, http://...)",
     )
+    parser.add_argument(
+        "-R",
+        "--recursive",
+        action="append",
+        default=None,
+        dest="directories",
+        metavar="DIR",
+        help="XML files (--include) in directory DIR and its subdirectories",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=None,
+        dest="include",
+        metavar="GLOB",
+        help="file name pattern of the XML files in directories (-R) [default: *.xml]",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=None,
+        dest="exclude",
+        metavar="GLOB",
+        help="skip files and directories with a matching name in directories (-R)",
+    )
+    parser.add_argument(
+        "--files-from",
+        action="store",
+        dest="files_from",
+        metavar="FILE",
+        help="XML sources listed in FILE (- is standard input): one per line or NUL-separated",
+    )
     file_group = parser.add_argument_group(
         title="file hit options", description="output filenames to standard output"
     )
@@ -102,6 +160,51 @@ def parse_cl() -> argparse.Namespace:
         dest="result_xpath",
         help="also print the XPath expression of the result element (or its parent)",
     )
+    output_group.add_argument(
+        "--format",
+        action="store",
+        choices=("text", "jsonl", "tsv", "csv"),
+        default=None,
+        dest="format",
+        help=(
+            "output format: text, jsonl (a JSON object per result or row), tsv or csv (--rows)"
+            " [default: text; tsv with --rows]"
+        ),
+    )
+    rows_group = parser.add_argument_group(
+        title="row options", description="a row of column values per row element"
+    )
+    rows_group.add_argument(
+        "--rows",
+        action="store",
+        dest="rows",
+        metavar="XPATH",
+        help="XPath expression of the row elements (instead of xpath_expr)",
+    )
+    rows_group.add_argument(
+        "--col",
+        action="append",
+        default=None,
+        dest="columns",
+        metavar="NAME=XPATH",
+        help="column: XPath expression relative to the row element; repeat for every column",
+    )
+    parser.add_argument(
+        "-x",
+        "--xpath",
+        action="append",
+        default=None,
+        dest="xpath_list",
+        metavar="XPATH",
+        help="XPath expression; repeat for multiple expressions on one parse of each XML source",
+    )
+    parser.add_argument(
+        "--expr-file",
+        action="store",
+        dest="expr_file",
+        metavar="FILE",
+        help="file with XPath expressions, one per line (blank lines and # comments are skipped)",
+    )
     parser.add_argument(
         "-m",
         "--method",
@@ -110,8 +213,167 @@ def parse_cl() -> argparse.Namespace:
         dest="lxml_method",
         help="use ElementTree.xpath method instead of XPath class",
     )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        default=False,
+        dest="stream",
+        help="use the streaming XPath engine (constant memory) for a streamable XPath expression",
+    )
+    parser.add_argument(
+        "--record",
+        action="store",
+        dest="record",
+        metavar="TAG",
+        help=(
+            "apply the XPath expression to each (parsed) record element; TAG is a local name"
+            " or {URI}name"
+        ),
+    )
+    parser.add_argument(
+        "--huge-tree",
+        action="store_true",
+        default=False,
+        dest="huge_tree",
+        help="disable the libxml2 security limits: very deep trees and huge text nodes",
+    )
+    parser.add_argument(
+        "--catalog",
+        action="append",
+        default=None,
+        dest="catalog_files",
+        metavar="CATALOG",
+        help="XML catalog file: resolve public identifiers and URLs to local files",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=False,
+        dest="cache",
+        help="cache the file hits (-l, -L) or counts (-c): unchanged XML files are skipped",
+    )
+    parser.add_argument(
+        "--cache-size",
+        action="store",
+        default=DEFAULT_CACHE_SIZE,
+        type=int,
+        dest="cache_size",
+        metavar="ENTRIES",
+        help="maximum number of cached results (--cache) [default: %(default)s]",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        default=1,
+        type=int,
+        dest="jobs",
+        help="number of worker processes for XML sources; 0 is one per CPU [default: %(default)s]",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_const",
+        const="text",
+        dest="stats",
+        help="report time per phase, MB/s, elements and peak memory on standard error",
+    )
+    parser.add_argument(
+        "--stats-json",
+        action="store_const",
+        const="json",
+        dest="stats",
+        help="report the statistics (--stats) as JSON on standard error",
+    )
+
+    args = parser.parse_intermixed_args()
+    # XPath expressions (-x/--xpath, --expr-file) or the xpath_expr argument.
+    xpath_exprs = list(args.xpath_list or [])
+    if args.expr_file:
+        try:
+            xpath_exprs.extend(read_expr_file(args.expr_file))
+        except (OSError, UnicodeDecodeError) as e:
+            parser.error(f"argument --expr-file: {e}")
+    if args.rows:
+        if xpath_exprs:
+            parser.error("argument --rows: not allowed with -x/--xpath or --expr-file")
+        xpath_exprs = [args.rows]
+    if xpath_exprs:
+        # The first positional argument is an XML source.
+        if args.xpath_expr is not None:
+            args.xml_sources.insert(0, args.xpath_expr)
+    elif args.expr_file:
+        parser.error(f"argument --expr-file: no XPath expressions in {args.expr_file}")
+    elif args.xpath_expr is None:
+        parser.error("the following arguments are required: xpath_expr")
+    else:
+        xpath_exprs = [args.xpath_expr]
+    args.xpath_exprs = xpath_exprs
+    args.xpath_expr = xpath_exprs[0]
+    if args.record and (args.stream or args.result_xpath):
+        parser.error("argument --record: not allowed with --stream or --result-xpath")
+    if args.record and len(xpath_exprs) > 1:
+        parser.error("argument --record: not allowed with multiple XPath expressions")
+    check_rows(parser, args)
+    if args.cache and not (args.files_with_hits or args.files_without_hits or args.count):
+        parser.error("argument --cache: requires -l, -L or -c")
+    # More than one XML source (or an archive source): labelled results.
+    args.multiple_sources = has_multiple_sources(args)
+    return args
+
+
+def check_rows(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Check the row options (--rows, --col) and the output format; parse the columns.
+
+    :param parser: command-line parser
+    :param args: command-line arguments
 
-    return parser.parse_args()
+    args.columns: list of (name, XPath expression) tuples.
+    """
+    if not args.rows:
+        if args.columns:
+            parser.error("argument --col: requires --rows")
+        if args.format in ("tsv", "csv"):
+            parser.error(f"argument --format: {args.format} requires --rows")
+        args.format = args.format or "text"
+        args.columns = []
+        return
+    if not args.columns:
+        parser.error("argument --rows: requires --col")
+    if (
+        args.files_with_hits
+        or args.files_without_hits
+        or args.count
+        or args.pretty_element
+        or args.result_xpath
+        or args.lxml_method
+        or args.stream
+        or args.record
+    ):
+        parser.error("argument --rows: not allowed with -l, -L, -c, -p, -r, -m, -s or --record")
+    if args.format == "text":
+        parser.error("argument --format: text not allowed with --rows")
+    args.format = args.format or "tsv"
+    columns = []
+    for column in args.columns:
+        name, sep, xpath_exp = column.partition("=")
+        if not (name.strip() and sep and xpath_exp.strip()):
+            parser.error(f"argument --col: NAME=XPATH expected: {column}")
+        columns.append((name.strip(), xpath_exp.strip()))
+    if len({name for name, _ in columns}) < len(columns):
+        parser.error("argument --col: column names must be unique")
+    args.columns = columns
+
+
+def read_expr_file(expr_file: str) -> list[str]:
+    """Return the XPath expressions of a file (--expr-file).
+
+    :param expr_file: file with an XPath expression per line
+
+    Blank lines and lines starting with # are skipped.
+    """
+    with open(expr_file, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
 
 
 def xpath_class(el_tree: etree._ElementTree, xpath_exp: str, ns_map: dict[str, str]):
@@ -127,6 +389,7 @@ def xpath_class(el_tree: etree._ElementTree, xpath_exp: str, ns_map: dict[str, s
     return None
 
 
+@timed("xpath")
 def eltree_xpath(el_tree: etree._ElementTree, xpath_exp: str, ns_map: dict[str, str]):
     """XPath with lxml.etree.ElementTree.xpath method (--method).
 
@@ -162,13 +425,103 @@ def xp_prepare(
     # Initialise XML parser.
     if args.pretty_element:
         # Pretty print preparation (removes white space text nodes!).
-        xml_parser = etree.XMLParser(remove_blank_text=True)
+        xml_parser = etree.XMLParser(remove_blank_text=True, huge_tree=args.huge_tree)
     else:
-        xml_parser = etree.XMLParser()
+        xml_parser = etree.XMLParser(huge_tree=args.huge_tree)
+    # XML catalog (--catalog).
+    add_catalog_resolver(xml_parser)
 
     return xpath_fn, xml_parser
 
 
+def needed_prefixes(args: argparse.Namespace) -> Optional[set[str]]:
+    """Return the namespace prefixes of the XPath expressions that the XML sources must define.
+
+    :param args: command-line arguments
+
+    Return None when all XML namespaces of the XML sources are needed: they
+    are printed (verbose). The xml and EXSLT prefixes are always defined.
+    """
+    if (
+        args.verbose
+        and args.format == "text"
+        and not (args.count or args.files_with_hits or args.files_without_hits)
+    ):
+        return None
+    defined = {"xml"}
+    if args.exslt:
+        defined.update(exslt_ns_map())
+    xpath_exprs = [*args.xpath_exprs, *(xpath_exp for _, xpath_exp in args.columns)]
+    return set().union(*(xpath_prefixes(xpath_exp) - defined for xpath_exp in xpath_exprs))
+
+
+def need_namespaces(args: argparse.Namespace) -> bool:
+    """Return True when the XML namespaces of the XML sources are needed.
+
+    :param args: command-line arguments
+
+    The XML namespaces are printed (verbose) or resolve the namespace prefixes
+    of the XPath expression; see needed_prefixes().
+    """
+    prefixes = needed_prefixes(args)
+    return prefixes is None or bool(prefixes)
+
+
+@timed("xpath")
+def xpath_hit(
+    xpath_fn: Callable[[Any, str, dict[str, str]], Any],
+    el_tree: Union[etree._ElementTree, etree._Element],
+    xpath_exp: str,
+    ns_map: dict[str, str],
+) -> Any:
+    """Return the file hit (-l, -L) of an XPath expression: the boolean() of the XPath result.
+
+    :param xpath_fn: ElementTree.xpath method or XPath class; reports the errors
+    :param el_tree: lxml ElementTree or element (record)
+    :param xpath_exp: XPath expression
+    :param ns_map: XML namespace (prefix: URI) dictionary
+
+    The boolean() of the XPath result is a hit (see is_hit()) and libxml2
+    returns it without the result nodes: no result list is built. On error,
+    xpath_fn evaluates xpath_exp, so the error is reported for xpath_exp.
+    Return None on error.
+    """
+    if xpath_obj := build_xpath(f"boolean({xpath_exp})", ns_map):
+        try:
+            return xpath_obj(el_tree)
+        except (etree.XPathEvalError, TypeError):
+            pass
+    return xpath_fn(el_tree, xpath_exp, ns_map)
+
+
+def xp_stream_path(args: argparse.Namespace) -> Optional[StreamPath]:
+    """Return the streamable XPath expression (--stream) or None for the tree engine.
+
+    :param args: command-line arguments
+    """
+    if not args.stream or args.lxml_method or args.result_xpath or len(args.xpath_exprs) > 1:
+        return None
+    return build_stream_path(args.xpath_expr)
+
+
+def report_engine(args: argparse.Namespace, stream_path: Optional[StreamPath]) -> None:
+    """Report the XPath engine (--stream) on standard error.
+
+    :param args: command-line arguments
+    :param stream_path: streamable XPath expression; see xp_stream_path()
+    """
+    if stream_path:
+        if args.verbose:
+            sys.stderr.write("XPath engine: streaming\n")
+    elif args.lxml_method or args.result_xpath:
+        sys.stderr.write("XPath engine: tree (--method and --result-xpath are not streamable)\n")
+    elif len(args.xpath_exprs) > 1:
+        sys.stderr.write("XPath engine: tree (multiple XPath expressions are not streamable)\n")
+    else:
+        sys.stderr.write("XPath engine: tree (the XPath expression is not streamable)\n")
+
+
+@timed("output")
 def print_xmlns(ns_map: dict[str, str], root: etree._Element) -> None:
     """Print XML source namespaces (prefix: namespace URI).
 
@@ -229,24 +582,29 @@ def parent_repr(parent) -> str:
     return f"<{parent.tag}>"
 
 
-def print_elem(node, pretty: bool = False, xpath_exp: Optional[str] = None) -> None:
+def print_elem(
+    node, out: OutputBuffer, pretty: bool = False, xpath_exp: Optional[str] = None
+) -> None:
     """Print element (UTF-8 Unicode).
 
     :param node: element, comment or processing instruction node; see element_repr()
+    :param out: output buffer
     :param pretty: pretty print node
     :param xpath_exp: also print node XPath expression
     """
     if pretty:
         if xpath_exp:
-            print(f"XPath {xpath_exp} (line {node.sourceline}):")
+            out.line(f"XPath {xpath_exp} (line {node.sourceline}):")
         else:
-            print(f"line {node.sourceline}:")
+            out.line(f"line {node.sourceline}:")
+        # prettyprint() prints.
+        out.flush()
         prettyprint(node, xml_declaration=False)
     else:
         if xpath_exp:
-            print(f"XPath {xpath_exp} (line {node.sourceline}):\n   {element_repr(node)}")
+            out.line(f"XPath {xpath_exp} (line {node.sourceline}):\n   {element_repr(node)}")
         else:
-            print(f"line {node.sourceline:<4d}: {element_repr(node)}")
+            out.line(f"line {node.sourceline:<4d}: {element_repr(node)}")
 
 
 def smart_with_parent(smart_string: etree._ElementUnicodeResult) -> tuple[str, str]:
@@ -277,19 +635,23 @@ def smart_with_parent(smart_string: etree._ElementUnicodeResult) -> tuple[str, s
 
 
 def print_smart_string(
-    smart_string: etree._ElementUnicodeResult, el_tree: etree._ElementTree, args: argparse.Namespace
+    smart_string: etree._ElementUnicodeResult,
+    paths: ElementPaths,
+    args: argparse.Namespace,
+    out: OutputBuffer,
 ) -> None:
     """Print lxml 'smart' string with parent element tag.
 
     :param smart_string: XPath string result with parent element
-    :param el_tree: lxml ElementTree to retrieve XPath path expressions
+    :param paths: XPath path expressions of the ElementTree
     :param args: command-line arguments
+    :param out: output buffer
     """
     # Parent element.
     par_el = smart_string.getparent()
     # string() and concat() results do not have an origin.
     if par_el is None:
-        print(f"XPath string: '{smart_string}'")
+        out.line(f"XPath string: '{smart_string}'")
         return
     # Parent is an lxml.etree._Element instance.
     par_el_str = parent_repr(par_el)
@@ -299,15 +661,16 @@ def print_smart_string(
     if smart_repr:
         if args.result_xpath:
             # Print the absolute XPath expression of the parent element.
-            print(
-                f"line {par_el.sourceline}, parent XPath {el_tree.getpath(par_el)}\n"
+            out.line(
+                f"line {par_el.sourceline}, parent XPath {paths.getpath(par_el)}\n"
                 f"   {smart_repr} {parent_rel} {par_el_str}"
             )
         else:
-            print(f"line {par_el.sourceline:<4d}: {smart_repr} {parent_rel} {par_el_str}")
+            out.line(f"line {par_el.sourceline:<4d}: {smart_repr} {parent_rel} {par_el_str}")
     else:
+        out.flush()
         sys.stderr.write("Unable to print smart string\n")
-        print_elem(par_el, pretty=args.pretty_element)
+        print_elem(par_el, out, pretty=args.pretty_element)
 
 
 def print_result_list(result_list, el_tree: etree._ElementTree, args: argparse.Namespace) -> None:
@@ -316,27 +679,33 @@ def print_result_list(result_list, el_tree: etree._ElementTree, args: argparse.N
     :param result_list: XPath result list
     :param el_tree: lxml ElementTree to retrieve XPath path expressions
     :param args: command-line arguments
+
+    The result nodes are written in bulk; see OutputBuffer. The XPath path
+    expressions (--result-xpath) are computed once per parent; see ElementPaths.
     """
+    out = OutputBuffer()
+    paths = ElementPaths(el_tree)
     # All nodes -- //node()
     for node in result_list:
         if etree.iselement(node):
             if args.result_xpath:
-                print_elem(node, pretty=args.pretty_element, xpath_exp=el_tree.getpath(node))
+                print_elem(node, out, pretty=args.pretty_element, xpath_exp=paths.getpath(node))
             else:
-                print_elem(node, pretty=args.pretty_element)
+                print_elem(node, out, pretty=args.pretty_element)
 
         # Smart string -- .getparent() | attribute, entity, text (atomic value).
         elif hasattr(node, "getparent"):
-            print_smart_string(node, el_tree, args)
+            print_smart_string(node, paths, args, out)
 
         # Namespaces -- namespace::
         elif isinstance(node, tuple):
             prefix, uri = node
             # No line number.
             if prefix is None:
-                print(f"prefix: {args.default_ns_prefix:<8} URI: {uri}")
+                out.line(f"prefix: {args.default_ns_prefix:<8} URI: {uri}")
             else:
-                print(f"prefix: {prefix:<8} URI: {uri}")
+                out.line(f"prefix: {prefix:<8} URI: {uri}")
+    out.flush()
 
 
 def build_result_list(xp_result: Any) -> list[Any]:
@@ -351,6 +720,7 @@ def build_result_list(xp_result: Any) -> list[Any]:
     return [xp_result]
 
 
+@timed("output")
 def print_result_header(source_name: str, xp_result: Any) -> None:
     """Print header with XPath result summary.
 
@@ -360,22 +730,38 @@ def print_result_header(source_name: str, xp_result: Any) -> None:
     result_list = build_result_list(xp_result)
     xp_r_len = len(result_list)
 
-    # XPath result summary.
+    if xp_r_len == 1:
+        print_result_summary(source_name, xp_r_len, isinstance(xp_result, tuple))
+    else:
+        print_result_summary(
+            source_name, xp_r_len, bool(result_list) and isinstance(result_list[0], tuple)
+        )
+
+
+@timed("output")
+def print_result_summary(source_name: str, xp_r_len: int, ns_results: bool = False) -> None:
+    """Print XPath result summary.
+
+    :param source_name: name of the XML source
+    :param xp_r_len: number of XPath results
+    :param ns_results: XML namespace results
+    """
     print(f"{source_name}:", end=" ")
     if xp_r_len == 0:
         print("no results.")
     elif xp_r_len == 1:
-        if isinstance(xp_result, tuple):
+        if ns_results:
             print("1 XML namespace result.")
         else:
             print("1 result.")
     else:
-        if isinstance(result_list[0], tuple):
+        if ns_results:
             print(f"{xp_r_len} XML namespace results.")
         else:
             print(f"{xp_r_len} results.")
 
 
+@timed("output")
 def print_xp_result(xp_result: Any, el_tree: etree._ElementTree, args: argparse.Namespace) -> None:
     """Print XPath results.
 
@@ -392,7 +778,9 @@ def print_xp_result(xp_result: Any, el_tree: etree._ElementTree, args: argparse.
     """
     # STRING - string - smart string | Namespace URI.
     if isinstance(xp_result, etree._ElementUnicodeResult):
-        print_smart_string(xp_result, el_tree, args)
+        out = OutputBuffer()
+        print_smart_string(xp_result, ElementPaths(el_tree), args, out)
+        out.flush()
 
     # LIST - list - node-set.
     elif isinstance(xp_result, list):
@@ -423,67 +811,616 @@ def print_xp_result(xp_result: Any, el_tree: etree._ElementTree, args: argparse.
         sys.stderr.write(f"Unknown XPath result: {xp_result}\n")
 
 
+def is_hit(xp_result: Any) -> bool:
+    """Return True if the XPath result is a hit: not false and not NaN.
+
+    :param xp_result: XPath result
+    """
+    # pylint: disable=comparison-with-itself
+    # NaN check: float('nan') != float('nan').
+    # False is a possible value for xp_result (XPath test).
+    return xp_result == xp_result and bool(xp_result)
+
+
+@timed("output")
+def print_file_hit(source_name: str, hit: bool, args: argparse.Namespace) -> None:
+    """Print the XML source name (--files-with-hits/--files-without-hits).
+
+    :param source_name: name of the XML source
+    :param hit: XPath result is a hit; see is_hit()
+    :param args: command-line arguments
+    """
+    if (hit and args.files_with_hits) or (not hit and args.files_without_hits):
+        print(source_name)
+
+
+@timed("output")
+def print_count(source_name: str, count: int, args: argparse.Namespace) -> None:
+    """Print the number of result nodes (--count).
+
+    :param source_name: name of the XML source
+    :param count: number of result nodes
+    :param args: command-line arguments
+    """
+    if args.multiple_sources or len(args.xpath_exprs) > 1:
+        print(f"{source_name}:{count}")
+    else:
+        print(count)
+
+
+def print_cached_result(source_name: str, result: list[Any], args: argparse.Namespace) -> None:
+    """Print the cached file hits or result counts of the XPath expressions (--cache).
+
+    :param source_name: name of the XML source
+    :param result: file hit (-l, -L) or result count (-c) of each XPath expression
+    :param args: command-line arguments
+    """
+    multiple = len(args.xpath_exprs) > 1
+    for xpath_exp, value in zip(args.xpath_exprs, result):
+        label = f"{source_name} ({xpath_exp})" if multiple else source_name
+        if args.files_with_hits or args.files_without_hits:
+            print_file_hit(label, value, args)
+        else:
+            print_count(label, value, args)
+
+
+def cache_context(args: argparse.Namespace) -> str:
+    """Return the context of the cached file hits or result counts (--cache).
+
+    :param args: command-line arguments
+    """
+    return context_digest(
+        {
+            "command": "xp",
+            "xpath_exprs": args.xpath_exprs,
+            "default_ns_prefix": args.default_ns_prefix,
+            "exslt": args.exslt,
+            "record": args.record,
+            "stream": args.stream,
+            "lxml_method": args.lxml_method,
+            "pretty_element": args.pretty_element,
+            "huge_tree": args.huge_tree,
+            "result": "hits" if args.files_with_hits or args.files_without_hits else "count",
+        }
+    )
+
+
+@cache
+def json_string_encoder() -> Callable[[str], str]:
+    """Return the JSON string encoder (ASCII); json is imported on first use."""
+    # pylint: disable=import-outside-toplevel
+    from json.encoder import encode_basestring_ascii
+
+    return encode_basestring_ascii
+
+
+def json_value(value: Any) -> str:
+    """Return a JSON value: string, number, boolean or null.
+
+    :param value: str, int, float, bool or None; NaN and infinity are null
+    """
+    if isinstance(value, str):
+        return json_string_encoder()(value)
+    if value is None:
+        return "null"
+    if isinstance(value, float) and not math.isfinite(value):
+        # NaN and infinity.
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return repr(value)
+
+
+def json_fields(
+    node: Any, paths: ElementPaths, args: argparse.Namespace
+) -> tuple[Optional[int], str, Optional[str], Any, Optional[str]]:
+    """Return the line, kind, name, value and path of an XPath result (--format jsonl).
+
+    :param node: XPath result node, string, number or boolean
+    :param paths: XPath path expressions of the ElementTree
+    :param args: command-line arguments
+
+    The path (--result-xpath) of a text or attribute node is the path of its parent element.
+    """
+    line: Any = None
+    name: Optional[str] = None
+    value: Any = None
+    path_el: Optional[etree._Element] = None
+    if etree.iselement(node):
+        line, path_el = node.sourceline, node
+        if node.tag is etree.PI:
+            # lxml.etree._ProcessingInstruction.
+            kind, name, value = "processing-instruction", node.target, node.text  # type: ignore[attr-defined]
+        elif node.tag is etree.Comment:
+            kind, value = "comment", node.text
+        else:
+            kind, name = "element", node.tag
+            if args.pretty_element:
+                value = etree.tostring(node, encoding="unicode", pretty_print=True, with_tail=False)
+            else:
+                value = node.text
+    # Smart string -- .getparent() | attribute, entity, text (atomic value).
+    elif hasattr(node, "getparent"):
+        kind, value = "string", str(node)
+        # string() and concat() results do not have an origin.
+        if (parent := node.getparent()) is not None:
+            line, path_el = parent.sourceline, parent
+            if node.is_attribute:
+                kind, name = "attribute", node.attrname
+            elif node.is_text:
+                kind = "text"
+            elif node.is_tail:
+                kind = "tail"
+    # Namespaces -- namespace::
+    elif isinstance(node, tuple):
+        kind, value = "namespace", node[1]
+        name = args.default_ns_prefix if node[0] is None else node[0]
+    elif isinstance(node, bool):
+        kind, value = "boolean", node
+    elif isinstance(node, float):
+        kind = "number"
+        # NaN (not a number) and infinity are null.
+        if math.isfinite(node):
+            value = int(node) if node.is_integer() else node
+    else:
+        kind, value = "string", str(node)
+
+    path = None
+    if args.result_xpath and path_el is not None:
+        path = paths.getpath(path_el)
+    return line, kind, name, value, path
+
+
+@timed("output")
+def print_json_result(
+    source_name: str,
+    xp_result: Any,
+    el_tree: etree._ElementTree,
+    args: argparse.Namespace,
+    xpath_exp: Optional[str] = None,
+) -> None:
+    """Print the XPath results as JSON Lines: a JSON object per result (--format jsonl).
+
+    :param source_name: name of the XML source
+    :param xp_result: XPath result
+    :param el_tree: lxml ElementTree
+    :param args: command-line arguments
+    :param xpath_exp: (optional) XPath expression of the results (multiple expressions)
+
+    Keys: source, (multiple expressions) xpath, line, kind, name, value and
+    (--result-xpath) path.
+    The objects are formatted directly; json.dumps() is slower for many small objects.
+
+    JSON Lines:
+        https://jsonlines.org/
+    """
+    source = json_value(source_name)
+    if xpath_exp is not None:
+        source += f',"xpath":{json_value(xpath_exp)}'
+    paths = ElementPaths(el_tree)
+    out = OutputBuffer()
+    try:
+        for node in build_result_list(xp_result):
+            line, kind, name, value, path = json_fields(node, paths, args)
+            result = (
+                f'{{"source":{source},"line":{json_value(line)},"kind":"{kind}",'
+                f'"name":{json_value(name)},"value":{json_value(value)}'
+            )
+            if args.result_xpath:
+                result += f',"path":{json_value(path)}'
+            out.line(result + "}")
+        out.flush()
+    except BrokenPipeError:
+        sys.stderr.close()
+
+
+def compile_columns(
+    args: argparse.Namespace, ns_map: dict[str, str]
+) -> Optional[list[etree.XPath]]:
+    """Return the XPath instances of the columns (--col); None on error.
+
+    :param args: command-line arguments
+    :param ns_map: XML namespace (prefix: URI) dictionary
+
+    The XPath instances are cached by expression and XML namespaces; see build_xpath().
+    """
+    columns = []
+    for _, xpath_exp in args.columns:
+        if (xpath_obj := build_xpath(xpath_exp, ns_map)) is None:
+            return None
+        columns.append(xpath_obj)
+    return columns
+
+
+def column_value(xp_result: Any) -> Any:
+    """Return the value of a column: string, number, boolean or None (no node).
+
+    :param xp_result: XPath result of the column expression
+
+    A node-set is the string-value of its first node, like XPath string().
+    """
+    if isinstance(xp_result, list):
+        if not xp_result:
+            return None
+        xp_result = xp_result[0]
+        if etree.iselement(xp_result):
+            return _STRING_VALUE(xp_result)
+        if isinstance(xp_result, tuple):
+            # Namespace URI.
+            return xp_result[1]
+    if isinstance(xp_result, str):
+        # Smart string => string.
+        return str(xp_result)
+    if isinstance(xp_result, float) and xp_result.is_integer():
+        return int(xp_result)
+    return xp_result
+
+
+@timed("xpath")
+def row_values(
+    xp_result: Any, columns: list[etree.XPath], args: argparse.Namespace
+) -> Optional[list[list[Any]]]:
+    """Return the column values of the row elements (--rows, --col); None on error.
+
+    :param xp_result: XPath result of the rows expression
+    :param columns: XPath instances of the columns; see compile_columns()
+    :param args: command-line arguments
+    """
+    if not isinstance(xp_result, list) or not all(etree.iselement(row) for row in xp_result):
+        sys.stderr.write(f"XPath rows are not elements: {args.rows}\n")
+        return None
+    try:
+        return [[column_value(column(row)) for column in columns] for row in xp_result]
+    except etree.XPathEvalError as e:
+        sys.stderr.write(f"{e}: --col {' '.join(c for _, c in args.columns)}\n")
+        return None
+
+
+def cell_text(value: Any) -> str:
+    """Return the text of a column value (TSV, CSV); like XPath string()."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and not math.isfinite(value):
+        if math.isnan(value):
+            return "NaN"
+        return "Infinity" if value > 0 else "-Infinity"
+    return str(value)
+
+
+def table_writer(out: OutputBuffer, args: argparse.Namespace) -> Callable[[list[str]], Any]:
+    """Return the function that writes a row of cells (--format tsv or csv).
+
+    :param out: output buffer
+    :param args: command-line arguments
+
+    TSV: backslash, tab, newline and carriage return are escaped as in C strings.
+    CSV: quoted when needed (csv module, RFC 4180).
+    """
+    if args.format == "csv":
+        # pylint: disable=import-outside-toplevel
+        import csv
+
+        return csv.writer(out, lineterminator="\n").writerow
+    return lambda cells: out.line("\t".join([cell.translate(_TSV_ESCAPES) for cell in cells]))
+
+
+@timed("output")
+def print_rows_header(args: argparse.Namespace) -> None:
+    """Print the header of the rows: the column names (--format tsv or csv).
+
+    :param args: command-line arguments
+    """
+    out = OutputBuffer()
+    names = ["source"] if args.multiple_sources else []
+    names.extend(name for name, _ in args.columns)
+    table_writer(out, args)(names)
+    out.flush()
+
+
+@timed("output")
+def print_rows(source_name: str, values: list[list[Any]], args: argparse.Namespace) -> None:
+    """Print the rows: column values (--rows, --col).
+
+    :param source_name: name of the XML source
+    :param values: column values of the rows; see row_values()
+    :param args: command-line arguments
+
+    TSV and CSV have a source column with multiple XML sources; see print_rows_header().
+    JSON Lines: a JSON object per row with the keys source and the column names.
+    """
+    out = OutputBuffer()
+    try:
+        if args.format == "jsonl":
+            source = f'{{"source":{json_value(source_name)}'
+            keys = [f",{json_value(name)}:" for name, _ in args.columns]
+            for row in values:
+                out.line(source + "".join([k + json_value(v) for k, v in zip(keys, row)]) + "}")
+        else:
+            write_row = table_writer(out, args)
+            prefix = [source_name] if args.multiple_sources else []
+            for row in values:
+                write_row([*prefix, *[cell_text(value) for value in row]])
+        out.flush()
+    except BrokenPipeError:
+        sys.stderr.close()
+
+
 def xpath_on_xml(
     xml_source: Union[TextIO, str],
     parser: etree.XMLParser,
     xpath_fn: Callable[[etree._ElementTree, str, dict[str, str]], Any],
     args: argparse.Namespace,
+    stream_path: Optional[StreamPath] = None,
 ) -> bool:
-    """Apply XPath expression to XML source.
+    """Apply XPath expressions to XML source.
 
     :param xml_source: XML file, file-like object or URL
     :param parser: XML parser
     :param xpath_fn: ElementTree.xpath method or XPath class
     :param args: command-line arguments
+    :param stream_path: (optional) streamable XPath expression for the streaming engine
+
+    The XML source is parsed once for all XPath expressions (-x/--xpath, --expr-file).
     """
-    # ElementTree (lxml.etree._ElementTree).
-    el_tree = build_etree(xml_source, parser=parser, lenient=False)
-    if el_tree is None:
-        return False
+    # Cached file hits or result counts (--cache).
+    key, cached = cached_result(xml_source)
+    if cached is not None:
+        print_cached_result(get_source_name(xml_source), cached, args)
+        return True
+    if args.record:
+        return xpath_on_records(xml_source, xpath_fn, args, key)
+
+    el_tree: Optional[etree._ElementTree]
+    if stream_path:
+        # Streaming engine: XML namespaces and XPath result while parsing.
+        streamed = stream_xpath(
+            xml_source,
+            stream_path,
+            ns_map=exslt_ns_map() if args.exslt else {},
+            none_prefix=args.default_ns_prefix,
+            remove_blank_text=args.pretty_element,
+            huge_tree=args.huge_tree,
+            # File hit: the first result.
+            first_hit=args.files_with_hits or args.files_without_hits,
+        )
+        if streamed is None:
+            return False
+        (el_tree, ns_map, xp_result) = streamed
+        xp_results = [(args.xpath_expr, xp_result)]
+    else:
+        # ElementTree (lxml.etree._ElementTree).
+        el_tree = build_etree(xml_source, parser=parser, lenient=False)
+        if el_tree is None:
+            return False
+
+        # Determine XML namespaces.
+        if need_namespaces(args):
+            ns_map = namespaces(
+                el_tree, args.exslt, args.default_ns_prefix, prefixes=needed_prefixes(args)
+            )
+        else:
+            ns_map = exslt_ns_map() if args.exslt else {}
+        # XPath expressions on ElementTree.
+        if args.files_with_hits or args.files_without_hits:
+            xp_results = [
+                (xpath_exp, xpath_hit(xpath_fn, el_tree, xpath_exp, ns_map))
+                for xpath_exp in args.xpath_exprs
+            ]
+        else:
+            xp_results = [
+                (xpath_exp, xpath_fn(el_tree, xpath_exp, ns_map)) for xpath_exp in args.xpath_exprs
+            ]
 
-    # Determine XML namespaces.
-    ns_map = namespaces(el_tree, args.exslt, args.default_ns_prefix)
-    # XPath expression on ElementTree.
-    xp_result = xpath_fn(el_tree, args.xpath_expr, ns_map)
-    if xp_result is None:
+    # Printable name for sys.stdin.
+    source_name = get_source_name(xml_source)
+    multiple = len(args.xpath_exprs) > 1
+    printed = False
+    # File hits or result counts (--cache).
+    summary: list[Any] = []
+    for xpath_exp, xp_result in xp_results:
+        if xp_result is None:
+            continue
+        # Label of the results: XML source name (and XPath expression).
+        label = f"{source_name} ({xpath_exp})" if multiple else source_name
+
+        # Rows (--rows, --col).
+        if args.rows:
+            columns = compile_columns(args, ns_map)
+            values = None if columns is None else row_values(xp_result, columns, args)
+            if values is None:
+                return False
+            print_rows(source_name, values, args)
+        # XML sources names (--files-with-hits/--files-without-hits).
+        elif args.files_with_hits or args.files_without_hits:
+            summary.append(is_hit(xp_result))
+            print_file_hit(label, summary[-1], args)
+        # Result count (--count).
+        elif args.count:
+            summary.append(len(build_result_list(xp_result)))
+            print_count(label, summary[-1], args)
+        # JSON Lines (--format jsonl).
+        elif args.format == "jsonl":
+            print_json_result(
+                source_name, xp_result, el_tree, args, xpath_exp if multiple else None
+            )
+        else:
+            if printed:
+                print()
+            # XML namespaces (verbose).
+            elif args.verbose:
+                print_xmlns(ns_map, el_tree.getroot())
+            # XPath result(s) header.
+            print_result_header(label, xp_result)
+            # XPath result(s).
+            print_xp_result(xp_result, el_tree, args)
+        printed = True
+    if not all(xp_result is not None for _, xp_result in xp_results):
         return False
+    if summary:
+        store_result(key, summary)
+    return True
 
+
+@timed("output")
+def render_result_list(
+    source_name: str, result_list: list[Any], el_tree: etree._ElementTree, args: argparse.Namespace
+) -> bytes:
+    """Return the printed result nodes or rows (encoded for standard output).
+
+    :param source_name: name of the XML source
+    :param result_list: XPath result list (or column values of the rows; see row_values())
+    :param el_tree: lxml ElementTree
+    :param args: command-line arguments
+    """
+    buffer = io.TextIOWrapper(
+        io.BytesIO(), encoding=sys.stdout.encoding, errors=sys.stdout.errors, newline=""
+    )
+    with redirect_stdout(buffer):
+        if args.rows:
+            print_rows(source_name, result_list, args)
+        elif args.format == "jsonl":
+            print_json_result(source_name, result_list, el_tree, args)
+        else:
+            print_result_list(result_list, el_tree, args)
+    buffer.flush()
+    return buffer.buffer.getvalue()
+
+
+def xpath_on_records(
+    xml_source: Union[TextIO, str],
+    xpath_fn: Callable[[Any, str, dict[str, str]], Any],
+    args: argparse.Namespace,
+    cache_key: Optional[str] = None,
+) -> bool:
+    """Apply XPath expression to each record element of an XML source (--record).
+
+    :param xml_source: XML file, file-like object or URL
+    :param xpath_fn: ElementTree.xpath method or XPath class
+    :param args: command-line arguments
+    :param cache_key: (optional) key of the file hit or result count (--cache)
+
+    The XPath expression is applied to a copy of each record (a separate document).
+    The XPath results of the records are aggregated:
+    - node-sets and strings: all result nodes (printed per record)
+    - numbers: sum
+    - booleans: true if the result of a record is true
+    """
+    # pylint: disable=import-outside-toplevel
+    import copy
+    import shutil
+    import tempfile
+
+    ns_map = exslt_ns_map() if args.exslt else {}
     # Printable name for sys.stdin.
     source_name = get_source_name(xml_source)
+    file_hits = args.files_with_hits or args.files_without_hits
+    hit = False
+    failed = False
+    # Aggregated number or boolean.
+    scalar: Any = None
+    # Number of result nodes.
+    count = 0
+    ns_results = False
+    # Printed result nodes; in a temporary file when large.
+    output = tempfile.SpooledTemporaryFile(max_size=RECORD_SPOOL_SIZE)
+
+    def xpath_on_record(record: etree._Element) -> bool:
+        """Apply XPath expression to a record; return False to stop parsing."""
+        nonlocal hit, failed, scalar, count, ns_results
+        # A copy of the record is a separate document: / and // select from the record,
+        # not from the records that are parsed but not yet cleared.
+        record = copy.deepcopy(record)
+        # The XPath class is compiled once per XML namespaces; see build_xpath().
+        if file_hits:
+            xp_result = xpath_hit(xpath_fn, record, args.xpath_expr, ns_map)
+        else:
+            xp_result = xpath_fn(record, args.xpath_expr, ns_map)
+        if xp_result is None:
+            failed = True
+            return False
+        if file_hits:
+            hit = is_hit(xp_result)
+            # Stop at the first hit.
+            return not hit
+        if isinstance(xp_result, bool):
+            scalar = xp_result or bool(scalar)
+        elif isinstance(xp_result, float):
+            scalar = xp_result + (scalar or 0.0)
+        else:
+            result_list = build_result_list(xp_result)
+            count += len(result_list)
+            if result_list and not args.count:
+                ns_results = ns_results or isinstance(result_list[0], tuple)
+                output.write(
+                    render_result_list(source_name, result_list, record.getroottree(), args)
+                )
+        return True
+
+    el_tree = stream_records(
+        xml_source,
+        args.record,
+        xpath_on_record,
+        ns_map=ns_map,
+        none_prefix=args.default_ns_prefix,
+        remove_blank_text=args.pretty_element,
+        huge_tree=args.huge_tree,
+    )
+    if el_tree is None or failed:
+        return False
 
     # XML sources names (--files-with-hits/--files-without-hits).
-    if args.files_with_hits or args.files_without_hits:
-        # pylint: disable=comparison-with-itself
-        # NaN check: float('nan') != float('nan').
-        if xp_result != xp_result:
-            if args.files_without_hits:
-                print(source_name)
-        elif args.files_with_hits and xp_result:
-            print(source_name)
-        # False is a possible value for xp_result (XPath test).
-        elif args.files_without_hits and not xp_result:
-            print(source_name)
+    if file_hits:
+        store_result(cache_key, [hit])
+        print_file_hit(source_name, hit, args)
         return True
 
     # Result count (--count).
     if args.count:
-        xp_result_count = len(build_result_list(xp_result))
-        if len(args.xml_sources) > 1:
-            print(f"{source_name}:{xp_result_count}")
-        else:
-            print(xp_result_count)
+        count = count if scalar is None else 1
+        store_result(cache_key, [count])
+        print_count(source_name, count, args)
         return True
 
-    # XML namespaces (verbose).
-    if args.verbose:
-        print_xmlns(ns_map, el_tree.getroot())
-    # XPath result(s) header.
-    print_result_header(source_name, xp_result)
-    # XPath result(s).
-    print_xp_result(xp_result, el_tree, args)
+    if args.format != "text":
+        if scalar is not None:
+            print_json_result(source_name, scalar, el_tree, args)
+            return True
+    else:
+        # XML namespaces (verbose).
+        if args.verbose:
+            print_xmlns(ns_map, el_tree.getroot())
+        if scalar is not None:
+            print_result_header(source_name, scalar)
+            print_xp_result(scalar, el_tree, args)
+            return True
+        print_result_summary(source_name, count, ns_results)
+    try:
+        with phase("output"):
+            sys.stdout.flush()
+            output.seek(0)
+            shutil.copyfileobj(output, sys.stdout.buffer)
+            sys.stdout.flush()
+    except BrokenPipeError:
+        sys.stderr.close()
     return True
 
 
+def xp_worker(args: argparse.Namespace) -> Callable[[str], bool]:
+    """Return the XPath job of a worker process (--jobs).
+
+    :param args: command-line arguments
+
+    Each worker process has its own XML parser and compiles its own XPath.
+    """
+    (xpath_fn, xml_parser) = xp_prepare(args)
+    stream_path = xp_stream_path(args)
+    if args.cache_context:
+        enable_result_cache(args.cache_context, args.cache_size)
+    return lambda xml_source: xpath_on_xml(xml_source, xml_parser, xpath_fn, args, stream_path)
+
+
 def main() -> None:
     """Entry point for command line script xp."""
     # Logging to the console.
@@ -491,27 +1428,68 @@ def main() -> None:
 
     # Command line.
     args = parse_cl()
-
-    # Valid XPath expression?
-    if not build_xpath(args.xpath_expr):
+    # XML catalog files (also for worker processes).
+    set_catalog_files(args.catalog_files)
+    # Run statistics (--stats, --stats-json).
+    if args.stats:
+        enable_stats("xp", json_output=args.stats == "json")
+
+    # Valid XPath expressions?
+    xpath_exprs = [*args.xpath_exprs, *(xpath_exp for _, xpath_exp in args.columns)]
+    if not all([build_xpath(xpath_exp) for xpath_exp in xpath_exprs]):
         sys.exit(60)
 
     # XPath function and XML parser.
     (xpath_fn, xml_parser) = xp_prepare(args)
+    # Streaming XPath engine (--stream).
+    stream_path = xp_stream_path(args)
+    if args.stream:
+        report_engine(args, stream_path)
+    # Result cache (--cache).
+    args.cache_context = cache_context(args) if args.cache else None
+    if args.cache_context:
+        enable_result_cache(args.cache_context, args.cache_size)
+
+    # Column names (--rows with --format tsv or csv).
+    if args.rows and args.format != "jsonl":
+        print_rows_header(args)
 
     # Use XPath on XML sources.
     extra_new_line = False
-    for xml_s in args.xml_sources:
-        if extra_new_line:
-            print()
-        elif not (args.files_with_hits or args.files_without_hits or args.count):
-            extra_new_line = True
-        xpath_on_xml(xml_s, xml_parser, xpath_fn, args)
-
-    if not args.xml_sources:
+    # Empty line between the XPath results of the XML sources.
+    separate_sources = args.format == "text" and not (
+        args.files_with_hits or args.files_without_hits or args.count
+    )
+    if args.jobs != 1 and args.multiple_sources:
+        # Worker processes; output in XML source order.
+        xml_sources = command_line_sources(args, read=True)
+        for _, stdout, stderr in run_jobs(xp_worker, (args,), xml_sources, args.jobs):
+            try:
+                if extra_new_line:
+                    print()
+                elif separate_sources:
+                    extra_new_line = True
+                write_output(stdout, stderr)
+            except BrokenPipeError:
+                sys.stderr.close()
+                break
+    else:
+        for xml_s in command_line_sources(args):
+            if extra_new_line:
+                print()
+            elif separate_sources:
+                extra_new_line = True
+            with source_stats(xml_s):
+                xpath_on_xml(xml_s, xml_parser, xpath_fn, args, stream_path)
+
+    if not has_sources(args):
         # Read from a pipe when no XML source is specified.
         if not sys.stdin.isatty():
-            xpath_on_xml(sys.stdin, xml_parser, xpath_fn, args)
+            with source_stats(sys.stdin):
+                xpath_on_xml(sys.stdin, xml_parser, xpath_fn, args, stream_path)
         else:
             sys.stderr.write("Error: no XML source specified\n")
             sys.exit(70)
+
+    close_result_cache()
+    report_stats()
@@ -0,0 +1,141 @@
+"""Compressed XML sources: gzip, bzip2, xz and Zstandard.
+
+The compression of a local file (or of standard input) is detected by its
+magic bytes, not by the file name extension. The XML parser reads the
+decompressed bytes in chunks: no temporary files, and the XML source keeps
+its name (error messages, base URL of relative DTDs and entities).
+
+Zstandard requires Python 3.14 (compression.zstd) or the zstandard package:
+    pip install xul[zstd]
+
+The decompression modules are imported on first use.
+
+gzip, bz2 and lzma:
+    https://docs.python.org/3/library/archiving.html
+compression.zstd:
+    https://docs.python.org/3.14/library/compression.zstd.html
+"""
+
+import io
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Optional, TextIO, Union
+
+# Magic bytes: compression.
+MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bzip2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+# Bytes read to detect the compression.
+MAGIC_SIZE = max(len(magic) for magic, _ in MAGIC)
+
+
+def compression(head: bytes) -> Optional[str]:
+    """Return the compression (gzip, bzip2, xz or zstd) of the first bytes or None.
+
+    :param head: first bytes of an XML source
+    """
+    for magic, name in MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _decompressor(fileobj: BinaryIO, name: str) -> tuple[Any, tuple[type[Exception], ...]]:
+    """Return a decompressing file object and its decompression errors.
+
+    :param fileobj: binary file object with compressed data
+    :param name: compression; see compression()
+    """
+    # pylint: disable=import-outside-toplevel
+    if name == "gzip":
+        import gzip
+        import zlib
+
+        return gzip.GzipFile(fileobj=fileobj, mode="rb"), (EOFError, zlib.error)
+    if name == "bzip2":
+        import bz2
+
+        return bz2.BZ2File(fileobj), (EOFError,)
+    if name == "xz":
+        import lzma
+
+        return lzma.LZMAFile(fileobj), (EOFError, lzma.LZMAError)
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+
+        return zstd.ZstdFile(fileobj), (EOFError, zstd.ZstdError)
+    except ImportError:
+        pass
+    try:
+        import zstandard  # type: ignore[import-not-found]
+    except ImportError:
+        raise OSError(
+            "Zstandard compression requires Python 3.14 or the zstandard package"
+        ) from None
+    return zstandard.ZstdDecompressor().stream_reader(fileobj), (zstandard.ZstdError,)
+
+
+class DecompressedSource:
+    """Decompressed XML source for the XML parser (file-like object).
+
+    :param name: name of the XML source; the base URL of the parser
+    :param fileobj: decompressing file object
+    :param errors: decompression errors; raised as OSError
+    """
+
+    def __init__(self, name: str, fileobj: Any, errors: tuple[type[Exception], ...] = ()) -> None:
+        self.name = name
+        self.fileobj = fileobj
+        self.errors = errors
+
+    def read(self, size: int = -1) -> bytes:
+        """Return decompressed bytes (at most size)."""
+        try:
+            return self.fileobj.read(size)
+        except self.errors as e:
+            raise OSError(f"Error decompressing '{self.name}': {e}") from e
+
+
+@contextmanager
+def open_xml_source(xml_source: Union[TextIO, str]) -> Iterator[Any]:
+    """Open an XML source for the XML parser: decompressed when compressed.
+
+    :param xml_source: XML file, file-like object or URL
+
+    Yield a DecompressedSource for a compressed file or standard input,
+    the bytes (buffer) of a text stream such as sys.stdin (no text decoding:
+    the encoding of the XML declaration is used), or else xml_source:
+    files and URLs are read by libxml2.
+    """
+    if isinstance(xml_source, io.TextIOWrapper):
+        # E.g. sys.stdin.
+        stream: Any = xml_source.buffer
+        name = compression(stream.peek(MAGIC_SIZE)) if hasattr(stream, "peek") else None
+        if name is None:
+            yield stream
+        else:
+            fileobj, errors = _decompressor(stream, name)
+            yield DecompressedSource(xml_source.name, fileobj, errors)
+        return
+
+    if not isinstance(xml_source, str):
+        yield xml_source
+        return
+    try:
+        f = open(xml_source, "rb")  # pylint: disable=consider-using-with
+    except OSError:
+        # URL, or reported by the XML parser.
+        yield xml_source
+        return
+    with f:
+        if (name := compression(f.read(MAGIC_SIZE))) is not None:
+            f.seek(0)
+            fileobj, errors = _decompressor(f, name)
+            with fileobj:
+                yield DecompressedSource(xml_source, fileobj, errors)
+            return
+    # Not compressed: libxml2 reads the file.
+    yield xml_source
@@ -16,23 +16,59 @@ from typing import Optional, TextIO, Union
 
 from lxml import etree
 
+from .catalog import add_catalog_resolver
+from .compressed import open_xml_source
+from .stats import count_elements, phase
 from .utils import get_source_name
 
 logger = getLogger(__name__)
 
 
+def log_syntax_error(file_name: str, error_log: etree._ListErrorLog, lenient: bool = True) -> None:
+    """Log XML syntax errors.
+
+    :param file_name: name of the XML source
+    :param error_log: error log of the (last) parser run
+    :param lenient: log XMLSyntaxError as warnings instead of errors
+    """
+    if lenient:
+        xmllogger = logger.warning
+    else:
+        xmllogger = logger.error
+    xmllogger("%s is not a valid XML source:", file_name)
+
+    # Parsers have an error_log property that lists the errors and warnings
+    # of the last parser run.
+    #   https://lxml.de/parsing.html#error-log
+    for e in error_log:
+        # For example: e.level_name: "FATAL", e.domain_name: "PARSER",
+        # e.type_name: "ERR_DOCUMENT_EMPTY"
+        if e.line == 0:
+            logger.error(e.message)
+        else:
+            xmllogger("line %i, column %i: %s", e.line, e.column, e.message)
+
+
 def build_etree(
     xml_source: Union[TextIO, str],
     parser: Optional[etree.XMLParser] = None,
     lenient: bool = True,
     silent: bool = False,
+    huge_tree: bool = False,
 ) -> Optional[etree._ElementTree]:
     """Parse XML source into an ElementTree.
 
     :param xml_source: XML file, file-like object or URL
-    :param parser: (optional) XML parser
+    :param parser: (optional) XML parser; see catalog.add_catalog_resolver()
     :param lenient: log XMLSyntaxError as warnings instead of errors
     :param silent: disable logging
+    :param huge_tree: disable the libxml2 security limits of the default XML parser
+        (very deep trees, huge text nodes)
+
+    The default XML parser resolves documents with the XML catalog (if any).
+    Files and URLs are read by libxml2; a text stream (sys.stdin) is read as
+    bytes, without decoding. Compressed files and standard input (gzip, bzip2,
+    xz, Zstandard) are decompressed while parsing; see compressed.open_xml_source().
 
     Return ElementTree (lxml.etree._ElementTree) on success.
     Return None on error.
@@ -44,37 +80,21 @@ def build_etree(
     """
     # XML parser preparation.
     if not parser:
-        parser = etree.XMLParser(ns_clean=True)
+        parser = add_catalog_resolver(etree.XMLParser(ns_clean=True, huge_tree=huge_tree))
 
     file_name = get_source_name(xml_source)
     try:
         etree.clear_error_log()
-        return etree.parse(xml_source, parser)
+        with phase("parse"), open_xml_source(xml_source) as source:
+            el_tree = etree.parse(source, parser)
 
     # Catch XML syntax errors.
     #   https://lxml.de/api.html#error-handling-on-exceptions
     # error log copy attached to the exception: global error log of all errors
     # that occurred at the application level.
     except etree.XMLSyntaxError:
-        if silent:
-            return None
-
-        if lenient:
-            xmllogger = logger.warning
-        else:
-            xmllogger = logger.error
-        xmllogger("%s is not a valid XML source:", file_name)
-
-        # Parsers have an error_log property that lists the errors and warnings
-        # of the last parser run.
-        #   https://lxml.de/parsing.html#error-log
-        for e in parser.error_log:
-            # For example: e.level_name: "FATAL", e.domain_name: "PARSER",
-            # e.type_name: "ERR_DOCUMENT_EMPTY"
-            if e.line == 0:
-                logger.error(e.message)
-            else:
-                xmllogger("line %i, column %i: %s", e.line, e.column, e.message)
+        if not silent:
+            log_syntax_error(file_name, parser.error_log, lenient=lenient)
         return None
 
     # Catch UnicodeDecodeError exceptions, for example:
@@ -88,3 +108,6 @@ def build_etree(
     except OSError as e:
         logger.error(e)
         return None
+
+    count_elements(el_tree)
+    return el_tree
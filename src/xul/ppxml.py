@@ -1,22 +1,51 @@
 """Pretty Print XML."""
 
 import sys
-from typing import Optional, TextIO, Union
+from functools import cache
+from typing import Callable, Optional, TextIO, Union
 
 from lxml import etree
 
 from .etree import build_etree
+from .stats import timed
 
 __all__ = ["prettyprint", "pp_xml"]
 
 
-def _private_pp(
+@cache
+def _highlighter() -> Optional[Callable[[str], str]]:
+    """Return the XML syntax highlighter or None without Pygments.
+
+    Pygments, its XML lexer and the terminal formatter are loaded on first
+    use (not at import time) and kept for the process.
+    """
+    # pylint: disable=import-outside-toplevel
+    try:
+        from pygments import highlight
+        from pygments.formatters import Terminal256Formatter
+        from pygments.lexers import get_lexer_by_name
+    except ImportError:
+        return None
+
+    lexer = get_lexer_by_name("xml")
+    formatter = Terminal256Formatter()
+
+    def highlight_xml(xml_string: str) -> str:
+        # pygments.highlight() will return an Unicode string.
+        # https://pygments.org/docs/formatters/
+        return highlight(xml_string, lexer, formatter)
+
+    return highlight_xml
+
+
+@timed("output")
+def prettyprint(
     el_tree: etree._ElementTree, syntax: bool = True, xml_declaration: bool = True
 ) -> None:
     """Pretty print XML ElementTree with (optional) syntax highlighting.
 
     :param el_tree: ElementTree to pretty print
-    :param syntax: syntax highlighting (or not)
+    :param syntax: syntax highlighting (or not); requires Pygments
     :param xml_declaration: print an XML declaration (or not)
 
     Serialising to Unicode strings
@@ -37,10 +66,8 @@ def _private_pp(
             el_tree, encoding=encoding, xml_declaration=xml_declaration, pretty_print=True
         )
 
-        if syntax:
-            # pygments.highlight() will return an Unicode string.
-            # https://pygments.org/docs/formatters/
-            print(highlight(etree_string, lexer, Terminal256Formatter()))
+        if syntax and (highlight_xml := _highlighter()):
+            print(highlight_xml(etree_string))  # type: ignore[arg-type]
         else:
             # Bytes => Unicode string.
             print(etree_string.decode(encoding))  # type: ignore[union-attr]
@@ -50,39 +77,6 @@ def _private_pp(
         sys.stderr.close()
 
 
-try:
-    # pylint: disable=wrong-import-position
-    from pygments import highlight
-    from pygments.formatters import Terminal256Formatter
-    from pygments.lexers import get_lexer_by_name
-except ImportError:
-    # pylint: disable=unused-argument
-    def prettyprint(
-        el_tree: etree._ElementTree, syntax: bool = False, xml_declaration: bool = True
-    ) -> None:
-        """Plain pretty print XML ElementTree (without syntax highlighting).
-
-        :param el_tree: ElementTree to pretty print
-        :param syntax: syntax highlighting (or not)
-        :param xml_declaration: print an XML declaration (or not)
-        """
-        return _private_pp(el_tree, syntax=False, xml_declaration=xml_declaration)
-
-else:
-    lexer = get_lexer_by_name("xml")
-
-    def prettyprint(
-        el_tree: etree._ElementTree, syntax: bool = True, xml_declaration: bool = True
-    ) -> None:
-        """Pretty print XML ElementTree with (optional) syntax highlighting.
-
-        :param el_tree: ElementTree to pretty print
-        :param syntax: syntax highlighting (or not)
-        :param xml_declaration: print an XML declaration (or not)
-        """
-        return _private_pp(el_tree, syntax=syntax, xml_declaration=xml_declaration)
-
-
 def pp_xml(
     xml_source: Union[TextIO, str],
     parser: Optional[etree.XMLParser] = None,
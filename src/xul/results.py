@@ -0,0 +1,330 @@
+"""Result cache (--cache): skip unchanged XML sources on a re-run.
+
+The result of an XML source (validation verdict and messages, XPath file
+hits or counts) is stored in an SQLite database, keyed by the SHA-256 hash
+of the content of the XML source and the SHA-256 hash of the context: the
+script, its options and XPath expressions, and the content of the schema
+documents (e.g. xs:include documents) and XML catalog files. A changed XML
+source, schema document, catalog or option is a cache miss. Results with the
+name of the XML source in their messages (validate) are keyed by the name too.
+
+The SHA-256 hash of an XML file is computed when its modification time or
+size changed; the hashes of unchanged files are stored in the database too.
+
+The cache holds at most max_entries results. The least recently used results
+are removed at the end of a run (close_result_cache).
+
+Only local files are cached, not standard input, URLs and archive members.
+Worker processes (--jobs) share the database.
+
+Database: $XUL_CACHE_DIR/results.sqlite or $XDG_CACHE_HOME/xul/results.sqlite.
+
+The sqlite3, json and hashlib modules are imported on first use (startup time).
+
+sqlite3:
+    https://docs.python.org/3/library/sqlite3.html
+"""
+
+import logging
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Any, Optional, TextIO, Union
+
+from . import __version__
+from .catalog import catalog_resolver
+from .utils import file_sha256, xul_cache_dir
+
+logger = getLogger(__name__)
+
+# Database of the result cache (in the Xul cache directory).
+RESULTS_DB = "results.sqlite"
+# Default maximum number of cached results.
+DEFAULT_CACHE_SIZE = 1_000_000
+# Seconds to wait for a database lock (worker processes).
+BUSY_TIMEOUT = 60
+# Maximum number of log messages of a cached result; see capture_messages().
+MAX_MESSAGES = 100
+# Files modified less than this many seconds ago are hashed again on the next run:
+# a change within the resolution of the modification time keeps the size and time.
+RACY_SECONDS = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY, value TEXT NOT NULL, used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, mtime INTEGER NOT NULL, size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL, used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_used ON files (used);
+"""
+
+# Result cache of the process; see enable_result_cache().
+_cache: Optional["ResultCache"] = None
+
+
+class ResultCache:
+    """Results of XML sources in an SQLite database.
+
+    :param context: SHA-256 (hex) digest of the context; see context_digest()
+    :param max_entries: maximum number of cached results
+    :param db_file: database file [default: RESULTS_DB in the Xul cache directory]
+
+    The database is opened on first use, in every (worker) process.
+    Database errors disable the cache.
+    """
+
+    def __init__(
+        self, context: str, max_entries: int = DEFAULT_CACHE_SIZE, db_file: Optional[str] = None
+    ) -> None:
+        self.context = context
+        self.max_entries = max_entries
+        self.db_file = db_file or os.path.join(xul_cache_dir(), RESULTS_DB)
+        self.conn: Any = None
+        self.pid = 0
+        self.disabled = False
+
+    def connect(self) -> Any:
+        """Return the database connection of this process or None (disabled)."""
+        # pylint: disable=import-outside-toplevel
+        import sqlite3
+
+        if self.disabled:
+            return None
+        if self.conn is not None and self.pid == os.getpid():
+            return self.conn
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_file)), exist_ok=True)
+            # Autocommit: every statement is a (short) transaction.
+            conn = sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Result cache '%s' is disabled: %s", self.db_file, e)
+            self.disabled = True
+            return None
+        # Not the connection of the parent process (fork).
+        self.conn, self.pid = conn, os.getpid()
+        return conn
+
+    def content_sha256(self, file_name: str) -> Optional[str]:
+        """Return the SHA-256 (hex) digest of the content of a local file or None.
+
+        :param file_name: XML file
+
+        The stored hash is used when the modification time and size did not change.
+        """
+        # pylint: disable=import-outside-toplevel
+        import sqlite3
+
+        if (conn := self.connect()) is None:
+            return None
+        path = os.path.abspath(file_name)
+        try:
+            stat = os.stat(path)
+            row = conn.execute(
+                "SELECT mtime, size, sha256 FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            now = time.time_ns()
+            if row and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+                conn.execute("UPDATE files SET used = ? WHERE path = ?", (now, path))
+                return row[2]
+            sha256 = file_sha256(path)
+            if stat.st_mtime_ns < now - RACY_SECONDS * 1_000_000_000:
+                conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                    (path, stat.st_mtime_ns, stat.st_size, sha256, now),
+                )
+            return sha256
+        except OSError:
+            # Reported by the XML parser.
+            return None
+        except sqlite3.Error as e:
+            logger.warning("Result cache '%s' is disabled: %s", self.db_file, e)
+            self.disabled = True
+            return None
+
+    def key(self, xml_source: Union[TextIO, str, Any], by_name: bool = False) -> Optional[str]:
+        """Return the cache key of an XML source or None (not cached).
+
+        :param xml_source: XML source; only local files are cached
+        :param by_name: key by the name of the XML source too, e.g. for log messages
+        """
+        # pylint: disable=import-outside-toplevel
+        import hashlib
+
+        if not isinstance(xml_source, str) or not os.path.isfile(xml_source):
+            return None
+        if (sha256 := self.content_sha256(xml_source)) is None:
+            return None
+        if by_name:
+            return hashlib.sha256(f"{self.context}:{sha256}:{xml_source}".encode()).hexdigest()
+        return hashlib.sha256(f"{self.context}:{sha256}".encode()).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """Return the cached result of a key or None."""
+        # pylint: disable=import-outside-toplevel
+        import json
+        import sqlite3
+
+        if (conn := self.connect()) is None:
+            return None
+        try:
+            row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET used = ? WHERE key = ?", (time.time_ns(), key))
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logger.debug("Result cache '%s': %s", self.db_file, e)
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        """Store the result (JSON value) of a key."""
+        # pylint: disable=import-outside-toplevel
+        import json
+        import sqlite3
+
+        if (conn := self.connect()) is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time_ns()),
+            )
+        except sqlite3.Error as e:
+            logger.debug("Result cache '%s': %s", self.db_file, e)
+
+    def evict(self) -> None:
+        """Remove the least recently used results (and file hashes) above max_entries."""
+        # pylint: disable=import-outside-toplevel
+        import sqlite3
+
+        if (conn := self.connect()) is None:
+            return
+        try:
+            for table in ("results", "files"):
+                # Oldest entry that is kept (OFFSET: the newest max_entries - 1).
+                row = conn.execute(
+                    f"SELECT used FROM {table} ORDER BY used DESC LIMIT 1 OFFSET ?",
+                    (max(self.max_entries - 1, 0),),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(f"DELETE FROM {table} WHERE used < ?", (row[0],))
+        except sqlite3.Error as e:
+            logger.debug("Result cache '%s': %s", self.db_file, e)
+
+    def close(self) -> None:
+        """Close the database connection of this process."""
+        if self.conn is not None and self.pid == os.getpid():
+            self.conn.close()
+        self.conn = None
+
+
+def context_digest(context: dict[str, Any]) -> str:
+    """Return the SHA-256 (hex) digest of a result context.
+
+    :param context: JSON dictionary, e.g. the script and its options
+
+    The Xul version and the content of the XML catalog files are added.
+    """
+    # pylint: disable=import-outside-toplevel
+    import hashlib
+    import json
+
+    context = {**context, "version": __version__}
+    if resolver := catalog_resolver():
+        catalogs: dict[str, Optional[str]] = {}
+        for catalog_file in resolver.catalog.catalog_files:
+            try:
+                catalogs[catalog_file] = file_sha256(catalog_file)
+            except OSError:
+                catalogs[catalog_file] = None
+        context["catalogs"] = catalogs
+    return hashlib.sha256(json.dumps(context, sort_keys=True).encode()).hexdigest()
+
+
+def enable_result_cache(context: str, max_entries: int = DEFAULT_CACHE_SIZE) -> None:
+    """Cache the results of XML sources in this process.
+
+    :param context: SHA-256 (hex) digest of the context; see context_digest()
+    :param max_entries: maximum number of cached results
+    """
+    # pylint: disable=global-statement
+    global _cache
+
+    _cache = ResultCache(context, max_entries)
+
+
+def cached_result(
+    xml_source: Union[TextIO, str, Any], by_name: bool = False
+) -> tuple[Optional[str], Any]:
+    """Return the cache key and the cached result of an XML source.
+
+    :param xml_source: XML source
+    :param by_name: key by the name of the XML source too; see ResultCache.key()
+
+    Return (None, None) when the result of the XML source is not cached
+    (disabled, or not a local file) and (key, None) for a cache miss.
+    """
+    if _cache is None or (key := _cache.key(xml_source, by_name)) is None:
+        return None, None
+    return key, _cache.get(key)
+
+
+def store_result(key: Optional[str], value: Any) -> None:
+    """Store the result (JSON value) of an XML source; see cached_result()."""
+    if _cache is not None and key is not None:
+        _cache.put(key, value)
+
+
+def close_result_cache() -> None:
+    """Remove the least recently used results and close the database (when enabled)."""
+    if _cache is not None:
+        _cache.evict()
+        _cache.close()
+
+
+class _MessageHandler(logging.Handler):
+    """Collect the (level, message) of the log records."""
+
+    def __init__(self, level: int = logging.INFO) -> None:
+        super().__init__(level)
+        self.messages: list[tuple[int, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append((record.levelno, record.getMessage()))
+
+
+@contextmanager
+def capture_messages(enabled: bool = True) -> Iterator[list[tuple[int, str]]]:
+    """Collect the log messages of the Xul loggers, e.g. of a validation.
+
+    :param enabled: collect the log messages; e.g. False when the result is not cached
+
+    Yield a list of (level, message) tuples; the messages are logged as usual.
+    """
+    if not enabled:
+        yield []
+        return
+    handler = _MessageHandler()
+    xul_logger = logging.getLogger("xul")
+    xul_logger.addHandler(handler)
+    try:
+        yield handler.messages
+    finally:
+        xul_logger.removeHandler(handler)
+
+
+def log_messages(messages: list[tuple[int, str]]) -> None:
+    """Log the messages of a cached result; see capture_messages().
+
+    :param messages: (level, message) tuples
+    """
+    for level, message in messages:
+        logger.log(level, "%s", message)
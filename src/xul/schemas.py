@@ -0,0 +1,246 @@
+"""XML Schema registry.
+
+Compiled XSD validators are cached in the process, keyed by the XSD file.
+The resolved schema document set (the XSD and all its xs:include, xs:import
+and xs:redefine documents) is recorded in a manifest on disk. Remote schema
+documents (http, https) are stored next to the manifest, so they are fetched
+once instead of on every run.
+
+A cached entry is invalidated when the modification time (and SHA-256 hash)
+of any of its schema documents changes. Remove the cache directory to fetch
+the remote schema documents again.
+
+Cache directory: $XUL_CACHE_DIR or $XDG_CACHE_HOME/xul (~/.cache/xul).
+
+lxml can not serialise a compiled XMLSchema; every process compiles the
+XSD (once) from the schema document set.
+
+Document loading and URL resolving:
+    https://lxml.de/resolvers.html
+"""
+
+import os
+from logging import getLogger
+from typing import Any, Optional, TextIO, Union
+from urllib.parse import urlparse
+
+from lxml import etree
+
+from .catalog import catalog_resolver
+from .utils import file_sha256, xul_cache_dir
+from .validate import build_xml_schema
+
+logger = getLogger(__name__)
+
+# Manifest of the resolved schema document sets (JSON).
+MANIFEST = "manifest.json"
+# Timeout (seconds) for fetching remote schema documents.
+FETCH_TIMEOUT = 30
+
+# In-process registry: XSD file -> (XMLSchema validator, schema documents).
+_registry: dict[str, tuple[etree.XMLSchema, dict[str, dict[str, Any]]]] = {}
+
+
+def schema_cache_dir() -> str:
+    """Return the directory of the on-disk schema cache."""
+    return os.path.join(xul_cache_dir(), "schemas")
+
+
+def _is_remote(url: str) -> bool:
+    """Return True for http and https URLs."""
+    return urlparse(url).scheme in ("http", "https")
+
+
+def _local_path(url: str) -> str:
+    """Return the absolute file name of a local URL (file name or file:// URL)."""
+    if urlparse(url).scheme == "file":
+        url = urlparse(url).path
+    return os.path.abspath(url)
+
+
+def _fingerprint(file_name: str) -> dict[str, Any]:
+    """Return the modification time, size and SHA-256 hash of a schema document."""
+    stat = os.stat(file_name)
+    return {"mtime": stat.st_mtime_ns, "size": stat.st_size, "sha256": file_sha256(file_name)}
+
+
+def _unchanged(file_name: str, fingerprint: dict[str, Any]) -> bool:
+    """Return True when a schema document still matches its fingerprint.
+
+    The SHA-256 hash is only computed when the modification time or size changed.
+    """
+    try:
+        stat = os.stat(file_name)
+        if stat.st_mtime_ns == fingerprint["mtime"] and stat.st_size == fingerprint["size"]:
+            return True
+        if stat.st_size == fingerprint["size"] and file_sha256(file_name) == fingerprint["sha256"]:
+            # Touched, not changed.
+            fingerprint["mtime"] = stat.st_mtime_ns
+            return True
+    except (OSError, KeyError):
+        pass
+    return False
+
+
+def _valid_documents(documents: dict[str, dict[str, Any]]) -> bool:
+    """Return True when none of the schema documents changed.
+
+    :param documents: schema documents (URL: fingerprint) of an XSD
+    """
+    cache_dir = schema_cache_dir()
+    for url, fingerprint in documents.items():
+        if _is_remote(url):
+            file_name = os.path.join(cache_dir, fingerprint.get("file", ""))
+        else:
+            file_name = url
+        if not _unchanged(file_name, fingerprint):
+            logger.debug("Schema document '%s' changed", url)
+            return False
+    return True
+
+
+def _read_manifest() -> dict[str, Any]:
+    """Return the manifest of the on-disk schema cache."""
+    # pylint: disable=import-outside-toplevel
+    import json
+
+    try:
+        with open(os.path.join(schema_cache_dir(), MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _write_manifest(manifest: dict[str, Any]) -> None:
+    """Write the manifest of the on-disk schema cache (atomic replace)."""
+    # pylint: disable=import-outside-toplevel
+    import json
+    import tempfile
+
+    cache_dir = schema_cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=cache_dir, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(f.name, os.path.join(cache_dir, MANIFEST))
+    except OSError as e:
+        logger.debug("Unable to write the schema cache manifest: %s", e)
+
+
+class SchemaResolver(etree.Resolver):
+    """Record the schema documents of an XSD; serve remote documents from the cache.
+
+    :param cached: remote schema documents (URL: fingerprint) in the on-disk cache
+    """
+
+    def __init__(self, cached: Optional[dict[str, dict[str, Any]]] = None) -> None:
+        super().__init__()
+        self.cached = cached or {}
+        # Resolved schema documents: URL -> fingerprint.
+        self.documents: dict[str, dict[str, Any]] = {}
+
+    def resolve(self, system_url, public_id, context):
+        """Resolve a schema document URL (xs:include, xs:import, xs:redefine)."""
+        if not system_url:
+            return None
+        # XML catalog (local files).
+        if (resolver := catalog_resolver()) and (
+            uri := resolver.catalog.lookup(system_url, public_id)
+        ):
+            if not _is_remote(uri) and os.path.isfile(file_name := _local_path(uri)):
+                self.documents[file_name] = _fingerprint(file_name)
+            return resolver.resolve(system_url, public_id, context)
+        if not _is_remote(system_url):
+            file_name = _local_path(system_url)
+            if os.path.isfile(file_name):
+                self.documents[file_name] = _fingerprint(file_name)
+            return None
+
+        # Remote schema document: on-disk cache.
+        cache_dir = schema_cache_dir()
+        fingerprint = self.cached.get(system_url)
+        if fingerprint and _unchanged(os.path.join(cache_dir, fingerprint["file"]), fingerprint):
+            self.documents[system_url] = fingerprint
+            return self.resolve_filename(os.path.join(cache_dir, fingerprint["file"]), context)
+        # pylint: disable=import-outside-toplevel
+        import hashlib
+        import urllib.request
+
+        try:
+            with urllib.request.urlopen(system_url, timeout=FETCH_TIMEOUT) as response:
+                content = response.read()
+        except (OSError, ValueError) as e:
+            logger.warning("Unable to fetch schema document '%s': %s", system_url, e)
+            return None
+        file_name = hashlib.sha256(system_url.encode()).hexdigest() + ".xsd"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(os.path.join(cache_dir, file_name), "wb") as f:
+                f.write(content)
+            self.documents[system_url] = _fingerprint(os.path.join(cache_dir, file_name))
+            self.documents[system_url]["file"] = file_name
+        except OSError as e:
+            logger.debug("Unable to store schema document '%s': %s", system_url, e)
+        return self.resolve_string(content, context, base_url=system_url)
+
+
+def get_xml_schema(xsd_file: Union[TextIO, str]) -> Optional[etree.XMLSchema]:
+    """Return the (cached) XMLSchema validator of an XSD file.
+
+    :param xsd_file: XSD (XML schema) file, file-like object or URL
+
+    The XMLSchema validator is compiled once per process, until one of its
+    schema documents changes. See build_xml_schema() for file-like objects.
+
+    Return None on error.
+    """
+    if not isinstance(xsd_file, str):
+        return build_xml_schema(xsd_file)
+    key = xsd_file if _is_remote(xsd_file) else _local_path(xsd_file)
+
+    # In-process registry.
+    if key in _registry:
+        validator, documents = _registry[key]
+        if _valid_documents(documents):
+            return validator
+        del _registry[key]
+
+    # On-disk manifest: cached remote schema documents.
+    manifest = _read_manifest()
+    entry = manifest.get(key)
+    cached = {}
+    if isinstance(entry, dict):
+        if not _valid_documents(entry):
+            logger.debug("Schema cache entry '%s' is invalidated", key)
+        # Remote schema documents do not depend on the local ones.
+        cached = {url: fp for url, fp in entry.items() if _is_remote(url) and "file" in fp}
+
+    resolver = SchemaResolver(cached)
+    parser = etree.XMLParser()
+    parser.resolvers.add(resolver)
+    xml_schema = build_xml_schema(xsd_file, parser=parser)
+    if xml_schema is None:
+        return None
+
+    _registry[key] = (xml_schema, resolver.documents)
+    if manifest.get(key) != resolver.documents:
+        manifest[key] = resolver.documents
+        _write_manifest(manifest)
+    return xml_schema
+
+
+def schema_documents(xsd_file: str) -> Optional[dict[str, str]]:
+    """Return the SHA-256 hashes (URL: hash) of the schema documents of an XSD or None.
+
+    :param xsd_file: XSD (XML schema) file or URL; compiled with get_xml_schema()
+
+    The schema documents are the XSD and all its xs:include, xs:import and
+    xs:redefine documents. Return None when the XSD is not in the registry.
+    """
+    key = xsd_file if _is_remote(xsd_file) else _local_path(xsd_file)
+    if key not in _registry:
+        return None
+    return {url: fingerprint["sha256"] for url, fingerprint in _registry[key][1].items()}
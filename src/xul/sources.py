@@ -0,0 +1,154 @@
+"""XML sources of the command line: arguments, directories (-R) and file lists (--files-from).
+
+The XML sources are generated lazily: the first XML source is processed
+while the directories are still walked (or the file list is still read),
+and memory use does not grow with the number of XML sources.
+
+Directories are walked with os.scandir, depth first, in name order (files first).
+Symbolic links to directories are not followed. File lists have a file
+name per line, or are NUL-separated (find -print0).
+
+os.scandir:
+    https://docs.python.org/3/library/os.html#os.scandir
+"""
+
+import os
+import sys
+from argparse import Namespace
+from collections.abc import Iterable, Iterator
+from fnmatch import fnmatch
+from logging import getLogger
+from typing import Any, Optional
+
+from .archive import expand_sources, multiple_sources
+
+logger = getLogger(__name__)
+
+# Default file name patterns of the XML files in directories (-R).
+DEFAULT_INCLUDE = ("*.xml",)
+# Bytes of a file list that are read at once.
+FILES_FROM_CHUNK = 64 * 1024
+
+
+def _matches(name: str, patterns: Iterable[str]) -> bool:
+    """Return True when a file name matches one of the patterns (fnmatch)."""
+    return any(fnmatch(name, pattern) for pattern in patterns)
+
+
+def walk_files(
+    directory: str,
+    include: Optional[list[str]] = None,
+    exclude: Optional[list[str]] = None,
+    skip_dirs: Iterable[str] = (),
+) -> Iterator[str]:
+    """Yield the files in a directory and its subdirectories.
+
+    :param directory: directory
+    :param include: file name patterns, e.g. *.xml [default: DEFAULT_INCLUDE]
+    :param exclude: file and directory name patterns that are skipped
+    :param skip_dirs: directories that are skipped, e.g. the output directory (transform -O)
+
+    Unreadable directories are logged and skipped.
+    """
+    include = include or list(DEFAULT_INCLUDE)
+    exclude = exclude or []
+    skip = {os.path.realpath(skip_dir) for skip_dir in skip_dirs}
+    # Directories to walk (depth first, in name order).
+    stack = [directory]
+    while stack:
+        path = stack.pop()
+        if skip and os.path.realpath(path) in skip:
+            continue
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.error(e)
+            continue
+        subdirs = []
+        for entry in entries:
+            if _matches(entry.name, exclude):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file() and _matches(entry.name, include):
+                    yield entry.path
+            except OSError as e:
+                logger.error(e)
+        stack.extend(reversed(subdirs))
+
+
+def files_from(file_list: str) -> Iterator[str]:
+    """Yield the file names of a file list.
+
+    :param file_list: file with a file name per line, or NUL-separated; - is standard input
+
+    The file list is NUL-separated when its first chunk has a NUL character.
+    Empty names are skipped.
+    """
+    # pylint: disable=consider-using-with
+    f: Any = sys.stdin.buffer if file_list == "-" else open(file_list, "rb")
+    try:
+        separator = None
+        rest = b""
+        # read1: the names that are available (pipe), not a full chunk.
+        while chunk := f.read1(FILES_FROM_CHUNK):
+            if separator is None:
+                separator = b"\0" if b"\0" in chunk else b"\n"
+            names = (rest + chunk).split(separator)
+            rest = names.pop()
+            for name in names:
+                if name := _file_name(name, separator):
+                    yield name
+        if name := _file_name(rest, separator):
+            yield name
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+
+
+def _file_name(name: bytes, separator: Optional[bytes]) -> str:
+    """Return the file name of a file list entry (empty when blank)."""
+    if separator != b"\0":
+        name = name.rstrip(b"\r\n")
+    return os.fsdecode(name)
+
+
+def command_line_sources(
+    args: Namespace, read: bool = False, skip_dirs: Iterable[str] = ()
+) -> Iterator[Any]:
+    """Yield the XML sources of the command line.
+
+    :param args: command-line arguments: xml_sources, directories (-R), include,
+        exclude and files_from (--files-from)
+    :param read: read the content of archive members; see archive.expand_sources()
+    :param skip_dirs: directories that are not walked; see walk_files()
+
+    The XML sources are the arguments, the files in the directories (see
+    walk_files()) and the files of the file list (see files_from());
+    archive sources are expanded.
+    """
+    yield from expand_sources(args.xml_sources, read=read)
+    for directory in args.directories or []:
+        if not os.path.isdir(directory):
+            logger.error("Not a directory: '%s'", directory)
+            continue
+        yield from expand_sources(
+            walk_files(directory, args.include, args.exclude, skip_dirs), read=read
+        )
+    if args.files_from:
+        try:
+            yield from expand_sources(files_from(args.files_from), read=read)
+        except OSError as e:
+            logger.error(e)
+
+
+def has_sources(args: Namespace) -> bool:
+    """Return True when the command line has XML sources (else: standard input)."""
+    return bool(args.xml_sources or args.directories or args.files_from)
+
+
+def has_multiple_sources(args: Namespace) -> bool:
+    """Return True when the command line has (or may have) more than one XML source."""
+    return bool(args.directories or args.files_from) or multiple_sources(args.xml_sources)
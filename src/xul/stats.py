@@ -0,0 +1,321 @@
+"""Run statistics (--stats).
+
+Time per phase for each XML source and for the run, bytes read, parse
+throughput (MB/s), number of elements (or records) and peak memory use
+(maximum resident set size).
+
+Phases: compile (XPath, XSD, XSLT), parse, namespaces, xpath, validate,
+transform and output. Phases are exclusive: a phase inside another phase,
+e.g. xpath for each record while parsing (--record), pauses the outer phase.
+
+Statistics are collected after enable_stats(); otherwise phase() and
+source_stats() do nothing.
+
+resource.getrusage (Unix):
+    https://docs.python.org/3/library/resource.html#resource.getrusage
+"""
+
+import os
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Any, Callable, Optional, TextIO, TypeVar, Union, cast
+
+from lxml import etree
+
+from .utils import get_source_name
+
+# Phases in report order.
+PHASES = ("compile", "parse", "namespaces", "xpath", "validate", "transform", "output")
+
+# Statistics of the process; see enable_stats().
+_stats: Optional["Stats"] = None
+# Context manager when the statistics are disabled.
+_NO_STATS = nullcontext()
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+class SourceStats:
+    """Statistics of an XML source (or of the run).
+
+    :param name: name of the XML source
+    :param size: size (bytes) of the XML source; None when unknown (pipe, URL)
+    """
+
+    def __init__(self, name: str, size: Optional[int] = None) -> None:
+        self.name = name
+        self.size = size
+        self.elements: Optional[int] = None
+        self.records: Optional[int] = None
+        # Phase: seconds.
+        self.phases: dict[str, float] = {}
+        self.seconds = 0.0
+
+    def add(self, other: "SourceStats") -> None:
+        """Add the statistics of another XML source (aggregate)."""
+        if other.size is not None:
+            self.size = (self.size or 0) + other.size
+        if other.elements is not None:
+            self.elements = (self.elements or 0) + other.elements
+        if other.records is not None:
+            self.records = (self.records or 0) + other.records
+        for name, seconds in other.phases.items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def parse_rate(self) -> Optional[float]:
+        """Return the parse throughput (MB/s) or None."""
+        parse = self.phases.get("parse")
+        if self.size is None or not parse:
+            return None
+        return self.size / 1e6 / parse
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics as a (JSON) dictionary."""
+        return {
+            "source": self.name,
+            "bytes": self.size,
+            "elements": self.elements,
+            "records": self.records,
+            "phases": {name: round(s, 6) for name, s in sorted_phases(self.phases)},
+            "parse_mb_s": None if (rate := self.parse_rate()) is None else round(rate, 3),
+            "seconds": round(self.seconds, 6),
+        }
+
+    def summary(self) -> str:
+        """Return the statistics as a line of text."""
+        counts = []
+        if self.size is not None:
+            counts.append(f"{self.size / 1e6:.2f} MB")
+        if self.elements is not None:
+            counts.append(f"{self.elements} elements")
+        if self.records is not None:
+            counts.append(f"{self.records} records")
+        phases = []
+        for name, seconds in sorted_phases(self.phases):
+            phases.append(f"{name} {seconds:.3f} s")
+            if name == "parse" and (rate := self.parse_rate()) is not None:
+                phases[-1] += f" ({rate:.1f} MB/s)"
+        return "; ".join(
+            part
+            for part in (", ".join(counts), ", ".join(phases), f"total {self.seconds:.3f} s")
+            if part
+        )
+
+
+def sorted_phases(phases: dict[str, float]) -> list[tuple[str, float]]:
+    """Return the phases in report order."""
+    return sorted(phases.items(), key=lambda p: PHASES.index(p[0]) if p[0] in PHASES else 99)
+
+
+class Stats:
+    """Statistics of a run.
+
+    :param command: name of the Xul script
+    :param json_output: report as JSON instead of text
+    """
+
+    def __init__(self, command: str, json_output: bool = False) -> None:
+        self.command = command
+        self.json_output = json_output
+        self.start = time.perf_counter()
+        # Phases outside the XML sources (compile).
+        self.run = SourceStats("")
+        self.sources: list[SourceStats] = []
+        self.current: Optional[SourceStats] = None
+        # XML sources processed by worker processes (--jobs).
+        self.workers = False
+        # Open phases: [name, start of the (resumed) phase].
+        self.open_phases: list[list[Any]] = []
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Add time to a phase of the current XML source (or the run)."""
+        target = self.current or self.run
+        target.phases[name] = target.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase; an outer phase is paused."""
+        now = time.perf_counter()
+        if self.open_phases:
+            outer = self.open_phases[-1]
+            self.add_time(outer[0], now - outer[1])
+        self.open_phases.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            _, start = self.open_phases.pop()
+            self.add_time(name, now - start)
+            if self.open_phases:
+                # Resume the outer phase.
+                self.open_phases[-1][1] = now
+
+    @contextmanager
+    def source(self, xml_source: Union[TextIO, str]) -> Iterator[SourceStats]:
+        """Collect the statistics of an XML source."""
+        size = None
+        if isinstance(xml_source, str) and os.path.isfile(xml_source):
+            size = os.path.getsize(xml_source)
+        elif isinstance(member_size := getattr(xml_source, "size", None), int):
+            # E.g. archive member (xul.archive.ArchiveMember).
+            size = member_size
+        source = SourceStats(get_source_name(xml_source), size)
+        previous, self.current = self.current, source
+        start = time.perf_counter()
+        try:
+            yield source
+        finally:
+            source.seconds = time.perf_counter() - start
+            self.current = previous
+            self.sources.append(source)
+
+    def total(self) -> SourceStats:
+        """Return the aggregate statistics of the run."""
+        count = len(self.sources)
+        total = SourceStats(f"{count} XML source{'' if count == 1 else 's'}")
+        total.add(self.run)
+        for source in self.sources:
+            total.add(source)
+        total.seconds = time.perf_counter() - self.start
+        return total
+
+    def report(self, stream: Optional[TextIO] = None) -> None:
+        """Write the statistics (default: standard error)."""
+        stream = stream or sys.stderr
+        total = self.total()
+        rss, children_rss = peak_rss()
+        if not self.workers:
+            # E.g. processes that ran before exec.
+            children_rss = None
+        if self.json_output:
+            # pylint: disable=import-outside-toplevel
+            import json
+
+            report = {
+                "command": self.command,
+                "sources": [source.as_dict() for source in self.sources],
+                "total": total.as_dict(),
+                "peak_rss_bytes": rss,
+                "peak_rss_children_bytes": children_rss,
+            }
+            stream.write(json.dumps(report) + "\n")
+            return
+        for source in self.sources:
+            stream.write(f"Stats {source.name}: {source.summary()}\n")
+        memory = ""
+        if rss is not None:
+            memory = f"; peak RSS {rss / 1e6:.1f} MB"
+            if children_rss:
+                memory += f" (worker processes {children_rss / 1e6:.1f} MB)"
+        stream.write(f"Stats {total.name}: {total.summary()}{memory}\n")
+
+
+def peak_rss() -> tuple[Optional[int], Optional[int]]:
+    """Return the peak resident set size (bytes) of the process and of its child processes.
+
+    Return (None, None) when unknown (Windows).
+    """
+    # pylint: disable=import-outside-toplevel
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # Kilobytes; bytes on macOS.
+    unit = 1 if sys.platform == "darwin" else 1024
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit,
+    )
+
+
+def enable_stats(command: str, json_output: bool = False) -> None:
+    """Collect run statistics in this process.
+
+    :param command: name of the Xul script
+    :param json_output: report as JSON instead of text
+    """
+    # pylint: disable=global-statement
+    global _stats
+
+    _stats = Stats(command, json_output)
+
+
+def stats_enabled() -> bool:
+    """Return True when run statistics are collected."""
+    return _stats is not None
+
+
+def phase(name: str) -> Any:
+    """Return a context manager that times a phase (when enabled).
+
+    :param name: phase; see PHASES
+    """
+    if _stats is None:
+        return _NO_STATS
+    return _stats.phase(name)
+
+
+def timed(name: str) -> Callable[[_F], _F]:
+    """Return a decorator that times a function as a phase (when enabled).
+
+    :param name: phase; see PHASES
+    """
+
+    def decorator(func: _F) -> _F:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _stats is None:
+                return func(*args, **kwargs)
+            with _stats.phase(name):
+                return func(*args, **kwargs)
+
+        return cast(_F, wrapper)
+
+    return decorator
+
+
+def source_stats(xml_source: Union[TextIO, str]) -> Any:
+    """Return a context manager that collects the statistics of an XML source (when enabled).
+
+    :param xml_source: XML file, file-like object or URL
+    """
+    if _stats is None:
+        return _NO_STATS
+    return _stats.source(xml_source)
+
+
+def count_elements(el_tree: Union[etree._ElementTree, etree._Element]) -> None:
+    """Add the elements of an ElementTree to the current XML source (when enabled)."""
+    if _stats is not None and _stats.current is not None:
+        elements = sum(1 for _ in el_tree.iter(etree.Element))
+        _stats.current.elements = (_stats.current.elements or 0) + elements
+
+
+def count_record() -> None:
+    """Add a record to the current XML source (when enabled)."""
+    if _stats is not None and _stats.current is not None:
+        _stats.current.records = (_stats.current.records or 0) + 1
+
+
+def take_sources() -> list[SourceStats]:
+    """Return and remove the statistics of the XML sources (worker process)."""
+    if _stats is None:
+        return []
+    sources, _stats.sources = _stats.sources, []
+    return sources
+
+
+def add_sources(sources: list[SourceStats]) -> None:
+    """Add the statistics of XML sources of a worker process."""
+    if _stats is not None:
+        _stats.workers = True
+        _stats.sources.extend(sources)
+
+
+def report_stats() -> None:
+    """Write the run statistics to standard error (when enabled)."""
+    if _stats is not None:
+        _stats.report()
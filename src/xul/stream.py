@@ -0,0 +1,446 @@
+"""Streaming XPath.
+
+Evaluate a subset of XPath while an XML source is parsed, without building
+the complete ElementTree. Elements that cannot be (part of) a result are
+cleared as soon as they are parsed, so memory use does not depend on the
+size of the XML source.
+
+The streamable subset of XPath (forward axes only):
+- location paths with child (/) and descendant (//) steps:
+  /root/item, //item, item/name (relative to the root element), //*
+- name tests: name, prefix:name, *, prefix:*
+- attribute predicates: [@id], [@id='1']
+- text predicate on the last step: [text()='value']
+- attribute or text nodes of the result elements: //item/@id, //item/text()
+- the number of results: count(//item)
+
+The namespace prefixes of the XPath expression must be declared on the root
+element; otherwise the XPath expression is evaluated on the complete
+ElementTree (see stream_xpath()), so the results do not depend on where the
+XML source declares its namespaces.
+
+Record-oriented XML sources (one root element wrapping many records) can
+also be processed one record element at a time; see stream_records().
+
+iterparse and XMLPullParser:
+    https://lxml.de/parsing.html#iterparse-and-iterwalk
+"""
+
+import re
+from logging import getLogger
+from typing import Any, Callable, NamedTuple, Optional, TextIO, Union
+
+from lxml import etree
+
+from .compressed import open_xml_source
+from .etree import log_syntax_error
+from .stats import count_record, timed
+from .utils import get_source_name
+from .xpath import add_namespace
+
+logger = getLogger(__name__)
+
+# XML name (NCName) and literal.
+_NCNAME = r"[^\W\d][\w.\-]*"
+_LITERAL = r"\"[^\"]*\"|'[^']*'"
+_NAME_TEST = re.compile(rf"\*|(?:({_NCNAME}):)?({_NCNAME}|\*)")
+_ATTR_PREDICATE = re.compile(rf"\[\s*@(?:({_NCNAME}):)?({_NCNAME})\s*(?:=\s*({_LITERAL})\s*)?\]")
+_TEXT_PREDICATE = re.compile(rf"\[\s*text\(\)\s*=\s*({_LITERAL})\s*\]")
+_ATTR_RESULT = re.compile(rf"@(?:({_NCNAME}):)?{_NCNAME}|@\*")
+_COUNT = re.compile(r"count\((.*)\)", re.DOTALL)
+
+
+class Step(NamedTuple):
+    """Location step of a streamable XPath expression."""
+
+    # Descendant (//) instead of child (/) axis.
+    descendant: bool
+    # Namespace prefix of the name test.
+    prefix: Optional[str]
+    # Local name of the name test; "*" for any name.
+    name: str
+    # Attribute predicates: (prefix, local name, value or None).
+    attributes: tuple[tuple[Optional[str], str, Optional[str]], ...] = ()
+    # Text predicate: [text()='value'].
+    text: Optional[str] = None
+
+
+class StreamPath(NamedTuple):
+    """Streamable XPath expression; see build_stream_path()."""
+
+    expression: str
+    steps: tuple[Step, ...]
+    # XPath for the attribute or text nodes of a result element (@id, text()).
+    nodes: Optional[str] = None
+    # Return the number of results: count().
+    count_only: bool = False
+
+
+def _literal(literal: str) -> str:
+    """Return the value of an XPath string literal."""
+    return literal[1:-1]
+
+
+def build_stream_path(xpath_exp: str) -> Optional[StreamPath]:
+    """Build a streamable XPath expression.
+
+    :param xpath_exp: XPath expression
+
+    Return None if the XPath expression is not in the streamable subset.
+    """
+    expression = xpath_exp.strip()
+    count = False
+    if match := _COUNT.fullmatch(expression):
+        expression = match.group(1).strip()
+        count = True
+
+    steps: list[Step] = []
+    nodes = None
+    if expression.startswith("/"):
+        pos = 0
+    else:
+        # Relative to the root element.
+        steps.append(Step(False, None, "*"))
+        expression = "/" + expression
+        pos = 0
+
+    while pos < len(expression):
+        # Child or descendant axis.
+        if expression.startswith("//", pos):
+            descendant = True
+            pos += 2
+        elif expression.startswith("/", pos):
+            descendant = False
+            pos += 1
+        else:
+            return None
+
+        # Attribute or text nodes of the result elements (last step).
+        if match := _ATTR_RESULT.match(expression, pos):
+            if descendant or match.end() != len(expression):
+                return None
+            nodes = match.group()
+            break
+        if expression.startswith("text()", pos):
+            if descendant or pos + 6 != len(expression):
+                return None
+            nodes = "text()"
+            break
+
+        # Name test.
+        if not (match := _NAME_TEST.match(expression, pos)):
+            return None
+        if match.group() == "*":
+            prefix, name = None, "*"
+        else:
+            prefix, name = match.group(1), match.group(2)
+        pos = match.end()
+
+        # Predicates.
+        attributes = []
+        text = None
+        while pos < len(expression) and expression[pos] == "[":
+            if match := _ATTR_PREDICATE.match(expression, pos):
+                value = _literal(match.group(3)) if match.group(3) else None
+                attributes.append((match.group(1), match.group(2), value))
+            elif (match := _TEXT_PREDICATE.match(expression, pos)) and text is None:
+                text = _literal(match.group(1))
+            else:
+                return None
+            pos = match.end()
+        steps.append(Step(descendant, prefix, name, tuple(attributes), text))
+
+    if not steps or any(step.text is not None for step in steps[:-1]):
+        # Text predicates are only streamable on the last step.
+        return None
+    return StreamPath(xpath_exp, tuple(steps), nodes, count)
+
+
+def _qname(prefix: Optional[str], name: str, ns_map: dict[str, str]) -> Optional[str]:
+    """Return the qualified name in Clark notation ({URI}name) or None."""
+    if prefix is None:
+        return name
+    if prefix == "xml":
+        return f"{{http://www.w3.org/XML/1998/namespace}}{name}"
+    if prefix not in ns_map:
+        return None
+    return f"{{{ns_map[prefix]}}}{name}"
+
+
+def _step_match(step: Step, elm: etree._Element, ns_map: dict[str, str]) -> bool:
+    """Match an element (start event) with the name test and attribute predicates."""
+    tag = elm.tag
+    if step.prefix is None:
+        # XPath 1.0: an unprefixed name test is not in a namespace.
+        if step.name != "*" and tag != step.name:
+            return False
+    else:
+        if step.prefix not in ns_map:
+            return False
+        if step.name == "*":
+            if not tag.startswith(f"{{{ns_map[step.prefix]}}}"):
+                return False
+        elif tag != f"{{{ns_map[step.prefix]}}}{step.name}":
+            return False
+    for prefix, name, value in step.attributes:
+        attr_name = _qname(prefix, name, ns_map)
+        if attr_name is None or attr_name not in elm.attrib:
+            return False
+        if value is not None and elm.attrib[attr_name] != value:
+            return False
+    return True
+
+
+def _text_match(text: str, elm: etree._Element) -> bool:
+    """Match an element (end event) with a text predicate: [text()='value']."""
+    if elm.text == text:
+        return True
+    return any(child.tail == text for child in elm)
+
+
+def _release(elm: etree._Element, kept: set[etree._Element]) -> None:
+    """Clear a parsed element and remove its preceding siblings that are not kept.
+
+    :param elm: parsed element (end event)
+    :param kept: result elements and their ancestors
+    """
+    if elm.getparent() is None:
+        return
+    elm.clear()
+    # Preceding siblings were released when they were parsed.
+    while (previous := elm.getprevious()) is not None and previous not in kept:
+        previous.getparent().remove(previous)  # type: ignore[union-attr]
+
+
+def _undefined_prefixes(stream_path: StreamPath, ns_map: dict[str, str]) -> list[str]:
+    """Return the namespace prefixes of the XPath expression that are not defined."""
+    prefixes = []
+    for step in stream_path.steps:
+        prefixes.append(step.prefix)
+        prefixes.extend(prefix for prefix, _, _ in step.attributes)
+    if stream_path.nodes and (match := _ATTR_RESULT.fullmatch(stream_path.nodes)):
+        # Attribute nodes of the result elements: @prefix:name.
+        prefixes.append(match.group(1))
+    return [p for p in prefixes if p is not None and p != "xml" and p not in ns_map]
+
+
+@timed("parse")
+def stream_xpath(
+    xml_source: Union[TextIO, str],
+    stream_path: StreamPath,
+    ns_map: Optional[dict[str, str]] = None,
+    none_prefix: str = "default",
+    remove_blank_text: bool = False,
+    huge_tree: bool = False,
+    first_hit: bool = False,
+) -> Optional[tuple[etree._ElementTree, dict[str, str], Any]]:
+    """Apply a streamable XPath expression to an XML source while parsing it.
+
+    :param xml_source: XML file or file-like object
+    :param stream_path: streamable XPath expression; see build_stream_path()
+    :param ns_map: XML namespace (prefix: URI) dictionary, e.g. EXSLT namespaces
+    :param none_prefix: prefix for the default namespace in XPath
+    :param remove_blank_text: discard blank text nodes (pretty printing)
+    :param huge_tree: disable the libxml2 security limits (very deep trees, huge text nodes)
+    :param first_hit: stop parsing at the first result, e.g. to test if there is a result
+
+    The XML namespaces of the XML source are added to ns_map while parsing
+    (first occurrence wins, as with xpath.namespaces()). With first_hit, the
+    rest of the XML source is not parsed (nor checked) after the first result.
+
+    A namespace prefix of the XPath expression that is not declared on the
+    root element may be declared after elements it matches, so the complete
+    ElementTree is built and the XPath expression is evaluated with all XML
+    namespaces of the XML source, as the (tree) XPath engine does.
+
+    Return a tuple with the ElementTree, the XML namespaces and the XPath result:
+    a list of result nodes or the number of results (count()).
+    Only the result elements and their ancestors remain in the ElementTree.
+    Return None on error.
+    """
+    ns_map = {} if ns_map is None else ns_map
+    file_name = get_source_name(xml_source)
+
+    steps = stream_path.steps
+    last = len(steps)
+    # Attribute or text nodes of a result element; compiled with the XML namespaces
+    # of the root element.
+    nodes_xpath: Optional[etree.XPath] = None
+    count = 0
+    # Result elements in document order (start event); None until the end event.
+    results: list[Optional[etree._Element]] = []
+    # Result elements and their ancestors; not released.
+    kept: set[etree._Element] = set()
+    # Stack with the step states and result index of the open elements; see _step_match().
+    stack: list[tuple[frozenset[int], Optional[int]]] = [(frozenset([0]), None)]
+    # Number of open result elements; their content is not released.
+    open_results = 0
+    root = None
+    # Evaluate the XPath expression on the complete ElementTree.
+    tree_mode = False
+
+    try:
+        with open_xml_source(xml_source) as source:
+            context = etree.iterparse(
+                source,
+                events=("start", "end", "start-ns"),
+                remove_blank_text=remove_blank_text,
+                huge_tree=huge_tree,
+            )
+            for event, item in context:
+                if event == "start-ns":
+                    add_namespace(ns_map, item[0], item[1], none_prefix=none_prefix)
+                    continue
+
+                if event == "start":
+                    if root is None:
+                        root = item
+                        if undefined := _undefined_prefixes(stream_path, ns_map):
+                            logger.debug(
+                                "Namespace prefix %s not declared on the root element: %s",
+                                undefined[0],
+                                stream_path.expression,
+                            )
+                            tree_mode = True
+                        elif stream_path.nodes:
+                            nodes_xpath = etree.XPath(stream_path.nodes, namespaces=ns_map)
+                    if tree_mode:
+                        continue
+                    states = set()
+                    for i in stack[-1][0]:
+                        if i == last:
+                            continue
+                        if steps[i].descendant:
+                            states.add(i)
+                        if _step_match(steps[i], item, ns_map):
+                            states.add(i + 1)
+                    index = None
+                    if last in states:
+                        index = len(results)
+                        if not stream_path.count_only:
+                            results.append(None)
+                        open_results += 1
+                    stack.append((frozenset(states), index))
+                    continue
+
+                # End event.
+                if tree_mode:
+                    continue
+                _, index = stack.pop()
+                if index is not None:
+                    open_results -= 1
+                    if steps[-1].text is None or _text_match(steps[-1].text, item):
+                        if stream_path.count_only:
+                            count += len(nodes_xpath(item)) if nodes_xpath else 1  # type: ignore[arg-type]
+                            if first_hit and count:
+                                break
+                        else:
+                            results[index] = item
+                            kept.add(item)
+                            if first_hit and (not nodes_xpath or nodes_xpath(item)):
+                                break
+                if item in kept:
+                    # Keep the ancestors of a result element.
+                    if (parent := item.getparent()) is not None:
+                        kept.add(parent)
+                elif not open_results:
+                    _release(item, kept)
+
+    except etree.XMLSyntaxError as e:
+        log_syntax_error(file_name, e.error_log, lenient=False)
+        return None
+    except OSError as e:
+        logger.error(e)
+        return None
+
+    if undefined := _undefined_prefixes(stream_path, ns_map):
+        logger.error("Undefined namespace prefix %s: %s", undefined[0], stream_path.expression)
+        return None
+    if root is None:
+        return None
+
+    el_tree = root.getroottree()
+    if tree_mode:
+        return el_tree, ns_map, etree.XPath(stream_path.expression, namespaces=ns_map)(el_tree)
+    if stream_path.count_only:
+        return el_tree, ns_map, float(count)
+    elements: list[Any] = [elm for elm in results if elm is not None]
+    if stream_path.nodes:
+        # Attribute or text nodes of the result elements in document order.
+        results_xpath = etree.XPath(f"$results/{stream_path.nodes}", namespaces=ns_map)
+        return el_tree, ns_map, results_xpath(root, results=elements)
+    return el_tree, ns_map, elements
+
+
+def record_tag(tag: str) -> str:
+    """Return the iterparse tag of record elements.
+
+    :param tag: local name (in any namespace) or qualified name ({URI}name)
+    """
+    if tag.startswith("{"):
+        return tag
+    return f"{{*}}{tag}"
+
+
+@timed("parse")
+def stream_records(
+    xml_source: Union[TextIO, str],
+    tag: str,
+    record_fn: Callable[[etree._Element], bool],
+    ns_map: Optional[dict[str, str]] = None,
+    none_prefix: str = "default",
+    remove_blank_text: bool = False,
+    lenient: bool = False,
+    silent: bool = False,
+    huge_tree: bool = False,
+) -> Optional[etree._ElementTree]:
+    """Parse an XML source and call a function for each (complete) record element.
+
+    :param xml_source: XML file or file-like object
+    :param tag: record element name; see record_tag()
+    :param record_fn: function called with each record element; return False to stop
+    :param ns_map: XML namespace (prefix: URI) dictionary, e.g. EXSLT namespaces
+    :param none_prefix: prefix for the default namespace in XPath
+    :param remove_blank_text: discard blank text nodes (pretty printing)
+    :param lenient: log XMLSyntaxError as warnings instead of errors
+    :param silent: disable logging of XML syntax errors
+    :param huge_tree: disable the libxml2 security limits (very deep trees, huge text nodes)
+
+    The XML namespaces of the XML source are added to ns_map while parsing.
+    A record element is cleared, and its preceding siblings are removed,
+    after record_fn returns. Memory use depends on the size of a record,
+    not on the size of the XML source.
+
+    Return the (cleared) ElementTree on success.
+    Return None on error.
+    """
+    ns_map = {} if ns_map is None else ns_map
+    try:
+        with open_xml_source(xml_source) as source:
+            context = etree.iterparse(
+                source,
+                events=("start-ns", "end"),
+                tag=record_tag(tag),
+                remove_blank_text=remove_blank_text,
+                huge_tree=huge_tree,
+            )
+            for event, item in context:
+                if event == "start-ns":
+                    add_namespace(ns_map, item[0], item[1], none_prefix=none_prefix)
+                    continue
+                count_record()
+                if not record_fn(item):
+                    # Stop parsing.
+                    return item.getroottree()
+                item.clear()
+                while item.getprevious() is not None:
+                    del item.getparent()[0]
+            return context.root.getroottree()
+
+    except etree.XMLSyntaxError as e:
+        if not silent:
+            log_syntax_error(get_source_name(xml_source), e.error_log, lenient=lenient)
+        return None
+    except OSError as e:
+        logger.error(e)
+        return None
@@ -2,13 +2,21 @@
 
 import io
 import logging
-from typing import TextIO, Union
+import os
+import sys
+from typing import Optional, TextIO, Union
 
+# Characters of text in an OutputBuffer before it is written.
+OUTPUT_BUFFER_SIZE = 64 * 1024
+# Bytes of a file that are hashed at once; see file_sha256().
+HASH_CHUNK_SIZE = 1024 * 1024
 
-def config_logger(log_level: int = logging.INFO) -> None:
+
+def config_logger(log_level: int = logging.INFO, stream: Optional[TextIO] = None) -> None:
     """Configure the root logger and add console handler.
 
     log_level -- console log level [default 'info']
+    stream -- console stream [default sys.stderr]
 
     Console logging (sys.stderr) for the command line scripts.
     """
@@ -16,13 +24,38 @@ def config_logger(log_level: int = logging.INFO) -> None:
     logging.getLogger("").setLevel(logging.DEBUG)
 
     # Configure console handler (StreamHandler).
-    console_handler = logging.StreamHandler()
+    console_handler = logging.StreamHandler(stream)
     console_handler.setLevel(log_level)
 
     # Attach the console handler to the root logger.
     logging.getLogger("").addHandler(console_handler)
 
 
+def xul_cache_dir() -> str:
+    """Return the Xul cache directory: $XUL_CACHE_DIR or $XDG_CACHE_HOME/xul (~/.cache/xul)."""
+    if cache_dir := os.environ.get("XUL_CACHE_DIR"):
+        return cache_dir
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "xul")
+
+
+def file_sha256(file_name: str) -> str:
+    """Return the SHA-256 (hex) digest of the content of a file.
+
+    :param file_name: file name
+
+    The file is read in chunks; hashlib is imported on first use.
+    """
+    # pylint: disable=import-outside-toplevel
+    import hashlib
+
+    sha256 = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
 def get_source_name(xml_source: Union[TextIO, str]) -> str:
     """Return the name of XML source."""
     if isinstance(xml_source, str):
@@ -34,3 +67,58 @@ def get_source_name(xml_source: Union[TextIO, str]) -> str:
         return "StringIO"
     # ?
     return str(xml_source)
+
+
+class OutputBuffer:
+    """Buffered (bulk) writer for standard output.
+
+    :param size: characters of text that are collected before writing
+
+    Lines are collected and written at once to sys.stdout.buffer as bytes,
+    encoded like sys.stdout (encoding and errors), instead of a print() per
+    line. The output is the same as print(). Text written with print() in
+    between must be preceded by flush().
+    """
+
+    def __init__(self, size: int = OUTPUT_BUFFER_SIZE) -> None:
+        self.size = size
+        self.parts: list[str] = []
+        self.length = 0
+
+    def write(self, text: str) -> None:
+        """Write text (file-like object, e.g. for csv.writer)."""
+        self.parts.append(text)
+        self.length += len(text)
+        if self.length >= self.size:
+            self.flush()
+
+    def line(self, text: str) -> None:
+        """Write a line of text (like print)."""
+        self.parts.append(text)
+        self.parts.append("\n")
+        self.length += len(text) + 1
+        if self.length >= self.size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the collected text to standard output.
+
+        BrokenPipeError is raised by the write (closed pipe).
+        """
+        if not self.parts:
+            return
+        text = "".join(self.parts)
+        self.parts.clear()
+        self.length = 0
+        stdout = sys.stdout
+        buffer = getattr(stdout, "buffer", None)
+        if buffer is None or os.linesep != "\n":
+            # Text stream (e.g. StringIO) or newline translation (Windows).
+            stdout.write(text)
+            return
+        # Text written before this buffer comes first.
+        stdout.flush()
+        buffer.write(text.encode(stdout.encoding or "utf-8", stdout.errors or "strict"))
+        if getattr(stdout, "line_buffering", False):
+            # Terminal.
+            buffer.flush()
@@ -4,22 +4,46 @@ Validation with lxml:
     https://lxml.de/validation.html
 """
 
+import copy
+import os
+import re
 import sys
+from collections.abc import Iterable
+from contextlib import nullcontext
 from logging import getLogger
-from typing import Optional, TextIO, Union
+from typing import Any, Callable, NamedTuple, Optional, TextIO, Union
+from urllib.parse import urljoin, urlparse
 
 from lxml import etree
 
 # pylint: disable=no-member
-from .etree import build_etree
+from .catalog import add_catalog_resolver, catalog_resolver
+from .compressed import open_xml_source
+from .etree import build_etree, log_syntax_error
+from .stats import phase
+from .stream import stream_records
+from .utils import file_sha256, get_source_name
 
 logger = getLogger(__name__)
 
+# RELAX NG namespace.
+RNG_NS = "http://relaxng.org/ns/structure/1.0"
+# External parameter entity declaration of a DTD: public identifier and system literal.
+DTD_PARAMETER_ENTITY = re.compile(
+    r"""<!ENTITY\s+%\s+\S+\s+(?:SYSTEM|PUBLIC\s+(?:"([^"]*)"|'([^']*)'))"""
+    r"""\s+(?:"([^"]*)"|'([^']*)')"""
+)
+# Bytes per read of an XML source that is validated while it is parsed; see stream_validate().
+STREAM_READ_SIZE = 256 * 1024
 
-def build_xml_schema(xsd_file: Union[TextIO, str]) -> Optional[etree.XMLSchema]:
+
+def build_xml_schema(
+    xsd_file: Union[TextIO, str], parser: Optional[etree.XMLParser] = None
+) -> Optional[etree.XMLSchema]:
     """Parse an XSD file into an XMLSchema validator.
 
     :param xsd_file: XSD (XML schema) file, file-like object or URL
+    :param parser: (optional) XML parser, e.g. with resolvers for the schema documents
 
     Return XMLSchema validator (lxml.etree.XMLSchema) on success.
     Return None on error.
@@ -28,7 +52,7 @@ def build_xml_schema(xsd_file: Union[TextIO, str]) -> Optional[etree.XMLSchema]:
         https://lxml.de/validation.html#xmlschema
         https://lxml.de/apidoc/lxml.etree.html#lxml.etree.XMLSchema
     """
-    xsd_etree = build_etree(xsd_file, lenient=False)
+    xsd_etree = build_etree(xsd_file, parser=parser, lenient=False)
     if not xsd_etree:
         return None
 
@@ -62,6 +86,8 @@ def build_dtd(dtd_file: Union[TextIO, str]) -> Optional[etree.DTD]:
         https://lxml.de/validation.html#dtd-1
         https://lxml.de/apidoc/lxml.etree.html#lxml.etree.DTD
     """
+    if isinstance(dtd_file, str) and catalog_resolver():
+        return catalog_dtd(dtd_file)
     try:
         return etree.DTD(file=dtd_file)
 
@@ -82,10 +108,107 @@ def build_dtd(dtd_file: Union[TextIO, str]) -> Optional[etree.DTD]:
         return None
 
 
-def build_relaxng(relaxng_file: Union[TextIO, str]) -> Optional[etree.RelaxNG]:
+def _rng_element_name(element: etree._Element) -> Optional[tuple[str, str]]:
+    """Return the (namespace URI, local name) of a RELAX NG element pattern.
+
+    Return None for element patterns with a name class (<name>, <anyName>, ...).
+    """
+    name = element.get("name")
+    if name is None:
+        return None
+    if ":" in name:
+        prefix, local_name = name.split(":", 1)
+        return element.nsmap.get(prefix, ""), local_name
+    for elm in element.iterancestors():
+        if (ns := elm.get("ns")) is not None:
+            return ns, name
+    return "", name
+
+
+def relaxng_record_start(relaxng_tree: etree._ElementTree, record: str) -> bool:
+    """Replace the start pattern of a RELAX NG schema with a record element pattern.
+
+    :param relaxng_tree: RELAX NG (XML syntax) ElementTree
+    :param record: record element name: local name or qualified name ({URI}name)
+
+    The element patterns for the record element (in the root grammar) are
+    copied to the start pattern, so the schema validates record elements.
+
+    Return False when the schema has no element pattern for the record element.
+    """
+    root = relaxng_tree.getroot()
+    if record.startswith("{"):
+        uri: Optional[str]
+        uri, local_name = record[1:].split("}", 1)
+    else:
+        uri, local_name = None, record
+
+    patterns = []
+    for element in root.iter(f"{{{RNG_NS}}}element"):
+        grammar = next(element.iterancestors(f"{{{RNG_NS}}}grammar"), root)
+        if grammar is not root or not (name := _rng_element_name(element)):
+            continue
+        if name[1] != local_name or (uri is not None and name[0] != uri):
+            continue
+        pattern = copy.deepcopy(element)
+        # Inherited attributes of the element pattern.
+        for attribute in ("ns", "datatypeLibrary"):
+            if pattern.get(attribute) is not None:
+                continue
+            for elm in element.iterancestors():
+                if (value := elm.get(attribute)) is not None:
+                    pattern.set(attribute, value)
+                    break
+        patterns.append(pattern)
+    if not patterns:
+        return False
+
+    if root.tag != f"{{{RNG_NS}}}grammar":
+        # Element pattern as the root: use a grammar instead.
+        root.clear()
+        root.tag = f"{{{RNG_NS}}}grammar"
+    if (start := root.find(f"{{{RNG_NS}}}start")) is None:
+        start = etree.SubElement(root, f"{{{RNG_NS}}}start")
+    start.clear()
+    if len(patterns) == 1:
+        start.append(patterns[0])
+    else:
+        etree.SubElement(start, f"{{{RNG_NS}}}choice").extend(patterns)
+    return True
+
+
+def catalog_dtd(dtd_file: str) -> Optional[etree.DTD]:
+    """Load a DTD file, and its external parameter entities, with the XML catalog.
+
+    :param dtd_file: DTD file or URL
+
+    The DTD is loaded as the external subset of a (wrapper) XML document,
+    so the XML catalog resolver of the XML parser is used.
+
+    Return DTD validator (lxml.etree.DTD) on success.
+    Return None on error.
+    """
+    if "://" not in dtd_file:
+        dtd_file = os.path.abspath(dtd_file)
+    system_literal = dtd_file.replace('"', "%22")
+    parser = add_catalog_resolver(etree.XMLParser(load_dtd=True, resolve_entities=True))
+    try:
+        doc = etree.fromstring(f'<!DOCTYPE dtd SYSTEM "{system_literal}"><dtd/>', parser)
+    except etree.XMLSyntaxError as inst:
+        log_syntax_error(dtd_file, inst.error_log, lenient=False)
+        return None
+    if (dtd := doc.getroottree().docinfo.externalDTD) is None:
+        logger.error("Unable to load DTD file '%s'", dtd_file)
+    return dtd
+
+
+def build_relaxng(
+    relaxng_file: Union[TextIO, str], record: Optional[str] = None
+) -> Optional[etree.RelaxNG]:
     """Parse a RELAX NG file into a RELAX NG validator.
 
     :param relaxng_file: RELAX NG file, file-like object or URL
+    :param record: (optional) validate record elements; see relaxng_record_start()
 
     Return RelaxNG validator (lxml.etree.RelaxNG) on success.
     Return None on error.
@@ -97,6 +220,9 @@ def build_relaxng(relaxng_file: Union[TextIO, str]) -> Optional[etree.RelaxNG]:
     relaxng_etree = build_etree(relaxng_file, lenient=False)
     if not relaxng_etree:
         return None
+    if record and not relaxng_record_start(relaxng_etree, record):
+        logger.error("RELAX NG file '%s' has no element pattern for '%s'", relaxng_file, record)
+        return None
 
     try:
         return etree.RelaxNG(relaxng_etree)
@@ -120,16 +246,18 @@ def xml_validator(
     xml_source: Union[TextIO, str],
     validator: Union[etree.XMLSchema, etree.DTD, etree.RelaxNG],
     lenient: bool = True,
+    huge_tree: bool = False,
 ) -> tuple[bool, str]:
     """Validate an XML source against an XSD, DTD or RELAX NG validator.
 
     :param xml_source: XML file, file-like object or URL
     :param validator: XMLSchema, DTD or RELAX NG validator
     :param lenient: log XML (validation) errors as warnings instead of errors
+    :param huge_tree: disable the libxml2 security limits (very deep trees, huge text nodes)
 
     Return a tuple with the validation result (True/False) and the status string.
     """
-    el_tree = build_etree(xml_source, lenient=lenient)
+    el_tree = build_etree(xml_source, lenient=lenient, huge_tree=huge_tree)
     if not el_tree:
         return (False, "Not an XML source")
 
@@ -139,7 +267,9 @@ def xml_validator(
     else:
         source_name = xml_source
 
-    if validator.validate(el_tree):
+    with phase("validate"):
+        valid = validator.validate(el_tree)
+    if valid:
         logger.info("XML source '%s' validates", source_name)
         return (True, "XML source validates")
 
@@ -160,11 +290,203 @@ def xml_validator(
     return (False, f"line {e.line}, column {e.column}: {e.message}")
 
 
+def _first_xsd_error(error_log: etree._ListErrorLog) -> Optional[etree._LogEntry]:
+    """Return the first XSD validation error of an error log or None."""
+    for e in error_log:
+        if e.domain == etree.ErrorDomains.SCHEMASV and e.level >= etree.ErrorLevels.ERROR:
+            return e
+    return None
+
+
+class StreamError(NamedTuple):
+    """XSD validation error of an XML source that is validated while it is parsed.
+
+    libxml2 reports these errors without line number: the error was found
+    while parsing lines first_line to last_line; the same line when the
+    line of the error is known.
+    """
+
+    first_line: int
+    last_line: int
+    message: str
+
+
+class _FirstErrorSource:
+    """XML source for iterparse that ends at the first XSD validation error.
+
+    :param name: name of the XML source; the base URL of the parser
+    :param fileobj: binary file object
+    :param line_offset: (optional) read line by line from this byte offset
+
+    The error log of the iterparse context (context) is checked before each
+    read: libxml2 validates the XML source while it is parsed, so the error
+    was found in the last bytes read (offset, lines). With line_offset, the
+    error line is the source line of the last element (sourceline) of the
+    iterparse events of the last line read; see _error_line().
+    """
+
+    def __init__(self, name: str, fileobj: Any, line_offset: Optional[int] = None) -> None:
+        self.name = name
+        self.fileobj = fileobj
+        self.line_offset = line_offset
+        # Bytes read from fileobj that are not returned yet (line by line).
+        self.buffer = b""
+        self.context: Any = None
+        self.error: Optional[etree._LogEntry] = None
+        # Bytes and newlines read; byte offset, first and last line of the last read.
+        self.size = 0
+        self.newlines = 0
+        self.offset = 0
+        self.lines = (1, 1)
+        # Source line of the last element (iterparse event) since the last read.
+        self.sourceline: Optional[int] = None
+        self.error_line: Optional[int] = None
+
+    def read(self, size: int = -1) -> bytes:
+        """Return bytes of the XML source; none after a validation error.
+
+        At most STREAM_READ_SIZE bytes (or a line), whatever the size asked by lxml.
+        """
+        if self.context is not None and len(self.context.error_log):
+            if (error := _first_xsd_error(self.context.error_log)) is not None:
+                self.error = error
+                self.error_line = self.sourceline or self.lines[0]
+                return b""
+        if self.line_offset is None:
+            data = self.fileobj.read(STREAM_READ_SIZE)
+        elif self.size < self.line_offset:
+            data = self.fileobj.read(min(STREAM_READ_SIZE, self.line_offset - self.size))
+        else:
+            # The next line (file objects of compressed sources have no readline method).
+            if not self.buffer:
+                self.buffer = self.fileobj.read(STREAM_READ_SIZE)
+            end = self.buffer.find(b"\n") + 1 or len(self.buffer)
+            data, self.buffer = self.buffer[:end], self.buffer[end:]
+        if data:
+            first_line = self.newlines + 1
+            self.offset = self.size
+            self.size += len(data)
+            self.newlines += data.count(b"\n")
+            self.lines = (first_line, self.newlines + (not data.endswith(b"\n")))
+        self.sourceline = None
+        return data
+
+
+def _error_line(
+    xml_file: str, validator: etree.XMLSchema, offset: int, huge_tree: bool = False
+) -> Optional[int]:
+    """Return the line of the first XSD validation error of an XML file or None.
+
+    :param xml_file: XML file (may be compressed)
+    :param validator: XMLSchema validator
+    :param offset: byte offset of the read in which the error was found; see stream_validate()
+    :param huge_tree: disable the libxml2 security limits (very deep trees, huge text nodes)
+
+    The XML file is validated while it is parsed again, line by line from
+    offset, with iterparse events: the line of the error is the source line
+    of the element that was parsed when it was found, as for the validation
+    of an ElementTree.
+    """
+    try:
+        with open_xml_source(xml_file) as source:
+            # pylint: disable-next=consider-using-with
+            with open(source, "rb") if isinstance(source, str) else nullcontext(source) as fileobj:
+                error_source = _FirstErrorSource(xml_file, fileobj, line_offset=offset)
+                context = etree.iterparse(
+                    error_source, events=("start", "end"), schema=validator, huge_tree=huge_tree
+                )
+                error_source.context = add_catalog_resolver(context)  # type: ignore[arg-type]
+                for event, elm in context:
+                    error_source.sourceline = elm.sourceline
+                    if event == "end" and elm.getparent() is not None:
+                        elm.clear()
+                        while elm.getprevious() is not None:
+                            del elm.getparent()[0]  # type: ignore[union-attr]
+    except etree.XMLSyntaxError:
+        # Stopped at the error.
+        pass
+    except (OSError, UnicodeDecodeError):
+        return None
+    return error_source.error_line if error_source.error is not None else None
+
+
+def stream_validate(
+    xml_source: Union[TextIO, str],
+    validator: etree.XMLSchema,
+    lenient: bool = True,
+    silent: bool = False,
+    huge_tree: bool = False,
+) -> Optional[list[StreamError]]:
+    """Validate an XML source against an XSD validator while parsing it; stop at the first error.
+
+    :param xml_source: XML file or file-like object
+    :param validator: XMLSchema validator
+    :param lenient: log XMLSyntaxError as warnings instead of errors
+    :param silent: disable logging of XML syntax errors
+    :param huge_tree: disable the libxml2 security limits (very deep trees, huge text nodes)
+
+    The rest of the XML source is not parsed after the first validation error.
+    libxml2 reports these errors without line number (line 0). The line of
+    the error in an XML file is found by parsing it again up to the error;
+    see _error_line(). For a file-like object, the error has the lines that
+    were parsed when it was found; see StreamError.
+
+    Return the validation errors: empty when `xml_source' validates, else the first error.
+    Return None on XML syntax errors.
+    """
+    file_name = get_source_name(xml_source)
+    try:
+        with phase("validate"), open_xml_source(xml_source) as source:
+            # Local file (not compressed): the bytes are read here, not by libxml2.
+            # pylint: disable-next=consider-using-with
+            with open(source, "rb") if isinstance(source, str) else nullcontext(source) as fileobj:
+                first_error = _FirstErrorSource(getattr(source, "name", file_name), fileobj)
+                context = etree.iterparse(
+                    first_error,
+                    events=("end",),
+                    # No events: the elements are not visited.
+                    tag="{urn:xul:none}none",
+                    schema=validator,
+                    huge_tree=huge_tree,
+                )
+                first_error.context = add_catalog_resolver(context)  # type: ignore[arg-type]
+                for _ in context:
+                    pass
+    except etree.XMLSyntaxError as e:
+        # Stopped, or a validation error at the end of the XML source.
+        if error := first_error.error or _first_xsd_error(e.error_log):
+            first_line, last_line = first_error.lines
+            if isinstance(xml_source, str) and (
+                line := _error_line(xml_source, validator, first_error.offset, huge_tree)
+            ):
+                first_line = last_line = line
+            return [StreamError(first_line, last_line, error.message)]
+        if silent:
+            return None
+        if e.error_log:
+            log_syntax_error(file_name, e.error_log, lenient=lenient)
+        elif isinstance(xml_source, str):
+            # lxml drops the syntax errors of iterparse with a schema: parse again.
+            build_etree(xml_source, lenient=lenient, huge_tree=huge_tree)
+        else:
+            logger.error("%s is not a valid XML source: %s", file_name, e)
+        return None
+    except UnicodeDecodeError as e:
+        logger.error("%s: %s", file_name, e)
+        return None
+    except OSError as e:
+        logger.error(e)
+        return None
+    return []
+
+
 def validate_xml(
     xml_source: Union[TextIO, str],
     validator: Union[etree.XMLSchema, etree.DTD, etree.RelaxNG],
     lenient: bool = True,
     silent: bool = False,
+    huge_tree: bool = False,
+    first_error: bool = False,
 ):
     """Validate an XML source against an XSD, DTD or RELAX NG validator.
 
@@ -172,20 +494,43 @@ def validate_xml(
     :param validator: XMLSchema, DTD or RELAX NG validator
     :param lenient: log XML (validation) errors as warnings instead of errors
     :param silent: disable logging
+    :param huge_tree: disable the libxml2 security limits (very deep trees, huge text nodes)
+    :param first_error: stop at the first validation error; see stream_validate()
+
+    XSD with first_error: local files and file-like objects are validated
+    while they are parsed. Otherwise the ElementTree is validated, and only
+    the first validation error is logged with first_error.
 
     Return True when `xml_source' validates.
     """
-    el_tree = build_etree(xml_source, lenient=lenient, silent=silent)
-    if not el_tree:
-        return False
-
     if xml_source in ("-", sys.stdin):
         # <stdin>.
         source_name = sys.stdin.name
     else:
         source_name = xml_source
 
-    if validator.validate(el_tree):
+    if (
+        first_error
+        and isinstance(validator, etree.XMLSchema)
+        and not (isinstance(xml_source, str) and not os.path.isfile(xml_source))
+    ):
+        stream_errors = stream_validate(
+            xml_source, validator, lenient=lenient, silent=silent, huge_tree=huge_tree
+        )
+        if stream_errors is None:
+            return False
+        valid = not stream_errors
+        errors: Iterable[Union[etree._LogEntry, StreamError]] = stream_errors
+    else:
+        el_tree = build_etree(xml_source, lenient=lenient, silent=silent, huge_tree=huge_tree)
+        if not el_tree:
+            return False
+        with phase("validate"):
+            valid = validator.validate(el_tree)
+        errors = validator.error_log  # type: ignore[union-attr,assignment]
+        if first_error and not valid:
+            errors = [validator.error_log[0]]  # type: ignore[index]
+    if valid:
         if not silent:
             logger.info("XML source '%s' validates", source_name)
         return True
@@ -200,10 +545,161 @@ def validate_xml(
         val_logger = logger.error
     val_logger("XML source '%s' does not validate", source_name)
     # Lines with XML validation errors (lxml.etree._ListErrorLog).
-    for e in validator.error_log:  # type: ignore[union-attr]
+    for e in errors:
         # E.g. DTD e.level_name: "ERROR", e.domain_name: "VALID",
         # e.type_name: "DTD_UNKNOWN_ELEM".
         # E.g. XSD e.level_name: "ERROR", e.domain_name: "SCHEMASV",
         # e.type_name: "SCHEMAV_CVC_ELT_1".
-        val_logger("line %i, column %i: %s", e.line, e.column, e.message)
+        if isinstance(e, StreamError):
+            # Validated while parsing; see stream_validate().
+            if e.first_line == e.last_line:
+                val_logger("line %i: %s", e.first_line, e.message)
+            else:
+                val_logger("lines %i-%i: %s", e.first_line, e.last_line, e.message)
+        else:
+            val_logger("line %i, column %i: %s", e.line, e.column, e.message)
     return False
+
+
+def validate_records(
+    xml_source: Union[TextIO, str],
+    validator: Union[etree.XMLSchema, etree.DTD, etree.RelaxNG],
+    record: str,
+    lenient: bool = True,
+    silent: bool = False,
+    huge_tree: bool = False,
+    first_error: bool = False,
+) -> bool:
+    """Validate the record elements of an XML source one at a time.
+
+    :param xml_source: XML file or file-like object
+    :param validator: XMLSchema, DTD or RELAX NG validator for a record element
+    :param record: record element name: local name or qualified name ({URI}name)
+    :param lenient: log XML (validation) errors as warnings instead of errors
+    :param silent: disable logging; stop at the first invalid record
+    :param huge_tree: disable the libxml2 security limits (very deep trees, huge text nodes)
+    :param first_error: stop at the first invalid record; only its first error is logged
+
+    Each record element is validated, and discarded, as soon as it is parsed,
+    so memory use depends on the size of a record, not on the size of the
+    XML source. Line numbers of validation errors refer to the XML source.
+    The XML outside the record elements is not validated.
+    XSD: the record element must be a global element declaration.
+
+    Return True when all record elements of `xml_source' validate.
+    """
+    source_name = get_source_name(xml_source)
+    if lenient:
+        val_logger = logger.warning
+    else:
+        val_logger = logger.error
+    # Number of records and invalid records.
+    records = [0, 0]
+
+    def validate_record(element: etree._Element) -> bool:
+        """Validate a record element; return False to stop."""
+        records[0] += 1
+        with phase("validate"):
+            if validator.validate(element):
+                return True
+        records[1] += 1
+        if silent:
+            return False
+        if records[1] == 1:
+            val_logger("XML source '%s' does not validate", source_name)
+        # Lines with XML validation errors (lxml.etree._ListErrorLog).
+        for e in validator.error_log:  # type: ignore[union-attr]
+            val_logger("line %i, column %i: %s", e.line, e.column, e.message)
+            if first_error:
+                return False
+        return True
+
+    if not stream_records(
+        xml_source, record, validate_record, lenient=lenient, silent=silent, huge_tree=huge_tree
+    ):
+        return False
+    if records[1]:
+        if not (silent or first_error):
+            val_logger("%i of %i records do not validate", records[1], records[0])
+        return False
+    if not records[0]:
+        if not silent:
+            val_logger("XML source '%s' has no '%s' records", source_name, record)
+        return False
+    if not silent:
+        logger.info("XML source '%s' validates (%i records)", source_name, records[0])
+    return True
+
+
+def _dtd_references(dtd_file: str) -> Iterable[tuple[str, Optional[str]]]:
+    """Yield the (system literal, public identifier) of the external parameter entities of a DTD."""
+    with open(dtd_file, "rb") as f:
+        dtd = f.read().decode("utf-8", errors="replace")
+    for match in DTD_PARAMETER_ENTITY.finditer(dtd):
+        public_id = match.group(1) or match.group(2)
+        yield match.group(3) or match.group(4) or "", public_id
+
+
+def _relaxng_references(relaxng_file: str) -> Iterable[tuple[str, Optional[str]]]:
+    """Yield the (href, None) of the include and externalRef patterns of a RELAX NG file."""
+    relaxng_tree = etree.parse(relaxng_file)
+    for element in relaxng_tree.iter(f"{{{RNG_NS}}}include", f"{{{RNG_NS}}}externalRef"):
+        if href := element.get("href"):
+            yield urljoin(element.base or relaxng_file, href), None
+
+
+def _schema_documents(
+    schema_file: str, references: Callable[[str], Iterable[tuple[str, Optional[str]]]]
+) -> Optional[dict[str, str]]:
+    """Return the SHA-256 hashes (file: hash) of a schema file and the documents it references.
+
+    :param schema_file: DTD or RELAX NG file
+    :param references: function that yields the (URL, public identifier) references of a file
+
+    References are resolved with the XML catalog, relative to the referencing file.
+    Return None for remote documents, or when a document can not be read.
+    """
+    documents: dict[str, str] = {}
+    pending = [os.path.abspath(schema_file)]
+    try:
+        while pending:
+            file_name = pending.pop()
+            if file_name in documents:
+                continue
+            documents[file_name] = file_sha256(file_name)
+            for url, public_id in references(file_name):
+                resolver = catalog_resolver()
+                uri = (resolver and resolver.catalog.lookup(url, public_id)) or urljoin(
+                    file_name, url
+                )
+                parsed = urlparse(uri)
+                if parsed.scheme == "file":
+                    uri = parsed.path
+                elif len(parsed.scheme) > 1:
+                    logger.debug("Remote schema document '%s'", uri)
+                    return None
+                pending.append(os.path.abspath(uri))
+    except (OSError, etree.XMLSyntaxError) as e:
+        logger.debug("Unable to read schema document: %s", e)
+        return None
+    return documents
+
+
+def dtd_documents(dtd_file: str) -> Optional[dict[str, str]]:
+    """Return the SHA-256 hashes (file: hash) of a DTD file and its external parameter entities.
+
+    :param dtd_file: DTD file
+
+    Return None for remote documents, or when a document can not be read.
+    """
+    return _schema_documents(dtd_file, _dtd_references)
+
+
+def relaxng_documents(relaxng_file: str) -> Optional[dict[str, str]]:
+    """Return the SHA-256 hashes (file: hash) of a RELAX NG file and its included documents.
+
+    :param relaxng_file: RELAX NG file; include and externalRef patterns are followed
+
+    Return None for remote documents, or when a document can not be read.
+    """
+    return _schema_documents(relaxng_file, _relaxng_references)
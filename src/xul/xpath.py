@@ -19,26 +19,68 @@ The return value types of XPath evaluations vary, depending on the XPath express
 - float:                    "count(location)"
 """
 
+import re
+from collections.abc import Hashable
+from functools import _CacheInfo, lru_cache
 from logging import getLogger
 from typing import Optional, TextIO, Union
 
 from lxml import etree
 
 from .etree import build_etree
+from .stats import phase, timed
 
 logger = getLogger(__name__)
 
+# XPath string literals and namespace prefixes of QNames (prefix:name, prefix:*).
+# A prefix follows an axis (child::prefix:name) but not a single colon (prefix:name:).
+_XPATH_LITERAL = re.compile(r"\"[^\"]*\"|'[^']*'")
+_XPATH_PREFIX = re.compile(r"(?<![\w.\-])(?<![^:]:)([^\W\d][\w.\-]*):(?=[^\W\d]|\*)")
+
+# Maximum number of compiled XPath expressions in the cache; see build_xpath().
+XPATH_CACHE_SIZE = 128
+# Cache keys of the XPath expressions compiled in this process, oldest first; see compiled_xpaths().
+_compiled: list[tuple[str, tuple[tuple[str, str], ...]]] = []
+
+
+@lru_cache(maxsize=XPATH_CACHE_SIZE)
+def _compile_xpath(xpath_exp: str, ns_items: tuple[tuple[str, str], ...]) -> etree.XPath:
+    """Compile an XPath expression; cached by expression and (frozen) namespaces."""
+    xpath_obj = etree.XPath(xpath_exp, namespaces=dict(ns_items))
+    _compiled.append((xpath_exp, ns_items))
+    del _compiled[:-XPATH_CACHE_SIZE]
+    return xpath_obj
+
+
+def compiled_xpaths() -> list[tuple[str, tuple[tuple[str, str], ...]]]:
+    """Return the XPath expressions and namespaces compiled in this process.
+
+    The (expression, namespaces) cache keys of the last XPATH_CACHE_SIZE
+    compiled XPath expressions, oldest first, e.g. to compile them in another
+    process with build_xpath(expression, dict(namespaces)).
+    """
+    return list(_compiled)
+
+
+def xpath_cache_info() -> _CacheInfo:
+    """Return the hits, misses, maxsize and currsize of the compiled XPath cache."""
+    return _compile_xpath.cache_info()
+
 
 def build_xpath(xpath_exp: str, ns_map: Optional[dict[str, str]] = None) -> Optional[etree.XPath]:
     """Build an lxml.etree.XPath instance from an XPath expression.
 
     :param xpath_exp: XPath expression
     :param ns_map: XML namespace (prefix: URI) dictionary
+
+    Compiled XPath instances are cached (LRU) by the XPath expression and
+    the XML namespaces, so XML sources with the same namespaces share one
+    XPath instance; see xpath_cache_info().
     """
-    if not ns_map:
-        ns_map = {}
+    ns_items = tuple(sorted(ns_map.items())) if ns_map else ()
     try:
-        return etree.XPath(xpath_exp, namespaces=ns_map)
+        with phase("compile"):
+            return _compile_xpath(xpath_exp, ns_items)
     # Handle (parsing) errors in XPath expression.
     #   https://lxml.de/xpathxslt.html#error-handling
     except etree.XPathSyntaxError as e:
@@ -46,10 +88,11 @@ def build_xpath(xpath_exp: str, ns_map: Optional[dict[str, str]] = None) -> Opti
         return None
 
 
-def etree_xpath(el_tree: etree._ElementTree, xpath_obj: etree.XPath):
+@timed("xpath")
+def etree_xpath(el_tree: Union[etree._ElementTree, etree._Element], xpath_obj: etree.XPath):
     """Apply XPath instance to an ElementTree.
 
-    :param el_tree: lxml ElementTree
+    :param el_tree: lxml ElementTree or element (context node)
     :param xpath_obj: lxml.etree.XPath instance; see build_xpath()
     :return: XPath result
     """
@@ -121,53 +164,194 @@ def update_ns_map(
         https://lxml.de/xpathxslt.html#namespaces-and-prefixes
     """
     for key in elm.nsmap:
-        if key is None:
-            # XPath prefix for element default namespace.
-            if none_prefix not in ns_map:
-                ns_map[none_prefix] = elm.nsmap[key]
-        # Protect the XPath default namespace prefix.
-        elif not (key in ns_map or key == none_prefix):
-            ns_map[key] = elm.nsmap[key]
+        add_namespace(ns_map, key, elm.nsmap[key], none_prefix=none_prefix)
+
+
+def add_namespace(
+    ns_map: dict[str, str], prefix: Optional[str], uri: str, none_prefix: str = "default"
+) -> None:
+    """Add a namespace declaration to the XPath namespace prefix mapping.
+
+    :param ns_map: XML namespace (prefix: URI) dictionary
+    :param prefix: namespace prefix; None or "" for the default namespace
+    :param uri: namespace URI
+    :param none_prefix: prefix for the default namespace in XPath
+
+    First occurrence (ns_map) wins; see update_ns_map().
+    """
+    if not prefix:
+        # XPath prefix for element default namespace.
+        if none_prefix not in ns_map:
+            ns_map[none_prefix] = uri
+    # Protect the XPath default namespace prefix.
+    elif not (prefix in ns_map or prefix == none_prefix):
+        ns_map[prefix] = uri
 
 
+def xpath_prefixes(xpath_exp: str) -> set[str]:
+    """Return the namespace prefixes used in an XPath expression.
+
+    :param xpath_exp: XPath expression
+
+    Axis names (child::) are not prefixes; string literals are ignored.
+    """
+    return set(_XPATH_PREFIX.findall(_XPATH_LITERAL.sub("", xpath_exp)))
+
+
+def exslt_ns_map() -> dict[str, str]:
+    """Return the EXSLT XML namespaces 'prefix: URI' mapping.
+
+    EXSLT requires libxslt 1.1.25 and newer.
+    """
+    if etree.LIBXSLT_COMPILED_VERSION < (1, 1, 25):
+        logger.warning(
+            "EXSLT requires libxslt 1.1.25 or higher. lxml is compiled against libxslt %s",
+            ".".join(str(n) for n in etree.LIBXSLT_COMPILED_VERSION),
+        )
+    # EXSLT <https://exslt.github.io/>
+    return {
+        "date": "http://exslt.org/dates-and-times",
+        "dyn": "http://exslt.org/dynamic",
+        "exsl": "http://exslt.org/common",
+        "func": "http://exslt.org/functions",
+        "math": "http://exslt.org/math",
+        "random": "http://exslt.org/random",
+        "re": "http://exslt.org/regular-expressions",
+        "set": "http://exslt.org/sets",
+        "str": "http://exslt.org/strings",
+    }
+
+
+@timed("namespaces")
 def namespaces(
-    el_tree: etree._ElementTree, exslt: bool = False, none_prefix: str = "default"
+    el_tree: etree._ElementTree,
+    exslt: bool = False,
+    none_prefix: str = "default",
+    prefixes: Optional[set[str]] = None,
 ) -> dict[str, str]:
     """Collect all XML namespaces (xmlns) in ElementTree.
 
     :param el_tree: lxml ElementTree
     :param exslt: add EXSLT XML namespace prefixes (libxslt 1.1.25 and newer)
     :param none_prefix: prefix for the default namespace in XPath
+    :param prefixes: (optional) stop when these prefixes are defined, e.g. the
+        namespace prefixes of an XPath expression
 
     Return XML namespaces (xmlns) 'prefix: URI' mapping.
 
+    Only the namespace declarations are visited (iterwalk start-ns events),
+    in document order; the first occurrence of a prefix wins, so the
+    prefixes that are defined do not change after an early stop.
+
     Namespaces.
         https://lxml.de/tutorial.html#namespaces
+    iterwalk:
+        https://lxml.de/parsing.html#iterparse-and-iterwalk
     """
-    if exslt:
-        if etree.LIBXSLT_COMPILED_VERSION < (1, 1, 25):
-            logger.warning(
-                "EXSLT requires libxslt 1.1.25 or higher. lxml is compiled against libxslt %s",
-                ".".join(str(n) for n in etree.LIBXSLT_COMPILED_VERSION),
-            )
-        # EXSLT <https://exslt.github.io/>
-        ns_map = {
-            "date": "http://exslt.org/dates-and-times",
-            "dyn": "http://exslt.org/dynamic",
-            "exsl": "http://exslt.org/common",
-            "func": "http://exslt.org/functions",
-            "math": "http://exslt.org/math",
-            "random": "http://exslt.org/random",
-            "re": "http://exslt.org/regular-expressions",
-            "set": "http://exslt.org/sets",
-            "str": "http://exslt.org/strings",
-        }
-    else:
-        ns_map = {}
-
-    # Collect XML namespaces (xmlns) in all elements.
-    for elm in el_tree.iter("*"):
-        if elm.nsmap:
-            update_ns_map(ns_map, elm, none_prefix=none_prefix)
+    ns_map = exslt_ns_map() if exslt else {}
+
+    # Collect the XML namespace declarations (xmlns) of all elements.
+    for _, (prefix, uri) in etree.iterwalk(el_tree, events=("start-ns",)):
+        add_namespace(ns_map, prefix, uri, none_prefix=none_prefix)
+        if prefixes is not None and prefixes <= ns_map.keys():
+            break
 
     return ns_map
+
+
+def _step(node: etree._Element) -> tuple[Hashable, str]:
+    """Return the sibling key and the location step (without index) of a node; see ElementPaths.
+
+    Key None: an element in the default namespace (step "*") counts all sibling elements.
+    """
+    tag = node.tag
+    if tag is etree.Comment:
+        return "comment()", "comment()"
+    if tag is etree.PI:
+        step = f"processing-instruction('{node.target}')"  # type: ignore[attr-defined]
+        return step, step
+    if tag is etree.Entity:
+        return False, ""
+    if tag[0] != "{":  # type: ignore[index]
+        # No namespace.
+        return ("", tag), tag  # type: ignore[return-value]
+    if node.prefix is None:
+        # Default namespace: elements cannot be named in XPath without a prefix.
+        return None, "*"
+    local_name = tag.split("}", 1)[1]  # type: ignore[union-attr]
+    return (node.prefix, local_name), f"{node.prefix}:{local_name}"
+
+
+class ElementPaths:
+    """Absolute XPath expressions of the elements of an ElementTree (-r, --result-xpath).
+
+    :param el_tree: lxml ElementTree
+
+    The paths are the same as ElementTree.getpath() (libxml2 xmlGetNodePath):
+    a location step has an index when a sibling has the same step. getpath()
+    walks to the root element and counts the siblings of every ancestor for
+    every element. ElementPaths numbers all children of a parent element in
+    one pass and memoises the paths of the parent elements, so the paths of
+    a result set with many siblings (wide documents) take linear time.
+
+    ElementTree.getpath:
+        https://lxml.de/apidoc/lxml.etree.html#lxml.etree._ElementTree.getpath
+    """
+
+    def __init__(self, el_tree: etree._ElementTree) -> None:
+        self.el_tree = el_tree
+        # Element: absolute XPath expression.
+        self.paths: dict[etree._Element, str] = {}
+        # Element: location step (with index).
+        self.steps: dict[etree._Element, str] = {}
+
+    def _number_siblings(self, node: etree._Element) -> None:
+        """Add the location steps of a node and all its siblings."""
+        parent = node.getparent()
+        if parent is None:
+            # Root element, comments and processing instructions of the document.
+            siblings = [*reversed(list(node.itersiblings(preceding=True))), node]
+            siblings.extend(node.itersiblings())
+        else:
+            siblings = list(parent)
+        steps = [_step(sibling) for sibling in siblings]
+        counts: dict[Hashable, int] = {}
+        for key, _ in steps:
+            counts[key] = counts.get(key, 0) + 1
+        # Elements in the default namespace ("*") count all sibling elements.
+        elements = sum(n for key, n in counts.items() if key is None or isinstance(key, tuple))
+        seen: dict[Hashable, int] = {}
+        position = 0
+        for sibling, (key, step) in zip(siblings, steps):
+            if key is False:
+                continue
+            if key is None or isinstance(key, tuple):
+                position += 1
+            seen[key] = seen.get(key, 0) + 1
+            if key is None:
+                if elements > 1:
+                    step = f"{step}[{position}]"
+            elif counts[key] > 1:
+                step = f"{step}[{seen[key]}]"
+            self.steps[sibling] = step
+
+    def getpath(self, element: etree._Element) -> str:
+        """Return the absolute XPath expression of an element (or comment, processing instruction).
+
+        :param element: element of the ElementTree
+        """
+        if (path := self.paths.get(element)) is not None:
+            return path
+        # Ancestors without a path.
+        chain = []
+        node: Optional[etree._Element] = element
+        while node is not None and node not in self.paths:
+            chain.append(node)
+            node = node.getparent()
+        path = "" if node is None else self.paths[node]
+        for node in reversed(chain):
+            if node not in self.steps:
+                self._number_siblings(node)
+            path = f"{path}/{self.steps[node]}"
+            self.paths[node] = path
+        return path
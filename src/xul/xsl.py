@@ -4,22 +4,90 @@ XSLT with lxml
     https://lxml.de/xpathxslt.html#xslt
 """
 
+import os
 import sys
 from logging import getLogger
 from typing import Optional, TextIO, Union
+from urllib.parse import urlparse
 
 # pylint: disable=no-member
 from lxml import etree
 
+from .catalog import add_catalog_resolver
 from .etree import build_etree
+from .stats import timed
 
 logger = getLogger(__name__)
 
+# In-process XSL Transformers: XSLT file -> (XSLT, modification times of its documents).
+_transformers: dict[str, tuple[etree.XSLT, dict[str, int]]] = {}
 
-def build_xsl_transform(xslt_source: Union[TextIO, str]) -> Optional[etree.XSLT]:
+
+class DocumentRecorder(etree.Resolver):
+    """Record the modification times of the local documents of an XSLT source.
+
+    The XSLT source and its xsl:import and xsl:include documents.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.mtimes: dict[str, int] = {}
+
+    def resolve(self, system_url, public_id, context):
+        """Record a local document; the default document loader loads it."""
+        if system_url and urlparse(system_url).scheme in ("", "file"):
+            file_name = os.path.abspath(urlparse(system_url).path)
+            try:
+                self.mtimes[file_name] = os.stat(file_name).st_mtime_ns
+            except OSError:
+                pass
+        return None
+
+
+def _unchanged(mtimes: dict[str, int]) -> bool:
+    """Return True when none of the recorded documents changed."""
+    try:
+        return all(os.stat(f).st_mtime_ns == mtime for f, mtime in mtimes.items())
+    except OSError:
+        return False
+
+
+def get_xsl_transform(xslt_source: Union[TextIO, str]) -> Optional[etree.XSLT]:
+    """Return the (cached) XSL Transformer of an XSLT file.
+
+    :param xslt_source: XSLT file, file-like object or URL
+
+    The XSL Transformer is compiled once per process, until the XSLT file or
+    one of its (local) xsl:import and xsl:include documents changes.
+    See build_xsl_transform() for file-like objects and URLs.
+
+    Return None on error.
+    """
+    if not isinstance(xslt_source, str) or urlparse(xslt_source).scheme not in ("", "file"):
+        return build_xsl_transform(xslt_source)
+    key = os.path.abspath(urlparse(xslt_source).path)
+
+    if key in _transformers:
+        transformer, mtimes = _transformers[key]
+        if _unchanged(mtimes):
+            return transformer
+        del _transformers[key]
+
+    recorder = DocumentRecorder()
+    parser = add_catalog_resolver(etree.XMLParser(ns_clean=True))
+    parser.resolvers.add(recorder)
+    if xslt_transformer := build_xsl_transform(xslt_source, parser=parser):
+        _transformers[key] = (xslt_transformer, recorder.mtimes)
+    return xslt_transformer
+
+
+def build_xsl_transform(
+    xslt_source: Union[TextIO, str], parser: Optional[etree.XMLParser] = None
+) -> Optional[etree.XSLT]:
     """Parse an XSLT source into an XSL Transformer.
 
     :param xslt_source: XSLT file, file-like object or URL
+    :param parser: (optional) XML parser
 
     Lines with XSLT parse errors are logged as warnings.
 
@@ -31,7 +99,7 @@ def build_xsl_transform(xslt_source: Union[TextIO, str]) -> Optional[etree.XSLT]
     I/O access control in XSLT:
         https://lxml.de/resolvers.html#i-o-access-control-in-xslt
     """
-    xslt_etree = build_etree(xslt_source, lenient=False)
+    xslt_etree = build_etree(xslt_source, parser=parser, lenient=False)
     if not xslt_etree:
         return None
 
@@ -51,6 +119,7 @@ def build_xsl_transform(xslt_source: Union[TextIO, str]) -> Optional[etree.XSLT]
         return None
 
 
+@timed("transform")
 def etree_transformer(
     el_tree: etree._ElementTree, transformer: etree.XSLT, **params
 ) -> Optional[etree._XSLTResultTree]:
@@ -23,4 +23,7 @@ black --check --diff .
 echo "\nCheck typing (mypy)"
 mypy .
 
+echo "\nTests (pytest)"
+pytest -q
+
 echo "\nChecks complete"
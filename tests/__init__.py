@@ -0,0 +1 @@
+"""Tests of the Xul command-line scripts."""
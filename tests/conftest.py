@@ -0,0 +1,29 @@
+"""Fixtures and helpers for the tests of the command-line scripts."""
+
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def run_script(script: str, *args: str, cwd: str) -> subprocess.CompletedProcess:
+    """Run a command-line script (xp, validate, transform, ppx) in a new process.
+
+    :param script: name of the script module in xul.cmd
+    :param args: command-line arguments
+    :param cwd: working directory
+
+    Standard input is empty (not a terminal); standard output and standard
+    error are captured as text.
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    return subprocess.run(
+        [sys.executable, "-c", f"from xul.cmd.{script} import main; main()", *args],
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
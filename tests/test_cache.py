@@ -0,0 +1,68 @@
+"""Tests of the result cache of xp and validate (--cache)."""
+
+import json
+
+import pytest
+
+from .conftest import run_script
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Put the result cache database in a temporary directory."""
+    monkeypatch.setenv("XUL_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+def parsed_sources(result):
+    """Names of the XML sources that were parsed (--stats-json)."""
+    stats = json.loads(result.stderr.splitlines()[-1])
+    return [source["source"] for source in stats["sources"] if "parse" in source["phases"]]
+
+
+def test_cache_hits(tmp_path, cache_dir):
+    """Unchanged XML files are not parsed again."""
+    (tmp_path / "a.xml").write_text("<r><a/></r>")
+    (tmp_path / "b.xml").write_text("<r><a/><a/></r>")
+    args = ["--cache", "--stats-json", "-c", "//a", "a.xml", "b.xml"]
+
+    first = run_script("xp", *args, cwd=str(tmp_path))
+    assert first.stdout == "a.xml:1\nb.xml:2\n"
+    assert parsed_sources(first) == ["a.xml", "b.xml"]
+    assert (cache_dir / "results.sqlite").exists()
+
+    second = run_script("xp", *args, cwd=str(tmp_path))
+    assert second.stdout == first.stdout
+    assert parsed_sources(second) == []
+
+
+def test_cache_changed_file(tmp_path, cache_dir):
+    """A changed XML file is a cache miss."""
+    (tmp_path / "a.xml").write_text("<r><a/></r>")
+    (tmp_path / "b.xml").write_text("<r><a/><a/></r>")
+    args = ["--cache", "--stats-json", "-l", "//a[2]", "a.xml", "b.xml"]
+    assert run_script("xp", *args, cwd=str(tmp_path)).stdout == "b.xml\n"
+
+    (tmp_path / "a.xml").write_text("<r><a/><a/><a/></r>")
+    result = run_script("xp", *args, cwd=str(tmp_path))
+    assert result.stdout == "a.xml\nb.xml\n"
+    assert parsed_sources(result) == ["a.xml"]
+
+
+def test_cache_context(tmp_path, cache_dir):
+    """Results are cached per XPath expression and options."""
+    (tmp_path / "a.xml").write_text("<r><a/><b/></r>")
+    for xpath_exp, expected in [("//a", "1\n"), ("//*", "3\n"), ("//a", "1\n")]:
+        result = run_script("xp", "--cache", "-c", xpath_exp, "a.xml", cwd=str(tmp_path))
+        assert result.stdout == expected
+
+    result = run_script("xp", "--cache", "-L", "//a", "a.xml", cwd=str(tmp_path))
+    assert result.stdout == ""
+
+
+def test_cache_requires_hits_or_count(tmp_path, cache_dir):
+    """The result cache is for file hits and result counts only."""
+    (tmp_path / "a.xml").write_text("<r/>")
+    result = run_script("xp", "--cache", "//a", "a.xml", cwd=str(tmp_path))
+    assert result.returncode == 2
+    assert "argument --cache: requires -l, -L or -c" in result.stderr
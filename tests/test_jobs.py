@@ -0,0 +1,84 @@
+"""Tests of the parallel processing of XML sources (--jobs)."""
+
+import time
+
+import pytest
+
+from xul.cmd.jobs import WORKER_ERROR_STATUS, run_jobs, write_output
+
+from .conftest import run_script
+
+XSD = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="r">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="a" minOccurs="0" maxOccurs="unbounded"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+
+def prepare_sleep(seconds: float):
+    """Return a job that prints its XML source after a delay; later sources are faster."""
+
+    def job(xml_source: int) -> int:
+        time.sleep(seconds / (xml_source + 1))
+        print(f"source {xml_source}")
+        return xml_source * 2
+
+    return job
+
+
+def prepare_error():
+    """Fail to prepare the job of a worker process."""
+    raise ValueError("cannot prepare the job")
+
+
+def test_jobs_order():
+    """Results and output are in XML source order, not in completion order."""
+    results = list(run_jobs(prepare_sleep, (0.2,), range(8), 4))
+    assert [result for result, _, _ in results] == [n * 2 for n in range(8)]
+    assert [stdout for _, stdout, _ in results] == [f"source {n}\n".encode() for n in range(8)]
+
+
+def test_jobs_worker_error(capsys):
+    """A job that cannot be prepared is reported once; the exit status is 60."""
+    with pytest.raises(SystemExit) as exc_info:
+        for _, stdout, stderr in run_jobs(prepare_error, (), range(20), 2):
+            write_output(stdout, stderr)
+    assert exc_info.value.code == WORKER_ERROR_STATUS == 60
+    captured = capsys.readouterr()
+    assert captured.err == "Error: cannot prepare the job\n"
+    assert captured.out == ""
+
+
+@pytest.mark.parametrize("script", ["xp", "validate"])
+def test_jobs_same_output(tmp_path, script):
+    """The output of the worker processes (-j) is the output of a single process."""
+    xml_files = []
+    for n in range(12):
+        # A malformed XML file, an invalid XML file and XML files of different sizes.
+        content = {5: "<r>", 7: "<r><b/></r>"}.get(n, f"<r>{'<a/>' * (n * 500)}</r>")
+        (tmp_path / f"{n:02}.xml").write_text(content)
+        xml_files.append(f"{n:02}.xml")
+    (tmp_path / "r.xsd").write_text(XSD)
+    args = ["//a"] if script == "xp" else ["-x", "r.xsd"]
+    single = run_script(script, "-j", "1", *args, *xml_files, cwd=str(tmp_path))
+    parallel = run_script(script, "-j", "3", *args, *xml_files, cwd=str(tmp_path))
+    assert parallel.returncode == single.returncode
+    assert parallel.stdout == single.stdout
+    assert parallel.stderr == single.stderr
+    assert "05.xml" in parallel.stderr
+    if script == "validate":
+        assert "XML source '07.xml' does not validate" in parallel.stderr
+
+
+def test_jobs_invalid_xpath(tmp_path):
+    """An invalid XPath expression is reported before the worker processes start."""
+    (tmp_path / "a.xml").write_text("<r/>")
+    (tmp_path / "b.xml").write_text("<r/>")
+    result = run_script("xp", "-j", "2", "//[", "a.xml", "b.xml", cwd=str(tmp_path))
+    assert result.returncode == 60
+    assert result.stdout == ""
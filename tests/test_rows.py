@@ -0,0 +1,88 @@
+"""Tests of the rows and columns of xp (--rows, --col)."""
+
+import json
+
+import pytest
+
+from .conftest import run_script
+
+BOOKS = """<catalog xmlns="urn:books" xmlns:p="urn:p">
+  <book id="bk101" p:lang="en"><title>XML</title><price>44.95</price></book>
+  <book id="bk102"><title>Rain</title><price>5.95</price></book>
+</catalog>
+"""
+
+COLUMNS = ["--col", "id=@id", "--col", "title=d:title", "--col", "price=number(d:price)"]
+
+
+@pytest.mark.parametrize(
+    "output_format, expected",
+    [
+        ("tsv", "id\ttitle\tprice\tlang\nbk101\tXML\t44.95\ten\nbk102\tRain\t5.95\t\n"),
+        ("csv", "id,title,price,lang\nbk101,XML,44.95,en\nbk102,Rain,5.95,\n"),
+    ],
+)
+def test_rows_table(tmp_path, output_format, expected):
+    """A header line and a line of column values for each row element."""
+    (tmp_path / "books.xml").write_text(BOOKS)
+    args = ["--format", output_format, "--rows", "//d:book", *COLUMNS, "--col", "lang=@p:lang"]
+    result = run_script("xp", *args, "books.xml", cwd=str(tmp_path))
+    assert result.returncode == 0
+    assert result.stdout == expected
+
+
+def test_rows_jsonl(tmp_path):
+    """A JSON object for each row element; null when no node is selected."""
+    (tmp_path / "books.xml").write_text(BOOKS)
+    args = ["--format", "jsonl", "--rows", "//d:book", *COLUMNS, "--col", "lang=@p:lang"]
+    result = run_script("xp", *args, "books.xml", cwd=str(tmp_path))
+    assert result.returncode == 0
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [
+        {"source": "books.xml", "id": "bk101", "title": "XML", "price": 44.95, "lang": "en"},
+        {"source": "books.xml", "id": "bk102", "title": "Rain", "price": 5.95, "lang": None},
+    ]
+
+
+def test_rows_sources(tmp_path):
+    """The first column of multiple XML sources is the source of the row."""
+    (tmp_path / "a.xml").write_text(BOOKS)
+    (tmp_path / "b.xml").write_text(BOOKS)
+    result = run_script(
+        "xp", "--rows", "//d:book", "--col", "id=@id", "a.xml", "b.xml", cwd=str(tmp_path)
+    )
+    assert result.stdout.splitlines() == [
+        "source\tid",
+        "a.xml\tbk101",
+        "a.xml\tbk102",
+        "b.xml\tbk101",
+        "b.xml\tbk102",
+    ]
+
+
+@pytest.mark.parametrize(
+    "output_format, expected", [("tsv", 'a\nt\\tb\nx,"y\n'), ("csv", 'a\nt\tb\n"x,""y"\n')]
+)
+def test_rows_escaped(tmp_path, output_format, expected):
+    """Tabs are escaped in TSV values; CSV values are quoted when needed."""
+    (tmp_path / "r.xml").write_text('<r><i a="t&#9;b"/><i a="x,&quot;y"/></r>')
+    args = ["--format", output_format, "--rows", "//i", "--col", "a=@a", "r.xml"]
+    result = run_script("xp", *args, cwd=str(tmp_path))
+    assert result.stdout == expected
+
+
+@pytest.mark.parametrize(
+    "args, message",
+    [
+        (["--rows", "//i"], "argument --rows: requires --col"),
+        (["--col", "a=@a", "//i"], "argument --col: requires --rows"),
+        (["--rows", "//i", "--col", "a"], "argument --col: NAME=XPATH expected: a"),
+        (["--format", "text", "--rows", "//i", "--col", "a=@a"], "text not allowed with --rows"),
+        (["-c", "--rows", "//i", "--col", "a=@a"], "argument --rows: not allowed with"),
+    ],
+)
+def test_rows_errors(tmp_path, args, message):
+    """Invalid combinations of the row options."""
+    (tmp_path / "r.xml").write_text("<r/>")
+    result = run_script("xp", *args, "r.xml", cwd=str(tmp_path))
+    assert result.returncode == 2
+    assert message in result.stderr
@@ -0,0 +1,93 @@
+"""Tests of the xul server and client."""
+
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import SRC_DIR, run_script
+
+XSD = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="a" type="xs:integer"/>
+</xs:schema>
+"""
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Start a xul server in the temporary directory; return its socket."""
+    socket_name = str(tmp_path / "xul.sock")
+    process = subprocess.Popen(
+        [sys.executable, "-c", "from xul.cmd.server import main; main()", "--serve", socket_name],
+        env=dict(os.environ, PYTHONPATH=SRC_DIR),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stderr is not None
+    assert "listening on" in process.stderr.readline()
+    yield socket_name
+    process.send_signal(signal.SIGTERM)
+    process.communicate(timeout=10)
+    assert not os.path.exists(socket_name)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["xp", "-c", "//v", "a.xml", "b.xml"],
+        ["xp", "--format", "jsonl", "//v/text()", "a.xml"],
+        ["xp", "//[", "a.xml"],
+        ["validate", "-x", "a.xsd", "a.xml", "c.xml"],
+        ["validate", "-x", "missing.xsd", "c.xml"],
+    ],
+)
+def test_server_same_output(tmp_path, server, args):
+    """Output and exit status of a script in the server are those of the script itself."""
+    (tmp_path / "a.xml").write_text("<r><v>1</v><v>2</v></r>")
+    (tmp_path / "b.xml").write_text("<r><v>3</v></r>")
+    (tmp_path / "c.xml").write_text("<a>1</a>")
+    (tmp_path / "a.xsd").write_text(XSD)
+    script = run_script(args[0], *args[1:], cwd=str(tmp_path))
+    # The second request uses the compiled XPath expressions and XSD of the first.
+    for _ in range(2):
+        result = run_script("server", "-S", server, *args, cwd=str(tmp_path))
+        assert result.returncode == script.returncode
+        assert result.stdout == script.stdout
+        assert result.stderr == script.stderr
+
+
+def test_server_environment(tmp_path, server):
+    """The client passes its working directory and environment to the server."""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.xml").write_text("<r><v/></r>")
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, XUL_SOCKET=server)
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from xul.cmd.server import main; main()",
+            "xp",
+            "-c",
+            "//v",
+            "a.xml",
+        ],
+        cwd=str(tmp_path / "sub"),
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0
+    assert result.stdout == "1\n"
+
+
+def test_client_no_server(tmp_path):
+    """A client without a server exits with status 75."""
+    result = run_script("server", "-S", str(tmp_path / "xul.sock"), "xp", "//v", cwd=str(tmp_path))
+    assert result.returncode == 75
+    assert "Unable to connect to Xul server" in result.stderr
@@ -0,0 +1,99 @@
+"""Tests of the streaming XPath engine (xp --stream)."""
+
+import pytest
+
+from xul.stream import build_stream_path, stream_xpath
+
+from .conftest import run_script
+
+XML = """<root xmlns:x="urn:x">
+  <item x:k="1" k="a"/>
+  <item x:k="2"/>
+  <item/>
+</root>
+"""
+
+
+@pytest.mark.parametrize(
+    "xpath_exp, expected",
+    [("//item/@x:k", ["1", "2"]), ("/root/item/@x:k", ["1", "2"]), ("//item/@k", ["a"])],
+)
+def test_prefixed_attribute_result(tmp_path, xpath_exp, expected):
+    """Attribute nodes with a namespace prefix as the result step."""
+    xml_file = tmp_path / "items.xml"
+    xml_file.write_text(XML)
+    stream_path = build_stream_path(xpath_exp)
+    assert stream_path is not None
+
+    result = stream_xpath(str(xml_file), stream_path)
+    assert result is not None
+    assert [str(node) for node in result[2]] == expected
+
+
+def test_prefixed_attribute_count(tmp_path):
+    """Count attribute nodes with a namespace prefix."""
+    xml_file = tmp_path / "items.xml"
+    xml_file.write_text(XML)
+    stream_path = build_stream_path("count(//item/@x:k)")
+    assert stream_path is not None
+
+    result = stream_xpath(str(xml_file), stream_path)
+    assert result is not None
+    assert result[2] == 2.0
+
+
+def test_prefixed_attribute_declared_below_root(tmp_path):
+    """The prefix of the attribute step is declared below the root element."""
+    xml_file = tmp_path / "items.xml"
+    xml_file.write_text('<root><item xmlns:x="urn:x" x:k="1"/><item k="2"/></root>')
+    stream_path = build_stream_path("//item/@x:k")
+    assert stream_path is not None
+
+    result = stream_xpath(str(xml_file), stream_path)
+    assert result is not None
+    assert [str(node) for node in result[2]] == ["1"]
+
+
+BOOKS = """<catalog xmlns="urn:books" xmlns:p="urn:p">
+  <book id="bk101" p:lang="en"><title>XML</title><price>44.95</price></book>
+  <book id="bk102"><title>Rain</title><price>5.95</price>
+    <note><p:ref>x</p:ref></note>
+  </book>
+  <magazine id="m1"><title>Mag</title></magazine>
+</catalog>
+"""
+
+
+@pytest.mark.parametrize(
+    "xpath_exp",
+    [
+        "//d:book",
+        "/d:catalog/d:book/@id",
+        "d:book/d:price",
+        "//d:title/text()",
+        "//d:book[@id]",
+        "//p:ref",
+        "count(//d:book)",
+        "count(//d:title)",
+    ],
+)
+@pytest.mark.parametrize("output_format", ["text", "jsonl"])
+def test_stream_same_results(tmp_path, xpath_exp, output_format):
+    """The streaming engine (xp --stream) prints the results of the tree engine."""
+    (tmp_path / "books.xml").write_text(BOOKS)
+    args = ["--format", output_format, xpath_exp, "books.xml"]
+    tree = run_script("xp", *args, cwd=str(tmp_path))
+    streamed = run_script("xp", "--stream", *args, cwd=str(tmp_path))
+    assert "XPath engine: streaming" in streamed.stderr
+    assert streamed.returncode == tree.returncode == 0
+    assert streamed.stdout == tree.stdout
+
+
+def test_stream_not_streamable(tmp_path):
+    """XPath expressions outside the streamable subset fall back to the tree engine."""
+    (tmp_path / "books.xml").write_text(BOOKS)
+    result = run_script(
+        "xp", "--stream", "-q", "//d:book[1]/d:title/text()", "books.xml", cwd=str(tmp_path)
+    )
+    assert "XPath engine: tree (the XPath expression is not streamable)" in result.stderr
+    assert "XML" in result.stdout
@@ -0,0 +1,73 @@
+"""Tests of the transform script."""
+
+import os
+
+import pytest
+
+from .conftest import run_script
+
+# Style sheet without an xsl:output encoding.
+TEXT_XSLT = """<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:output method="text"/>
+  <xsl:template match="/">elements: <xsl:value-of select="count(//*)"/></xsl:template>
+</xsl:stylesheet>
+"""
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_output_dir_without_encoding(tmp_path, jobs):
+    """Save the results (-O) of a style sheet without an xsl:output encoding."""
+    (tmp_path / "text.xsl").write_text(TEXT_XSLT)
+    (tmp_path / "a.xml").write_text("<a><b/></a>")
+    (tmp_path / "b.xml").write_text("<a><b/><b/></a>")
+
+    result = run_script(
+        "transform", "text.xsl", "-j", jobs, "-O", "out", "a.xml", "b.xml", cwd=str(tmp_path)
+    )
+    assert result.returncode == 0, result.stderr
+    assert "LookupError" not in result.stderr
+    assert sorted(os.listdir(tmp_path / "out")) == ["a.xml", "b.xml"]
+    assert (tmp_path / "out" / "a.xml").read_text() == "elements: 2"
+    assert (tmp_path / "out" / "b.xml").read_text() == "elements: 3"
+
+
+def test_file_without_encoding(tmp_path):
+    """Save the result (-f) of a style sheet without an xsl:output encoding."""
+    (tmp_path / "text.xsl").write_text(TEXT_XSLT)
+    (tmp_path / "a.xml").write_text("<a><b/></a>")
+
+    result = run_script("transform", "text.xsl", "-f", "result.txt", "a.xml", cwd=str(tmp_path))
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "result.txt").read_text() == "elements: 2"
+
+
+IDENTITY_XSLT = """<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:output method="xml" encoding="UTF-8"/>
+  <xsl:template match="@*|node()"><xsl:copy><xsl:apply-templates select="@*|node()"/></xsl:copy>
+  </xsl:template>
+</xsl:stylesheet>
+"""
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_output_dir_in_directory(tmp_path, jobs):
+    """The output directory (-O) in a directory (-R) is not searched for XML files."""
+    (tmp_path / "id.xsl").write_text(IDENTITY_XSLT)
+    (tmp_path / "f1.xml").write_text("<a/>")
+    (tmp_path / "f2.xml").write_text("<b/>")
+
+    result = run_script(
+        "transform",
+        "id.xsl",
+        "-j",
+        jobs,
+        "-O",
+        "out",
+        "-R",
+        ".",
+        "--include",
+        "f*.xml",
+        cwd=str(tmp_path),
+    )
+    assert result.returncode == 0, result.stderr
+    assert sorted(os.listdir(tmp_path / "out")) == ["f1.xml", "f2.xml"]
@@ -0,0 +1,47 @@
+"""Tests of the validate script."""
+
+from .conftest import run_script
+
+XSD = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="a" type="xs:integer"/>
+</xs:schema>
+"""
+
+
+def test_cache_source_names(tmp_path, monkeypatch):
+    """Cached results of XML files with the same content are logged with their own name."""
+    monkeypatch.setenv("XUL_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "a.xsd").write_text(XSD)
+    (tmp_path / "b.xml").write_text("<a>b</a>")
+    (tmp_path / "c.xml").write_text("<a>b</a>")
+
+    # The second run replays the cached results.
+    for _ in range(2):
+        result = run_script(
+            "validate", "--cache", "-x", "a.xsd", "b.xml", "c.xml", cwd=str(tmp_path)
+        )
+        assert result.stderr.count("XML source 'b.xml' does not validate") == 1
+        assert result.stderr.count("XML source 'c.xml' does not validate") == 1
+
+
+def test_first_error_line(tmp_path):
+    """The first XSD validation error (--first-error) is logged with its line."""
+    (tmp_path / "a.xsd").write_text(
+        """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="r">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="a" type="xs:integer" maxOccurs="unbounded"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+    )
+    lines = ["<r>", *(f"<a>{n}</a>" for n in range(100_000)), "</r>"]
+    lines[60_000] = "<a>x</a>"
+    (tmp_path / "r.xml").write_text("\n".join(lines))
+
+    result = run_script("validate", "--first-error", "-x", "a.xsd", "r.xml", cwd=str(tmp_path))
+    assert "XML source 'r.xml' does not validate" in result.stderr
+    assert "line 60001: Element 'a': 'x' is not a valid value" in result.stderr
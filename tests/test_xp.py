@@ -0,0 +1,90 @@
+"""Tests of the xp script."""
+
+import json
+
+import pytest
+
+from .conftest import run_script
+
+RECORDS = """<export xmlns="urn:d">
+  <record><v>1</v></record>
+  <record><v>2</v><v>3</v></record>
+  <record><v>4</v></record>
+</export>
+"""
+
+
+def test_rows_record(tmp_path):
+    """Rows (--rows) of records (--record) are rejected."""
+    (tmp_path / "export.xml").write_text(RECORDS)
+    result = run_script(
+        "xp", "--record", "record", "--rows", "d:v", "--col", "v=.", "export.xml", cwd=str(tmp_path)
+    )
+    assert result.returncode == 2
+    assert "argument --rows: not allowed with" in result.stderr
+    assert "--record" in result.stderr
+
+
+def test_record_absolute_xpath(tmp_path):
+    """Absolute XPath expressions select from each record (--record) once."""
+    (tmp_path / "export.xml").write_text(RECORDS)
+    for xpath_exp, expected in [("count(//d:v)", "4"), ("count(/d:record)", "3")]:
+        result = run_script("xp", "--record", "record", xpath_exp, "export.xml", cwd=str(tmp_path))
+        assert result.returncode == 0
+        assert result.stdout.split()[-1] == expected
+
+    args = ["--format", "jsonl", "--record", "record", "//d:v/text()", "export.xml"]
+    result = run_script("xp", *args, cwd=str(tmp_path))
+    values = [json.loads(line)["value"] for line in result.stdout.splitlines()]
+    assert values == ["1", "2", "3", "4"]
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [(["sum(d:v)"], '"value":10'), (["d:v = 3"], '"value":true'), (["d:v = 9"], '"value":false')],
+)
+def test_record_aggregated(tmp_path, args, expected):
+    """Numbers of the records (--record) are summed; booleans are true for any record."""
+    (tmp_path / "export.xml").write_text(RECORDS)
+    result = run_script(
+        "xp", "--format", "jsonl", "--record", "record", *args, "export.xml", cwd=str(tmp_path)
+    )
+    assert result.returncode == 0
+    assert expected in result.stdout
+
+
+def test_record_same_results(tmp_path):
+    """The result nodes of the records (--record) are the result nodes of the XML source."""
+    (tmp_path / "export.xml").write_text(RECORDS)
+    tree = run_script("xp", "--format", "jsonl", "//d:record/d:v", "export.xml", cwd=str(tmp_path))
+    records = run_script(
+        "xp", "--format", "jsonl", "--record", "record", "d:v", "export.xml", cwd=str(tmp_path)
+    )
+    assert records.stdout == tree.stdout
+    assert len(records.stdout.splitlines()) == 4
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [(["-l", "d:v = 3"], "export.xml\n"), (["-L", "d:v = 3"], ""), (["-c", "d:v"], "4\n")],
+)
+def test_record_hits_count(tmp_path, args, expected):
+    """File hits and result counts of records (--record)."""
+    (tmp_path / "export.xml").write_text(RECORDS)
+    result = run_script("xp", "--record", "record", *args, "export.xml", cwd=str(tmp_path))
+    assert result.returncode == 0
+    assert result.stdout == expected
+
+
+def test_xpath_options_intermixed(tmp_path):
+    """XML sources before and after the -x/--xpath options."""
+    (tmp_path / "a.xml").write_text("<x><y>a</y></x>")
+    (tmp_path / "b.xml").write_text("<x><y>b</y><y>c</y></x>")
+    result = run_script("xp", "a.xml", "-x", "//y", "b.xml", "-x", "//x", "-c", cwd=str(tmp_path))
+    assert result.returncode == 0
+    assert result.stdout.splitlines() == [
+        "a.xml (//y):1",
+        "a.xml (//x):1",
+        "b.xml (//y):2",
+        "b.xml (//x):1",
+    ]